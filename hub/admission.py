@@ -0,0 +1,204 @@
+"""
+Admission control for the Telegram webhook endpoint
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import Counter
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+
+def is_priority_update(body):
+    """True for updates that must not be shed behind chatter: /start and contacts."""
+    try:
+        payload = json.loads(body or b'{}')
+    except ValueError:
+        return False
+    if not isinstance(payload, dict):
+        return False
+    message = payload.get('message') or payload.get('edited_message') or {}
+    if not isinstance(message, dict):
+        return False
+    return bool(message.get('contact')) or (message.get('text') or '').strip().startswith('/start')
+
+
+# KEYS: lease sets for all bots and for this bot. ARGV: now, lease expiry,
+# token, limit for all bots, limit for this bot, key TTL. Drops expired leases,
+# then takes a slot in both sets or in neither. Returns 1 when taken.
+ACQUIRE_SCRIPT = """
+for i = 1, 2 do
+    redis.call('ZREMRANGEBYSCORE', KEYS[i], '-inf', ARGV[1])
+end
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[4]) or redis.call('ZCARD', KEYS[2]) >= tonumber(ARGV[5]) then
+    return 0
+end
+for i = 1, 2 do
+    redis.call('ZADD', KEYS[i], ARGV[2], ARGV[3])
+    redis.call('EXPIRE', KEYS[i], ARGV[6])
+end
+return 1
+"""
+
+SLOTS_KEY = 'webhook:slots'
+BOT_SLOTS_KEY = 'webhook:slots:{bot_id}'
+
+
+def _redis():
+    from django_redis import get_redis_connection
+
+    return get_redis_connection('default')
+
+
+def _shared_slots():
+    """Slots live in Redis when the cache is django_redis, else in this process."""
+    return 'django_redis' in settings.CACHES['default']['BACKEND']
+
+
+class AdmissionController:
+    """Bounded concurrency for webhook processing, across every web process.
+
+    At most ``max_in_flight`` updates are admitted at once, and at most
+    ``per_bot`` of them for one bot, so a flood on one bot cannot take every
+    DB connection. A slot is a lease in two Redis sorted sets (all bots, this
+    bot), taken in one script. Leases left behind by a crashed process expire
+    after ``lease_ttl`` seconds. Without Redis the limits apply per process.
+
+    Requests over the limit wait up to ``queue_timeout`` seconds. Once
+    ``max_queue`` requests are waiting in this process, new ones are shed
+    immediately. Priority updates get ``headroom`` extra slots on both
+    limits and are never shed for queue depth.
+
+    acquire() and release() run on the event loop (see admission_control):
+    Daphne runs sync views one at a time on a single thread, so concurrent
+    webhook calls only exist before they reach it.
+    """
+
+    def __init__(self, max_in_flight=None, per_bot=None, headroom=None, max_queue=None, queue_timeout=None,
+                 lease_ttl=None, poll_interval=0.02):
+        self.max_in_flight = max_in_flight or getattr(settings, 'WEBHOOK_MAX_IN_FLIGHT', 8)
+        self.per_bot = per_bot or getattr(settings, 'WEBHOOK_MAX_IN_FLIGHT_PER_BOT', 4)
+        self.headroom = headroom if headroom is not None else getattr(settings, 'WEBHOOK_PRIORITY_HEADROOM', 2)
+        self.max_queue = max_queue if max_queue is not None else getattr(settings, 'WEBHOOK_MAX_QUEUE', 16)
+        self.queue_timeout = (
+            queue_timeout if queue_timeout is not None
+            else getattr(settings, 'WEBHOOK_QUEUE_TIMEOUT', 1.0)
+        )
+        self.lease_ttl = lease_ttl or getattr(settings, 'WEBHOOK_SLOT_LEASE', 60)
+        self.poll_interval = poll_interval
+        self._in_flight = 0
+        self._per_bot = Counter()
+        self._waiting = 0
+        self._waiting_priority = 0
+        self.shed = 0
+
+    def _take_shared(self, key, token, extra):
+        now = time.time()
+        return bool(_redis().eval(
+            ACQUIRE_SCRIPT, 2, SLOTS_KEY, BOT_SLOTS_KEY.format(bot_id=key),
+            repr(now), repr(now + self.lease_ttl), token,
+            self.max_in_flight + extra, self.per_bot + extra, int(self.lease_ttl) + 1,
+        ))
+
+    def _release_shared(self, key, token):
+        client = _redis()
+        client.zrem(SLOTS_KEY, token)
+        client.zrem(BOT_SLOTS_KEY.format(bot_id=key), token)
+
+    async def _take(self, key, priority):
+        """A slot for ``key`` if one is free right now, else None."""
+        extra = self.headroom if priority else 0
+        if _shared_slots():
+            token = uuid.uuid4().hex
+            try:
+                if await sync_to_async(self._take_shared, thread_sensitive=False)(key, token, extra):
+                    return ('shared', key, token)
+                return None
+            except Exception as ex:
+                logger.warning('webhook admission: Redis unavailable, limiting per process: %s', ex)
+        if self._in_flight < self.max_in_flight + extra and self._per_bot[key] < self.per_bot + extra:
+            self._in_flight += 1
+            self._per_bot[key] += 1
+            return ('local', key, None)
+        return None
+
+    async def acquire(self, key, priority=False):
+        """Take a processing slot for ``key``. Returns the slot for release(), or None if shed."""
+        slot = await self._take(key, priority)
+        if slot is not None:
+            return slot
+        if not priority and self._waiting >= self.max_queue:
+            self.shed += 1
+            return None
+        deadline = time.monotonic() + self.queue_timeout
+        self._waiting += 1
+        self._waiting_priority += priority
+        try:
+            while time.monotonic() < deadline:
+                await asyncio.sleep(min(self.poll_interval, max(deadline - time.monotonic(), 0)))
+                slot = await self._take(key, priority)
+                if slot is not None:
+                    return slot
+        finally:
+            self._waiting -= 1
+            self._waiting_priority -= priority
+        self.shed += 1
+        return None
+
+    async def release(self, slot):
+        where, key, token = slot
+        if where == 'shared':
+            try:
+                await sync_to_async(self._release_shared, thread_sensitive=False)(key, token)
+            except Exception as ex:
+                # The lease expires on its own
+                logger.warning('webhook admission: could not release slot: %s', ex)
+            return
+        self._in_flight -= 1
+        self._per_bot[key] -= 1
+        if self._per_bot[key] <= 0:
+            del self._per_bot[key]
+
+    def snapshot(self):
+        return {
+            'in_flight': self._in_flight,
+            'waiting': self._waiting,
+            'waiting_priority': self._waiting_priority,
+            'per_bot': dict(self._per_bot),
+            'shed': self.shed,
+        }
+
+
+webhook_admission = AdmissionController()
+
+
+def admission_control(view):
+    """Wrap a sync ``view(request, bot_id)`` in an async view gated by ``webhook_admission``.
+
+    The slot is taken on the event loop, before the view is handed to
+    Django's sync thread, so waiting requests are counted where they
+    actually pile up. Shed requests get 429 with Retry-After, so Telegram
+    redelivers the update later. The check runs before the view touches the
+    database or claims the update_id.
+    """
+    @wraps(view)
+    async def wrapper(request, bot_id, *args, **kwargs):
+        priority = is_priority_update(request.body)
+        slot = await webhook_admission.acquire(bot_id, priority)
+        if slot is None:
+            logger.warning('Webhook overloaded, shedding update for bot %s: %s', bot_id, webhook_admission.snapshot())
+            response = JsonResponse({'ok': False, 'error': 'overloaded'}, status=429)
+            response['Retry-After'] = str(getattr(settings, 'WEBHOOK_RETRY_AFTER', 1))
+            return response
+        try:
+            return await sync_to_async(view)(request, bot_id, *args, **kwargs)
+        finally:
+            await webhook_admission.release(slot)
+    return wrapper
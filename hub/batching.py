@@ -0,0 +1,89 @@
+"""
+Batched persistence for high-volume bot traffic
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class MessageLogBuffer:
+    """Collect MessageLog rows in memory and write them with one bulk_create.
+
+    The poller flushes once per getUpdates page. The webhook uses the shared
+    ``message_log_buffer`` below, which also flushes when the buffer is full or
+    when ``max_age`` seconds have passed since the first pending row.
+    Pending rows are flushed on interpreter shutdown.
+    """
+
+    def __init__(self, max_size=None, max_age=None, autoflush=False):
+        self.max_size = max_size or getattr(settings, 'MESSAGE_LOG_BATCH_SIZE', 200)
+        self.max_age = max_age if max_age is not None else getattr(settings, 'MESSAGE_LOG_FLUSH_INTERVAL', 2.0)
+        self.autoflush = autoflush
+        self._rows = []
+        self._lock = threading.Lock()
+        self._timer = None
+        atexit.register(self.flush)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def add(self, **fields):
+        """Queue one MessageLog row; accepts the same kwargs as objects.create()."""
+        from .models import MessageLog
+
+        row = MessageLog(**fields)
+        with self._lock:
+            self._rows.append(row)
+            full = len(self._rows) >= self.max_size
+            if not full and self.autoflush and self._timer is None:
+                self._timer = threading.Timer(self.max_age, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+        return row
+
+    def flush(self):
+        """Write all pending rows. Returns the number of rows written."""
+        with self._lock:
+            rows, self._rows = self._rows, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not rows:
+            return 0
+
+        from .models import MessageLog
+
+        try:
+            MessageLog.objects.bulk_create(rows, batch_size=self.max_size)
+            return len(rows)
+        except Exception as ex:
+            # One bad row must not cost the whole batch: retry row by row
+            logger.warning('MessageLog bulk insert of %s rows failed (%s); retrying individually', len(rows), ex)
+        written = 0
+        for row in rows:
+            try:
+                row.save(force_insert=True)
+                written += 1
+            except Exception as ex:
+                logger.exception('Dropping MessageLog row chat=%s msg=%s: %s', row.chat_id, row.message_id, ex)
+        return written
+
+    def _flush_from_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            # Timer threads get their own DB connection; don't leak it
+            connection.close()
+
+
+# Shared buffer for the webhook view (time-window flushing)
+message_log_buffer = MessageLogBuffer(autoflush=True)
@@ -0,0 +1,40 @@
+"""
+WebSocket consumers
+"""
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .live import GROUP, current_snapshot, live_state
+from .page_cache import canonical_candidate_id
+
+
+class CandidateLiveConsumer(AsyncJsonWebsocketConsumer):
+    """Pushes a candidate's supporter counts and poll tallies to its landing pages.
+
+    Sends the current state on connect, then whatever hub.live.broadcast()
+    sends to the candidate's group. Read-only: messages from the browser
+    are ignored.
+    """
+
+    group = None
+
+    async def connect(self):
+        candidate_id = canonical_candidate_id(self.scope['url_route']['kwargs']['candidate_id'])
+        snapshot = await database_sync_to_async(current_snapshot)(candidate_id) if candidate_id else None
+        if snapshot is None:
+            await self.close()
+            return
+        self.group = GROUP.format(candidate_id=candidate_id)
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+        await self.send_json(live_state(snapshot))
+
+    async def disconnect(self, code):
+        if self.group:
+            await self.channel_layer.group_discard(self.group, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        pass
+
+    async def live_update(self, event):
+        await self.send_json(event['data'])
@@ -0,0 +1,120 @@
+"""
+Conversation state engine for bot chats
+
+Flows are declared as (state, event) -> Transition tables. The current state
+of each chat lives in the cache (Redis) and is written back to BotUser.state
+in batches, so gating decisions don't need a database round trip.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+ANY = '*'
+
+STATE_AWAIT_BUTTON = 'await_button'
+STATE_ENABLED = 'enabled'
+
+
+class Transition:
+    """Target state (None = stay) and the handler actions to run, in order."""
+
+    def __init__(self, target=None, actions=()):
+        self.target = target
+        self.actions = tuple(actions)
+
+
+class Flow:
+    """Declarative state machine.
+
+    ``transitions`` maps (state, event) to a Transition. A lookup tries the
+    exact state first, then ANY. Events with no transition change nothing.
+    """
+
+    def __init__(self, name, initial, transitions):
+        self.name = name
+        self.initial = initial
+        self.transitions = transitions
+
+    def step(self, state, event):
+        state = state or self.initial
+        transition = self.transitions.get((state, event)) or self.transitions.get((ANY, event))
+        if transition is None:
+            return state, ()
+        return transition.target or state, transition.actions
+
+
+# Ask-a-question gating used by poll_updates: one question per button press
+QUESTION_FLOW = Flow(
+    name='questions',
+    initial=STATE_AWAIT_BUTTON,
+    transitions={
+        (ANY, 'start'): Transition(STATE_AWAIT_BUTTON, ['mark_started', 'send_intro', 'log_message']),
+        (ANY, 'enable_questions'): Transition(STATE_ENABLED, ['mark_started', 'send_enabled']),
+        (ANY, 'request_contact'): Transition(actions=['send_contact_keyboard']),
+        (STATE_ENABLED, 'message'): Transition(STATE_AWAIT_BUTTON, ['log_message', 'send_relock']),
+        (ANY, 'message'): Transition(actions=['delete_message', 'send_gate_prompt']),
+    },
+)
+
+
+class ConversationStore:
+    """Per-chat flow state kept in the cache and persisted to BotUser.state.
+
+    Reads come from unsaved local changes, then the cache, then the state on
+    the BotUser row the caller already loaded. Writes only touch the cache.
+    They are written back by flush(), one UPDATE per distinct state.
+    """
+
+    def __init__(self, flow, ttl=None, persist_interval=None):
+        self.flow = flow
+        self.ttl = ttl or getattr(settings, 'CONVERSATION_STATE_TTL', 7 * 24 * 3600)
+        self.persist_interval = (
+            persist_interval if persist_interval is not None
+            else getattr(settings, 'CONVERSATION_PERSIST_INTERVAL', 30)
+        )
+        self._dirty = {}
+        self._last_flush = time.monotonic()
+
+    def key(self, bot_user):
+        return f"conversation:{self.flow.name}:{bot_user.bot_id}:{bot_user.telegram_id}"
+
+    def get(self, bot_user):
+        if bot_user.pk in self._dirty:
+            return self._dirty[bot_user.pk]
+        state = cache.get(self.key(bot_user))
+        if state is None:
+            state = bot_user.state or self.flow.initial
+            cache.set(self.key(bot_user), state, self.ttl)
+        return state
+
+    def set(self, bot_user, state):
+        cache.set(self.key(bot_user), state, self.ttl)
+        bot_user.state = state
+        self._dirty[bot_user.pk] = state
+
+    def dispatch(self, bot_user, event):
+        """Apply ``event`` and return the actions the handler should run."""
+        state = self.get(bot_user)
+        new_state, actions = self.flow.step(state, event)
+        if new_state != state:
+            self.set(bot_user, new_state)
+        return actions
+
+    def flush(self):
+        """Write pending states to BotUser.state. Returns the number of users updated."""
+        from .models import BotUser
+
+        dirty, self._dirty = self._dirty, {}
+        self._last_flush = time.monotonic()
+        by_state = {}
+        for pk, state in dirty.items():
+            by_state.setdefault(state, []).append(pk)
+        for state, pks in by_state.items():
+            BotUser.objects.filter(pk__in=pks).update(state=state)
+        return len(dirty)
+
+    def flush_if_due(self):
+        if self._dirty and time.monotonic() - self._last_flush >= self.persist_interval:
+            return self.flush()
+        return 0
@@ -0,0 +1,93 @@
+"""
+update_id deduplication for Telegram webhook retries and poller overlap
+"""
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+
+class UpdateDeduplicator:
+    """Reject Telegram updates that were already processed for a bot.
+
+    Recently seen ids are kept in a per-bot sliding window so repeats are
+    rejected in O(1) without a query. The ProcessedUpdate table (unique on
+    bot + update_id) is the source of truth across processes.
+    """
+
+    def __init__(self, window=None):
+        self.window = window or getattr(settings, 'UPDATE_DEDUP_WINDOW', 10000)
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def _remember(self, bot_id, update_ids):
+        with self._lock:
+            ids, order = self._seen.setdefault(bot_id, (set(), deque()))
+            for update_id in update_ids:
+                if update_id in ids:
+                    continue
+                ids.add(update_id)
+                order.append(update_id)
+                if len(order) > self.window:
+                    ids.discard(order.popleft())
+
+    def _recently_seen(self, bot_id, update_id):
+        entry = self._seen.get(bot_id)
+        return bool(entry) and update_id in entry[0]
+
+    def claim(self, bot_id, update_id):
+        """Mark one update as processed. Returns False if it is a duplicate."""
+        if update_id is None:
+            return True
+        if self._recently_seen(bot_id, update_id):
+            return False
+
+        from .models import ProcessedUpdate
+
+        try:
+            with transaction.atomic():
+                ProcessedUpdate.objects.create(bot_id=bot_id, update_id=update_id)
+        except IntegrityError:
+            self._remember(bot_id, [update_id])
+            return False
+        self._remember(bot_id, [update_id])
+        return True
+
+    def claim_many(self, bot_id, update_ids):
+        """Mark a page of updates as processed. Returns the set of new ids.
+
+        One INSERT ... ON CONFLICT DO NOTHING RETURNING claims the whole page
+        atomically: only the rows this call inserted come back, so two
+        pollers or webhook processes never both process the same update.
+        """
+        candidates = {u for u in update_ids if u is not None and not self._recently_seen(bot_id, u)}
+        if not candidates:
+            return set()
+
+        from .models import ProcessedUpdate
+
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            fresh = {u for u in candidates if self.claim(bot_id, u)}
+            self._remember(bot_id, candidates)
+            return fresh
+
+        table = connection.ops.quote_name(ProcessedUpdate._meta.db_table)
+        rows = ', '.join(['(%s, %s, %s)'] * len(candidates))
+        params = []
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        for update_id in candidates:
+            params += [bot_id, update_id, now]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} (bot_id, update_id, processed_at) VALUES {rows} '
+                f'ON CONFLICT (bot_id, update_id) DO NOTHING RETURNING update_id',
+                params,
+            )
+            fresh = {row[0] for row in cursor.fetchall()}
+        self._remember(bot_id, candidates)
+        return fresh
+
+
+update_dedup = UpdateDeduplicator()
@@ -20,6 +20,12 @@ from .models import (
     Supporter, Volunteer, VolunteerActivity, FakeNewsAlert, DailyQuestion,
     CampaignAnalytics, BotUser
 )
+from .page_cache import conditional_candidate_get
+from .votes import InvalidOption, cast_vote
+
+
+def _is_read(request):
+    return request.method in ('GET', 'HEAD')
 
 
 # ===== CANDIDATE MANAGEMENT =====
@@ -111,6 +117,7 @@ def candidate_detail(request, candidate_id):
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@conditional_candidate_get(applies=_is_read)
 def events_list(request, candidate_id):
     """List events for a candidate or create a new event"""
     try:
@@ -260,6 +267,7 @@ def generate_speech(request, candidate_id):
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@conditional_candidate_get(applies=_is_read)
 def polls_list(request, candidate_id):
     """List polls for a candidate or create a new poll"""
     try:
@@ -325,15 +333,10 @@ def submit_poll_response(request, poll_id):
     except BotUser.DoesNotExist:
         return JsonResponse({'error': 'User not found'}, status=404)
     
-    response, created = PollResponse.objects.get_or_create(
-        poll=poll,
-        bot_user=bot_user,
-        defaults={'selected_options': selected_options}
-    )
-    
-    if not created:
-        response.selected_options = selected_options
-        response.save()
+    try:
+        response, created = cast_vote(poll, selected_options, bot_user=bot_user, replace=True)
+    except InvalidOption as ex:
+        return JsonResponse({'error': str(ex)}, status=400)
     
     return JsonResponse({
         'responded': True,
@@ -0,0 +1,97 @@
+"""
+Identity of people behind public form submissions and shared contacts
+"""
+import hashlib
+import hmac
+import uuid
+
+from django.conf import settings
+
+
+def national_id_fingerprint(national_id):
+    """HMAC-SHA256 of a national ID, or None for an empty value.
+
+    Keyed with NATIONAL_ID_FINGERPRINT_KEY so the IDs can't be recovered by
+    hashing all possible values. Changing the key orphans every stored
+    fingerprint.
+    """
+    national_id = (national_id or '').strip()
+    if not national_id:
+        return None
+    key = getattr(settings, 'NATIONAL_ID_FINGERPRINT_KEY', None) or settings.SECRET_KEY
+    return hmac.new(key.encode(), national_id.encode(), hashlib.sha256).hexdigest()
+
+
+# ===== Phone numbers and landing-page BotUsers =====
+
+ARABIC_DIGITS = str.maketrans('\u0660\u0661\u0662\u0663\u0664\u0665\u0666\u0667\u0668\u0669'
+                              '\u06f0\u06f1\u06f2\u06f3\u06f4\u06f5\u06f6\u06f7\u06f8\u06f9',
+                              '01234567890123456789')
+
+
+def normalize_phone(value):
+    """Canonical form of a phone number: ASCII digits, Egyptian numbers as 01XXXXXXXXX.
+
+    Accepts Arabic-Indic digits, spaces and punctuation, and the +20 / 0020 /
+    20 country prefixes that Telegram contacts carry. Other numbers keep
+    their digits only.
+    """
+    digits = ''.join(ch for ch in (value or '').translate(ARABIC_DIGITS) if ch.isascii() and ch.isdigit())
+    if digits.startswith('00'):
+        digits = digits[2:]
+    if digits.startswith('20') and len(digits) == 12:
+        digits = '0' + digits[2:]
+    return digits
+
+
+def synthetic_telegram_id(phone):
+    """Stable BotUser.telegram_id for someone known only by ``phone``.
+
+    Negative, so it never collides with a real Telegram user id, and derived
+    from the normalised number alone, so every worker picks the same id.
+    """
+    digest = hashlib.blake2b(normalize_phone(phone).encode(), digest_size=7, person=b'hub-phone').digest()
+    return -(int.from_bytes(digest, 'big') or 1)
+
+
+def landing_bot():
+    """Bot that public form submissions are attached to (created if there is none)."""
+    from .models import Bot
+    from .registry import bot_registry
+
+    bot = bot_registry.first()
+    if bot is None:
+        try:
+            bot = Bot.objects.create(name='Default Bot', token=str(uuid.uuid4()), is_active=False)
+        except Exception:
+            return None
+    return bot
+
+
+def upsert_landing_user(bot, phone, full_name):
+    """The BotUser of ``bot`` with ``phone``, created atomically if there is none.
+
+    Returning people cost one indexed lookup on (phone_number, bot). New ones
+    are inserted under their synthetic telegram_id with ON CONFLICT, so
+    concurrent submissions from the same number converge on one row.
+    """
+    from .models import BotUser
+
+    phone = normalize_phone(phone)
+    bot_user = BotUser.objects.filter(phone_number=phone, bot=bot).order_by('pk').first()
+    if bot_user is not None:
+        return bot_user
+    names = (full_name or '').split()
+    bot_user = BotUser(
+        bot=bot,
+        telegram_id=synthetic_telegram_id(phone),
+        phone_number=phone,
+        first_name=names[0] if names else full_name,
+        last_name=' '.join(names[1:]),
+    )
+    BotUser.objects.bulk_create(
+        [bot_user], update_conflicts=True, unique_fields=['bot', 'telegram_id'], update_fields=['phone_number'],
+    )
+    if bot_user.pk is None:
+        bot_user = BotUser.objects.get(bot=bot, telegram_id=bot_user.telegram_id)
+    return bot_user
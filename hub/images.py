@@ -0,0 +1,210 @@
+"""
+Resized WebP/JPEG variants of uploaded images
+"""
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# Model -> image fields that get variants
+IMAGE_FIELDS = {
+    'Candidate': ('profile_image', 'logo'),
+    'Event': ('image',),
+    'Gallery': ('file', 'thumbnail'),
+}
+
+FORMATS = (
+    ('webp', 'WEBP', {'method': 4}),
+    ('jpg', 'JPEG', {'optimize': True, 'progressive': True}),
+)
+
+
+def _widths():
+    return sorted(getattr(settings, 'IMAGE_VARIANT_WIDTHS', (320, 640, 1280)))
+
+
+def variant_name(name, width, ext):
+    """Storage name of a variant: ``candidates/photo.jpg`` -> ``candidates/photo.jpg.w640.webp``.
+
+    The source extension stays in the name, so ``photo.jpg`` and
+    ``photo.png`` in one folder get separate variants.
+    """
+    return f'{name}.w{width}.{ext}'
+
+
+def _flatten(image):
+    """RGB copy of ``image``; transparency goes onto white, as JPEG has none."""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def generate_variants(field_file, force=False):
+    """Write the variants of an image FieldFile next to the original.
+
+    One variant per IMAGE_VARIANT_WIDTHS width narrower than the original,
+    or just the smallest width (at the original size) for small images, in
+    every format of FORMATS. Images are never upscaled. Files that are not
+    images (gallery videos, PDFs) are skipped.
+
+    Returns the widths written, [] when there was nothing to do.
+    """
+    if not field_file or not field_file.name:
+        return []
+    return _generate(field_file.storage, field_file.name, force)
+
+
+def _generate(storage, name, force=False):
+    widths = _widths()
+    if not force and storage.exists(variant_name(name, widths[0], FORMATS[-1][0])):
+        return []
+    try:
+        with storage.open(name, 'rb') as f:
+            image = Image.open(f)
+            image.load()
+    except (UnidentifiedImageError, OSError, ValueError):
+        return []
+    image = _flatten(ImageOps.exif_transpose(image))
+    quality = getattr(settings, 'IMAGE_VARIANT_QUALITY', 80)
+
+    written = [w for w in widths if w < image.width] or widths[:1]
+    # Smallest JPEG last: its existence marks the image as done
+    for width in reversed(written):
+        if width < image.width:
+            resized = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        else:
+            resized = image
+        for ext, pil_format, options in FORMATS:
+            buffer = io.BytesIO()
+            resized.save(buffer, pil_format, quality=quality, **options)
+            target = variant_name(name, width, ext)
+            if storage.exists(target):
+                storage.delete(target)
+            storage.save(target, ContentFile(buffer.getvalue()))
+    return written
+
+
+def delete_variants(storage, name):
+    """Remove every variant of the image stored as ``name``."""
+    for width in _widths():
+        for ext, _, _ in FORMATS:
+            target = variant_name(name, width, ext)
+            if storage.exists(target):
+                storage.delete(target)
+
+
+def stored_images(instance):
+    """{field name: stored file name} of the image fields of ``instance`` as saved in the database."""
+    fields = IMAGE_FIELDS.get(type(instance).__name__, ())
+    if not fields or instance.pk is None:
+        return {}
+    return type(instance).objects.filter(pk=instance.pk).values(*fields).first() or {}
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _submit(job, *args):
+    global _executor
+    if not getattr(settings, 'IMAGE_VARIANT_BACKGROUND', True):
+        job(*args)
+        return
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-variants')
+    _executor.submit(_in_background, job, *args)
+
+
+def _in_background(job, *args):
+    try:
+        job(*args)
+    except Exception:
+        logger.exception('image variant job failed')
+    finally:
+        # Worker threads get their own DB connection; don't leak it
+        connection.close()
+
+
+def _variant_job(model_name, candidate_id, files, stale):
+    for storage, name in stale:
+        delete_variants(storage, name)
+    written = False
+    for storage, name in files:
+        try:
+            written = bool(_generate(storage, name)) or written
+        except Exception:
+            logger.exception('image variants failed for %s', name)
+    if written and candidate_id:
+        # Pages built before the variants existed show the originals
+        from .snapshot import SECTIONS_BY_MODEL, refresh_sections
+
+        refresh_sections(candidate_id, SECTIONS_BY_MODEL[model_name])
+
+
+def schedule_variants(instance, previous=None):
+    """Bring the variants of ``instance``'s images in line with its fields, off the request.
+
+    ``previous`` is stored_images() from before the save, or None when the
+    save did not touch the image fields. Variants of images that were
+    replaced or cleared are deleted and those of new images generated, after the transaction commits, on a background thread
+    (inline when IMAGE_VARIANT_BACKGROUND is off). New variants refresh the
+    owning candidate's snapshot, so pages switch to them.
+    """
+    if previous is None:
+        return
+    model_name = type(instance).__name__
+    files, stale = [], []
+    for field_name in IMAGE_FIELDS.get(model_name, ()):
+        field_file = getattr(instance, field_name)
+        current = field_file.name if field_file else ''
+        old = previous.get(field_name) or ''
+        if old == current:
+            continue
+        if old:
+            stale.append((field_file.storage, old))
+        if current:
+            files.append((field_file.storage, current))
+    if not files and not stale:
+        return
+    candidate_id = instance.pk if model_name == 'Candidate' else instance.candidate_id
+    transaction.on_commit(lambda: _submit(_variant_job, model_name, candidate_id, files, stale))
+
+
+def image_variants(field_file):
+    """srcset-ready URLs of the variants of ``field_file``, or {} if it has none.
+
+    Keys: ``srcset`` (JPEG), ``webp_srcset`` and ``src``, the variant
+    closest to IMAGE_VARIANT_DEFAULT_WIDTH for browsers without srcset.
+    """
+    if not field_file or not field_file.name:
+        return {}
+    storage = field_file.storage
+    widths = [
+        w for w in _widths()
+        if storage.exists(variant_name(field_file.name, w, FORMATS[-1][0]))
+    ]
+    if not widths:
+        return {}
+
+    def srcset(ext):
+        return ', '.join(f'{storage.url(variant_name(field_file.name, w, ext))} {w}w' for w in widths)
+
+    default = getattr(settings, 'IMAGE_VARIANT_DEFAULT_WIDTH', 640)
+    src_width = min(widths, key=lambda w: (abs(w - default), w))
+    return {
+        'src': storage.url(variant_name(field_file.name, src_width, 'jpg')),
+        'srcset': srcset('jpg'),
+        'webp_srcset': srcset('webp'),
+    }
+
@@ -0,0 +1,165 @@
+"""
+Bulk import of a bot's pending getUpdates backlog into BotUser and MessageLog
+"""
+import requests
+from django.utils import timezone
+
+from .dedup import update_dedup
+from .models import BotUser, MessageLog
+from .outbound import api_url
+
+PROFILE_FIELDS = ('username', 'first_name', 'last_name', 'language_code')
+PAGE_SIZE = 100  # getUpdates maximum
+
+
+class TelegramError(Exception):
+    """getUpdates returned ok=false; ``response`` holds the decoded body."""
+
+    def __init__(self, response):
+        super().__init__(response.get('description') or 'Telegram error')
+        self.response = response
+
+
+def fetch_pages(bot_token, page_size=PAGE_SIZE, max_pages=None, session=None):
+    """Yield getUpdates result pages until the backlog is empty.
+
+    Each request passes the offset after the last update seen, which also
+    confirms the earlier updates on Telegram's side. Raises TelegramError
+    when a call is rejected.
+    """
+    session = session or requests.Session()
+    offset = None
+    pages = 0
+    while max_pages is None or pages < max_pages:
+        params = {'limit': page_size, 'timeout': 0}
+        if offset is not None:
+            params['offset'] = offset
+        js = session.get(api_url(bot_token, 'getUpdates'), params=params, timeout=15).json()
+        if not js.get('ok'):
+            raise TelegramError(js)
+        updates = js.get('result', [])
+        if not updates:
+            return
+        pages += 1
+        offset = updates[-1]['update_id'] + 1
+        yield updates
+
+
+def collect_users(updates):
+    """Reduce a page of updates to one profile dict per chat id.
+
+    Later messages win for profile fields, but an empty value never
+    replaces one seen earlier in the page.
+    """
+    users = {}
+    for upd in updates:
+        msg = upd.get('message') or upd.get('edited_message') or {}
+        if not msg:
+            continue
+        from_user = msg.get('from') or {}
+        chat = msg.get('chat') or {}
+        chat_id = chat.get('id') or from_user.get('id')
+        if not chat_id:
+            continue
+        entry = users.setdefault(chat_id, {'started': False})
+        for field in PROFILE_FIELDS:
+            value = from_user.get(field)
+            if value:
+                entry[field] = value
+        if (msg.get('text') or '').strip().startswith('/start'):
+            entry['started'] = True
+    return users
+
+
+def upsert_users(bot, users):
+    """Write one page of users with a single INSERT ... ON CONFLICT (bot, telegram_id).
+
+    Existing rows are read first (one query) so values missing from the
+    updates keep what is stored and started_at is only set once.
+    Returns (created, updated, started_marked).
+    """
+    if not users:
+        return 0, 0, 0
+    now = timezone.now()
+    existing = {
+        row['telegram_id']: row
+        for row in BotUser.objects.filter(bot=bot, telegram_id__in=list(users)).values(
+            'telegram_id', 'started_at', *PROFILE_FIELDS
+        )
+    }
+    rows = []
+    started = 0
+    for telegram_id, entry in users.items():
+        current = existing.get(telegram_id, {})
+        fields = {f: entry.get(f) or current.get(f) for f in PROFILE_FIELDS}
+        started_at = current.get('started_at')
+        if entry['started'] and not started_at:
+            started_at = now
+            started += 1
+        rows.append(BotUser(
+            bot=bot,
+            telegram_id=telegram_id,
+            last_seen_at=now,
+            started_at=started_at,
+            **fields
+        ))
+    BotUser.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['bot', 'telegram_id'],
+        update_fields=[*PROFILE_FIELDS, 'last_seen_at', 'started_at'],
+    )
+    return len(users) - len(existing), len(existing), started
+
+
+def log_messages(bot, updates):
+    """Write a MessageLog for every message in ``updates``, like the poller would have.
+
+    The updates are confirmed on Telegram's side by the next getUpdates
+    offset, so the poller never sees them. One query for the users' ids,
+    one bulk insert. Returns the number written.
+    """
+    messages = [u.get('message') or u.get('edited_message') for u in updates]
+    messages = [m for m in messages if m and ((m.get('chat') or {}).get('id') or (m.get('from') or {}).get('id'))]
+    if not messages:
+        return 0
+    chat_ids = {(m.get('chat') or {}).get('id') or m['from']['id'] for m in messages}
+    bot_users = dict(BotUser.objects.filter(bot=bot, telegram_id__in=chat_ids).values_list('telegram_id', 'id'))
+    rows = []
+    for msg in messages:
+        chat_id = (msg.get('chat') or {}).get('id') or msg['from']['id']
+        rows.append(MessageLog(
+            bot=bot,
+            bot_user_id=bot_users.get(chat_id),
+            message_id=str(msg['message_id']) if msg.get('message_id') is not None else None,
+            chat_id=chat_id,
+            from_user_id=(msg.get('from') or {}).get('id'),
+            text=(msg.get('text') or '').strip() or None,
+            raw=msg,
+        ))
+    MessageLog.objects.bulk_create(rows)
+    return len(rows)
+
+
+def import_backlog(bot, page_size=PAGE_SIZE, max_pages=None):
+    """Page through the pending updates of ``bot``, upsert its users and log its messages.
+
+    Returns counters for the import_updates response: ``upserted`` is
+    ``created`` plus ``updated``.
+    """
+    stats = {
+        'pages': 0, 'updates': 0, 'upserted': 0, 'created': 0, 'updated': 0,
+        'started_marked': 0, 'messages_logged': 0,
+    }
+    for updates in fetch_pages(bot.token, page_size=page_size, max_pages=max_pages):
+        fresh_ids = update_dedup.claim_many(bot.id, [u.get('update_id') for u in updates])
+        fresh = [u for u in updates if u.get('update_id') in fresh_ids]
+        created, updated, started = upsert_users(bot, collect_users(fresh))
+        stats['messages_logged'] += log_messages(bot, fresh)
+        stats['pages'] += 1
+        stats['updates'] += len(updates)
+        stats['upserted'] += created + updated
+        stats['created'] += created
+        stats['updated'] += updated
+        stats['started_marked'] += started
+    return stats
@@ -0,0 +1,145 @@
+"""
+Write-behind Redis queue for landing-page submissions
+"""
+import json
+import logging
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+
+from . import submissions
+from .identity import national_id_fingerprint
+from .snapshot import coalesce_refreshes
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = 'ingest:pending'
+PROCESSING_KEY = 'ingest:processing:{worker}'
+FAILED_KEY = 'ingest:failed'
+SEEN_KEY = 'ingest:seen:{candidate_id}:{scope}:{value}'
+
+QUEUED = 'queued'
+
+# Sets every dedup marker and appends the entry, or does nothing and returns
+# the 1-based index of the first marker that already exists
+SUBMIT_SCRIPT = """
+for i, key in ipairs(KEYS) do
+    if i > 1 and redis.call('EXISTS', key) == 1 then
+        return i - 1
+    end
+end
+for i, key in ipairs(KEYS) do
+    if i > 1 then
+        redis.call('SET', key, 1, 'EX', ARGV[2])
+    end
+end
+redis.call('LPUSH', KEYS[1], ARGV[1])
+return 0
+"""
+
+
+def is_enabled():
+    return getattr(settings, 'LANDING_INGEST_MODE', 'sync') == 'queue'
+
+
+def _redis():
+    from django_redis import get_redis_connection
+
+    return get_redis_connection('default')
+
+
+def _dedup_markers(kind, data):
+    """(outcome, key) pairs that make a repeated submission a duplicate."""
+    candidate_id = data['candidate_id']
+    if kind == 'support':
+        return [
+            (submissions.DUPLICATE_PHONE, SEEN_KEY.format(candidate_id=candidate_id, scope='phone', value=data['phone'])),
+            (submissions.DUPLICATE_NATIONAL_ID, SEEN_KEY.format(
+                candidate_id=candidate_id, scope='national_id', value=national_id_fingerprint(data['national_id']),
+            )),
+        ]
+    if kind in ('vote', 'public_vote'):
+        scope = f"poll:{data['poll_id']}"
+        voter = data['phone'] if kind == 'vote' else data['user_ip']
+        return [(submissions.ALREADY_VOTED, SEEN_KEY.format(candidate_id=candidate_id, scope=scope, value=voter))]
+    return []
+
+
+def submit(kind, data):
+    """Queue a validated submission for drain_ingest_queue.
+
+    Returns QUEUED, a duplicate outcome of hub.submissions when the same
+    phone / national ID / poll vote was queued within
+    LANDING_INGEST_DEDUP_TTL seconds, or None when Redis is unavailable. In
+    that case the caller records the submission synchronously.
+    """
+    markers = _dedup_markers(kind, data)
+    entry = json.dumps({'kind': kind, 'data': data, 'queued_at': time.time()})
+    ttl = getattr(settings, 'LANDING_INGEST_DEDUP_TTL', 86400)
+    try:
+        found = _redis().eval(SUBMIT_SCRIPT, 1 + len(markers), PENDING_KEY, *[key for _, key in markers], entry, ttl)
+    except Exception as ex:
+        logger.warning('ingest queue unavailable, recording synchronously: %s', ex)
+        return None
+    return markers[found - 1][0] if found else QUEUED
+
+
+def recover(worker='default'):
+    """Put entries a crashed drain left in flight back on the queue."""
+    redis = _redis()
+    moved = 0
+    while redis.rpoplpush(PROCESSING_KEY.format(worker=worker), PENDING_KEY) is not None:
+        moved += 1
+    return moved
+
+
+def drain(batch_size=None, worker='default'):
+    """Record up to ``batch_size`` queued submissions in one transaction.
+
+    Entries move to a per-worker processing list first and are only removed
+    once the batch has committed, so a crash or database error never loses
+    them (see recover()). Delivery is at-least-once: a replayed support or
+    vote is a no-op, a replayed question is stored twice.
+
+    Each entry runs in its own savepoint; one that raises goes to the failed
+    list instead of aborting the batch. Snapshot refreshes are coalesced to
+    one per candidate.
+
+    Returns a Counter of outcomes.
+    """
+    batch_size = batch_size or getattr(settings, 'LANDING_INGEST_BATCH_SIZE', 200)
+    redis = _redis()
+    processing = PROCESSING_KEY.format(worker=worker)
+    raw_entries = []
+    for _ in range(batch_size):
+        raw = redis.rpoplpush(PENDING_KEY, processing)
+        if raw is None:
+            break
+        raw_entries.append(raw)
+    outcomes = Counter()
+    if not raw_entries:
+        return outcomes
+
+    failed = []
+    try:
+        with coalesce_refreshes(), transaction.atomic():
+            for raw in raw_entries:
+                try:
+                    entry = json.loads(raw)
+                    with transaction.atomic():
+                        outcomes[submissions.record(entry['kind'], entry['data'])] += 1
+                except Exception:
+                    logger.exception('ingest entry failed: %r', raw[:200])
+                    failed.append(raw)
+                    outcomes['failed'] += 1
+    except Exception:
+        recover(worker)
+        raise
+    pipe = redis.pipeline()
+    if failed:
+        pipe.lpush(FAILED_KEY, *failed)
+    pipe.delete(processing)
+    pipe.execute()
+    return outcomes
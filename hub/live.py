@@ -0,0 +1,64 @@
+"""
+Live supporter counts and poll tallies for landing pages
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+GROUP = 'candidate_live_{candidate_id}'
+
+# Snapshot sections whose changes are pushed to connected pages
+LIVE_SECTIONS = ('counts', 'polls')
+
+
+def current_snapshot(candidate_id):
+    """Snapshot of an active candidate, or None. No queries when the cached one is current."""
+    from .models import Candidate
+    from .snapshot import cached_snapshot, get_snapshot
+
+    snapshot = cached_snapshot(candidate_id)
+    if snapshot is None:
+        candidate = Candidate.objects.select_related('bot').filter(id=candidate_id, is_active=True).first()
+        if candidate is None:
+            return None
+        snapshot = get_snapshot(candidate)
+    return snapshot
+
+
+def live_state(snapshot, sections=LIVE_SECTIONS):
+    """The parts of ``snapshot`` the pages update in place, for ``sections``."""
+    data = {}
+    if 'counts' in sections:
+        data['supporters_count'] = snapshot['supporters_count']
+        data['questions_count'] = snapshot['questions_count']
+    if 'polls' in sections:
+        data['polls'] = {
+            str(poll['id']): {'counts': poll['option_votes_list'], 'total_votes': poll['total_votes']}
+            for poll in snapshot['polls'] + snapshot['active_polls']
+        }
+    return data
+
+
+def broadcast(candidate_id, snapshot, sections):
+    """Push the changed live ``sections`` of a fresh snapshot to the candidate's open pages.
+
+    One channel-layer group_send per change, however many browsers are
+    connected (see hub.consumers). Does nothing when channels or the
+    channel layer is unavailable.
+    """
+    sections = [name for name in LIVE_SECTIONS if name in sections]
+    if not sections:
+        return
+    try:
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+
+        layer = get_channel_layer()
+        if layer is None:
+            return
+        async_to_sync(layer.group_send)(
+            GROUP.format(candidate_id=candidate_id),
+            {'type': 'live.update', 'data': live_state(snapshot, sections)},
+        )
+    except Exception as ex:
+        logger.warning('live update for candidate %s not sent: %s', candidate_id, ex)
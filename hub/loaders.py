@@ -0,0 +1,140 @@
+"""
+Prefetch plans for candidate pages
+"""
+from django.db.models import Count, DateTimeField, IntegerField, Max, OuterRef, Prefetch, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_of(model):
+    """Subquery counting ``model`` rows of the outer candidate, for annotate()."""
+    rows = (
+        model.objects.filter(candidate=OuterRef('pk')).order_by().values('candidate')
+        .annotate(n=Count('pk')).values('n')
+    )
+    return Coalesce(Subquery(rows, output_field=IntegerField()), Value(0))
+
+
+def latest_of(model, field, parent='candidate'):
+    """Subquery of the newest ``field`` among ``model`` rows of the outer ``parent``, for annotate()."""
+    rows = (
+        model.objects.filter(**{parent: OuterRef('pk')}).order_by().values(parent)
+        .annotate(latest=Max(field)).values('latest')
+    )
+    return Subquery(rows, output_field=DateTimeField())
+
+
+def landing_plan(section):
+    """(prefetches, annotations) one hub.snapshot section needs.
+
+    Sliced prefetches keep each list to what the pages show (one query per
+    prefetch, whatever the number of rows).
+    """
+    from .models import (
+        CampaignBenefit, Event, Gallery, Poll, PollResponse, PollVote, Question, Speech, Supporter, Testimonial,
+    )
+
+    polls = Poll.objects.prefetch_related('tally_shards').annotate(
+        last_vote_at=latest_of(PollVote, 'created_at', parent='poll'),
+        last_response_at=latest_of(PollResponse, 'responded_at', parent='poll'),
+    ).order_by('-created_at')
+    gallery = Gallery.objects.filter(is_public=True)
+    testimonials = Testimonial.objects.filter(is_public=True)
+    plans = {
+        'profile': ([], {}),
+        'events': ([
+            Prefetch(
+                'events', Event.objects.filter(is_public=True).order_by('-start_datetime')[:5],
+                to_attr='landing_events',
+            ),
+        ], {}),
+        'speeches': ([
+            Prefetch('speeches', Speech.objects.order_by('-created_at')[:3], to_attr='landing_speeches'),
+        ], {}),
+        'polls': ([
+            Prefetch('polls', polls[:5], to_attr='landing_polls'),
+            Prefetch('polls', polls.filter(is_active=True)[:3], to_attr='landing_active_polls'),
+        ], {}),
+        'gallery': ([
+            Prefetch('gallery_items', gallery.order_by('-is_featured', '-created_at')[:12], to_attr='landing_gallery'),
+            Prefetch('gallery_items', gallery.order_by('-created_at')[:12], to_attr='landing_recent_gallery'),
+        ], {}),
+        'testimonials': ([
+            Prefetch(
+                'testimonials', testimonials.order_by('display_order', '-created_at')[:6],
+                to_attr='landing_testimonials',
+            ),
+            Prefetch('testimonials', testimonials.order_by('-created_at')[:5], to_attr='landing_recent_testimonials'),
+        ], {}),
+        'benefits': ([
+            Prefetch(
+                'benefits',
+                CampaignBenefit.objects.filter(is_public=True).order_by('display_order', '-created_at')[:8],
+                to_attr='landing_benefits',
+            ),
+        ], {}),
+        'counts': ([], {
+            'supporters_total': count_of(Supporter),
+            'questions_total': count_of(Question),
+            'supporters_modified': latest_of(Supporter, 'updated_at'),
+            'questions_modified': latest_of(Question, 'created_at'),
+        }),
+    }
+    return plans[section]
+
+
+def load_landing_candidate(candidate_id, sections):
+    """The candidate with everything ``sections`` of its snapshot need, or None.
+
+    One query for the candidate (with its bot and counts) plus one per
+    prefetch (polls bring their tally shards), so a full snapshot costs
+    a fixed 12 queries.
+    """
+    from .models import Candidate
+
+    queryset = Candidate.objects.select_related('bot')
+    for section in sections:
+        prefetches, annotations = landing_plan(section)
+        queryset = queryset.prefetch_related(*prefetches).annotate(**annotations)
+    return queryset.filter(pk=candidate_id).first()
+
+
+def load_dashboard_candidate(candidate_id):
+    """The active candidate with every list the dashboard shows, or None.
+
+    Supporters and questions come with their bot users, so the tables
+    render without a query per row.
+    """
+    from .models import (
+        CampaignBenefit, Candidate, DailyQuestion, Event, Gallery, Poll, Speech, Supporter, Testimonial,
+    )
+
+    return (
+        Candidate.objects.filter(pk=candidate_id, is_active=True)
+        .select_related('bot')
+        .prefetch_related(
+            Prefetch('events', Event.objects.order_by('-start_datetime'), to_attr='dashboard_events'),
+            Prefetch('speeches', Speech.objects.order_by('-created_at'), to_attr='dashboard_speeches'),
+            Prefetch('polls', Poll.objects.order_by('-created_at'), to_attr='dashboard_polls'),
+            Prefetch(
+                'supporters', Supporter.objects.select_related('bot_user').order_by('-registered_at'),
+                to_attr='dashboard_supporters',
+            ),
+            Prefetch(
+                'gallery_items', Gallery.objects.order_by('-is_featured', '-created_at'),
+                to_attr='dashboard_gallery',
+            ),
+            Prefetch(
+                'daily_questions', DailyQuestion.objects.select_related('bot_user').order_by('-asked_at'),
+                to_attr='dashboard_questions',
+            ),
+            Prefetch(
+                'testimonials', Testimonial.objects.order_by('display_order', '-created_at'),
+                to_attr='dashboard_testimonials',
+            ),
+            Prefetch(
+                'benefits', CampaignBenefit.objects.order_by('display_order', '-created_at'),
+                to_attr='dashboard_benefits',
+            ),
+        )
+        .first()
+    )
@@ -0,0 +1,35 @@
+"""
+Server-side support for load tests (see the loadtest_landing command)
+"""
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+QUERY_COUNT_HEADER = 'X-DB-Queries'
+
+
+class QueryCountHeaderMiddleware:
+    """Report the database queries each response cost in an X-DB-Queries header.
+
+    Only installed while LOADTEST_QUERY_COUNT_HEADER is on, for servers under
+    load test. Place it first so pages served by earlier middleware (static
+    pre-rendered pages) are counted too.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'LOADTEST_QUERY_COUNT_HEADER', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        count = 0
+
+        def counter(execute, sql, params, many, context):
+            nonlocal count
+            count += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        response[QUERY_COUNT_HEADER] = str(count)
+        return response
@@ -0,0 +1,56 @@
+"""
+Management command that writes queued landing-page submissions to the database
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from hub import ingest_queue
+
+
+class Command(BaseCommand):
+    help = 'Drain the landing-page ingest queue (LANDING_INGEST_MODE = "queue") in batched transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'LANDING_INGEST_BATCH_SIZE', 200),
+            help='Submissions recorded per transaction',
+        )
+        parser.add_argument(
+            '--idle-sleep',
+            type=float,
+            default=0.5,
+            help='Seconds to wait when the queue is empty',
+        )
+        parser.add_argument(
+            '--worker',
+            default='default',
+            help='Name of this drain; each concurrent drain needs its own',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit as soon as the queue is empty',
+        )
+
+    def handle(self, *args, **options):
+        recovered = ingest_queue.recover(options['worker'])
+        if recovered:
+            self.stdout.write(f'Requeued {recovered} submission(s) left in flight')
+        while True:
+            try:
+                outcomes = ingest_queue.drain(options['batch_size'], options['worker'])
+            except Exception as ex:
+                self.stderr.write(f'Drain failed, retrying: {ex}')
+                time.sleep(max(options['idle_sleep'], 1.0))
+                continue
+            if outcomes:
+                summary = ', '.join(f'{name}={count}' for name, count in sorted(outcomes.items()))
+                self.stdout.write(f'Recorded {sum(outcomes.values())} submission(s): {summary}')
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['idle_sleep'])
@@ -0,0 +1,39 @@
+"""
+Management command to generate resized variants of already uploaded images
+"""
+from django.core.management.base import BaseCommand
+
+from hub import images
+from hub.models import Candidate, Event, Gallery
+from hub.page_cache import bump_candidate_version
+
+
+class Command(BaseCommand):
+    help = 'Generate WebP/JPEG width variants for candidate, event and gallery images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate variants that already exist (e.g. after changing IMAGE_VARIANT_WIDTHS)',
+        )
+
+    def handle(self, *args, **options):
+        changed = set()
+        for model, owner in ((Candidate, 'pk'), (Event, 'candidate_id'), (Gallery, 'candidate_id')):
+            for obj in model.objects.iterator():
+                for field_name in images.IMAGE_FIELDS[model.__name__]:
+                    field_file = getattr(obj, field_name)
+                    try:
+                        written = images.generate_variants(field_file, force=options['force'])
+                    except Exception as ex:
+                        self.stderr.write(f'{field_file.name}: {ex}')
+                        continue
+                    if written:
+                        self.stdout.write(f"{field_file.name}: {', '.join(f'{w}w' for w in written)}")
+                        changed.add(getattr(obj, owner))
+
+        # Cached pages and snapshots were built without the new variants
+        for candidate_id in changed:
+            bump_candidate_version(candidate_id, layout=True)
+        self.stdout.write(self.style.SUCCESS(f'Image variants generated; {len(changed)} candidate page(s) refreshed'))
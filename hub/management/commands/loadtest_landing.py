@@ -0,0 +1,439 @@
+"""
+Management command that load-tests candidate landing pages with rally-like visitor traffic
+"""
+import contextlib
+import http.cookiejar
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from hub.loadtest import QUERY_COUNT_HEADER
+from hub.management.commands.replay_updates import QueryCounter, percentile
+from hub.models import Bot, Candidate, Event, Poll
+
+ACTIONS = ('view', 'support', 'ask', 'vote')
+OUTCOMES = ('ok', 'rejected', 'throttled', 'error')
+
+FIRST_NAMES = ['محمد', 'أحمد', 'محمود', 'مصطفى', 'علي', 'فاطمة', 'مريم', 'نورهان', 'آية', 'يوسف', 'عمر', 'هدى']
+LAST_NAMES = ['عبد الله', 'حسن', 'إبراهيم', 'السيد', 'عبد الرحمن', 'الشافعي', 'منصور', 'سليمان']
+CITIES = ['القاهرة', 'الجيزة', 'الإسكندرية', 'المنصورة', 'طنطا', 'أسيوط', 'سوهاج', 'الزقازيق']
+QUESTIONS = [
+    'ما هي خطتكم لتحسين المواصلات العامة في الدائرة؟',
+    'متى سيتم افتتاح المستشفى الجديد؟',
+    'كيف ستدعمون الشباب في إيجاد فرص عمل؟',
+    'ما موقفكم من رفع أسعار الكهرباء والمياه؟',
+    'هل توجد خطة لرصف الطرق في القرى التابعة للمركز؟',
+    'أين سيكون المؤتمر الانتخابي القادم؟',
+]
+
+
+def parse_mix(value):
+    """'view=60,support=15,ask=10,vote=15' -> {'view': 60.0, ...}."""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ACTIONS:
+            raise CommandError(f'Unknown action in --mix: {name!r} (expected {", ".join(ACTIONS)})')
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise CommandError(f'Bad weight in --mix: {part!r}')
+    if not any(weight > 0 for weight in mix.values()):
+        raise CommandError('--mix needs at least one positive weight')
+    return mix
+
+
+def classify(status, content, content_type, method='GET'):
+    """(outcome, JSON body) of one response.
+
+    The outcome is ok, rejected (the page answered success: false),
+    throttled (429) or error. The pages answer every submission with JSON,
+    so a POST answered with anything else (the page re-rendered because it
+    did not recognise the form) is an error.
+    """
+    if status == 429:
+        return 'throttled', None
+    if status >= 400:
+        return 'error', None
+    data = None
+    if method == 'POST' and 'json' not in content_type:
+        return 'error', None
+    if 'json' in content_type:
+        try:
+            data = json.loads(content)
+        except ValueError:
+            return 'error', None
+        if isinstance(data, dict) and data.get('success') is False:
+            return 'rejected', data
+    return 'ok', data
+
+
+class InProcessVisitor:
+    """One visitor through Django's test client, in this process.
+
+    Queries are counted on the calling thread's own database connection.
+    Each visitor gets its own address, like visitors on a real rally site.
+    """
+
+    csrf_token = ''
+
+    def __init__(self, rng):
+        self.client = Client(raise_request_exception=False, REMOTE_ADDR=f'10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}')
+
+    def get(self, path):
+        return self._call(self.client.get, path)
+
+    def post(self, path, data):
+        return self._call(self.client.post, path, data, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+    def _call(self, method, *args, **extra):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = method(*args, **extra)
+        return response.status_code, response.content, response.get('Content-Type', ''), counter.count
+
+
+class HttpVisitor:
+    """One visitor over HTTP with its own cookies, against a running server.
+
+    Query counts come from the server's X-DB-Queries header (see
+    hub.loadtest), or are unknown when it does not send one.
+    """
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        self.csrf_token = ''
+
+    def get(self, path):
+        return self._call(urllib.request.Request(self.base_url + path))
+
+    def post(self, path, data):
+        return self._call(urllib.request.Request(
+            self.base_url + path,
+            data=urllib.parse.urlencode(data).encode(),
+            headers={
+                'X-Requested-With': 'XMLHttpRequest',
+                'X-CSRFToken': self.csrf_token,
+                'Referer': self.base_url + path,
+            },
+        ))
+
+    def _call(self, request):
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                return response.status, response.read(), response.headers.get('Content-Type', ''), self._queries(response.headers)
+        except urllib.error.HTTPError as ex:
+            return ex.code, ex.read(), ex.headers.get('Content-Type', ''), self._queries(ex.headers)
+
+    @staticmethod
+    def _queries(headers):
+        value = headers.get(QUERY_COUNT_HEADER)
+        return int(value) if value is not None else None
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test candidate landing pages with concurrent visitors who open a page, fetch its live '
+        'counts, then view again, support, ask or vote with Arabic payloads and think times between '
+        'actions. Reports throughput, latency percentiles, database queries and error rates per action. '
+        'Writes supporters, questions and votes to the configured database like real traffic would.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=['inprocess', 'http'], default='inprocess',
+                            help='Drive the views in this process, or a running server at --base-url')
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000',
+                            help='Server for --target http. Run it with LOADTEST_QUERY_COUNT_HEADER = True for query counts '
+                                 'and a higher LANDING_RATE_LIMITS["ip"]: every visitor comes from this machine')
+        parser.add_argument('--candidate', action='append', default=[],
+                            help='Candidate id to visit (repeatable; default: every active candidate with a bot)')
+        parser.add_argument('--seed', action='store_true',
+                            help='Create (or reuse) a load-test candidate with a bot, polls and events, and visit it')
+        parser.add_argument('--users', type=int, default=50, help='Concurrent visitors')
+        parser.add_argument('--duration', type=float, default=60, help='Seconds to run, ramp-up included')
+        parser.add_argument('--ramp-up', type=float, default=10, help='Seconds over which visitors arrive')
+        parser.add_argument('--think-time', type=float, default=3.0,
+                            help='Mean seconds between a visitor\'s actions (exponentially distributed; 0 = none)')
+        parser.add_argument('--actions', type=int, default=4, help='Most actions per visit after the page loads')
+        parser.add_argument('--mix', default='view=60,support=15,ask=10,vote=15',
+                            help='Relative weights of the actions after the page loads')
+        parser.add_argument('--mobile-share', type=float, default=0.7, help='Share of visits to the mobile page')
+        parser.add_argument('--hot-share', type=float, default=0.8,
+                            help='Share of visitors on the first candidate (the one holding the rally) when several are visited')
+        parser.add_argument('--timeout', type=float, default=30, help='Seconds before an HTTP request counts as an error')
+        parser.add_argument('--random-seed', type=int,
+                            help='Random seed for visitors and payloads (default: a new one each run, so phones do not repeat)')
+        parser.add_argument('--json', dest='json_path', help='Also write the report to this JSON file')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['duration'] <= 0:
+            raise CommandError('--users and --duration must be positive')
+        self.options = options
+        self.mix = parse_mix(options['mix'])
+        candidate_ids = list(options['candidate'])
+        if options['seed']:
+            candidate_ids.insert(0, str(self.seed().pk))
+        self.targets = self.load_targets(candidate_ids)
+        others = len(self.targets) - 1
+        hot = min(max(options['hot_share'], 0.0), 1.0)
+        self.weights = [hot] + [(1.0 - hot) / others] * others if others else [1.0]
+
+        self.samples = defaultdict(list)
+        self.lock = threading.Lock()
+        self.deadline = time.monotonic() + options['duration']
+        self.stdout.write(
+            f"Load test: {options['users']} visitors for {options['duration']:.0f}s "
+            f"({options['target']}) on {len(self.targets)} candidate(s)"
+        )
+        # In-process views print debugging output for every POST; keep the report readable
+        quiet = options['target'] == 'inprocess'
+        with open(os.devnull, 'w') as devnull, (contextlib.redirect_stdout(devnull) if quiet else contextlib.nullcontext()):
+            started = time.perf_counter()
+            threads = [threading.Thread(target=self.run_user, args=(index,), daemon=True) for index in range(options['users'])]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+
+        report = self.summarize(elapsed)
+        self.report(report)
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(report, f, indent=2)
+
+    def seed(self):
+        bot, _ = Bot.objects.get_or_create(token='loadtest:0', defaults={'name': 'Load test bot', 'is_active': True})
+        candidate, created = Candidate.objects.get_or_create(
+            public_url_name='loadtest',
+            defaults={
+                'name': 'مرشح اختبار الحمل',
+                'position': 'عضو مجلس النواب',
+                'party': 'مستقل',
+                'bio': 'صفحة مرشح لاختبار قدرة المنصة على تحمل الزيارات قبل يوم الانتخابات.',
+                'bot': bot,
+            },
+        )
+        if created:
+            for i, (question, options) in enumerate([
+                ('ما أهم قضية في دائرتك؟', ['التعليم', 'الصحة', 'المواصلات', 'فرص العمل']),
+                ('هل ستشارك في الانتخابات؟', ['نعم', 'لا', 'لم أقرر بعد']),
+                ('ما رأيك في برنامج المرشح؟', ['ممتاز', 'جيد', 'يحتاج إلى تطوير']),
+            ], start=1):
+                Poll.objects.create(candidate=candidate, title=f'استطلاع {i}', question=question, options=options)
+            for i in range(1, 4):
+                Event.objects.create(
+                    candidate=candidate, title=f'مؤتمر جماهيري {i}', description='لقاء مفتوح مع أهالي الدائرة',
+                    location=CITIES[i], start_datetime=timezone.now() + timedelta(days=i),
+                )
+            self.stdout.write(f'Created load-test candidate {candidate.pk}')
+        return candidate
+
+    def load_targets(self, candidate_ids):
+        candidates = Candidate.objects.filter(is_active=True, bot__isnull=False).order_by('created_at')
+        if candidate_ids:
+            candidates = sorted(candidates.filter(pk__in=candidate_ids), key=lambda c: candidate_ids.index(str(c.pk)))
+        targets = []
+        for candidate in candidates:
+            kwargs = {'candidate_id': str(candidate.pk)}
+            polls = [
+                (str(poll.pk), len(poll.options))
+                for poll in candidate.polls.filter(is_active=True)
+                if isinstance(poll.options, list) and poll.options
+            ]
+            by_name = None
+            if candidate.public_url_name:
+                by_name = reverse('candidate_landing_by_name', kwargs={'candidate_name': candidate.public_url_name})
+            targets.append({
+                'page': reverse('candidate_landing', kwargs=kwargs),
+                'by_name': by_name,
+                'mobile': reverse('candidate_landing_mobile', kwargs=kwargs),
+                'live': reverse('candidate_live', kwargs=kwargs),
+                'polls': polls,
+            })
+        if not targets:
+            raise CommandError('No active candidate with a bot to visit; pass --seed to create one')
+        return targets
+
+    # Visitors
+
+    def run_user(self, index):
+        options = self.options
+        seed = options['random_seed']
+        rng = random.Random(None if seed is None else seed * 100003 + index)
+        try:
+            time.sleep(options['ramp_up'] * index / options['users'])
+            while time.monotonic() < self.deadline:
+                if options['target'] == 'http':
+                    visitor = HttpVisitor(options['base_url'].rstrip('/'), options['timeout'])
+                else:
+                    visitor = InProcessVisitor(rng)
+                target = rng.choices(self.targets, self.weights)[0]
+                self.visit(visitor, target, rng)
+                self.think(rng)
+        finally:
+            if options['target'] == 'inprocess':
+                connection.close()
+
+    def visit(self, visitor, target, rng):
+        """Open the page and its live counts like a browser, then act a few times.
+
+        Mobile visits post the mobile page's form fields to the mobile page;
+        desktop visits post the desktop fields to the candidate's page by id
+        or, when it has one, by its public URL name.
+        """
+        mobile = rng.random() < self.options['mobile_share']
+        if mobile:
+            page = target['mobile']
+        elif target['by_name'] and rng.random() < 0.5:
+            page = target['by_name']
+        else:
+            page = target['page']
+        self.request(visitor, 'page_mobile' if mobile else 'page', 'GET', page)
+        live = self.request(visitor, 'live', 'GET', target['live'])
+        if isinstance(live, dict):
+            visitor.csrf_token = live.get('csrf_token', '')
+        actions, weights = zip(*self.mix.items())
+        for _ in range(rng.randint(1, max(self.options['actions'], 1))):
+            self.think(rng)
+            if time.monotonic() >= self.deadline:
+                return
+            action = rng.choices(actions, weights)[0]
+            if action == 'vote' and not target['polls']:
+                action = 'view'
+            if action == 'view':
+                self.request(visitor, 'view', 'GET', page)
+            else:
+                data = self.payload(action, target, rng, visitor.csrf_token, mobile)
+                self.request(visitor, action, 'POST', page, data)
+
+    def think(self, rng):
+        mean = self.options['think_time']
+        if mean > 0:
+            time.sleep(min(rng.expovariate(1.0 / mean), mean * 5, max(self.deadline - time.monotonic(), 0)))
+
+    def payload(self, action, target, rng, csrf_token, mobile=False):
+        name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+        phone = '01' + rng.choice('0125') + ''.join(rng.choice('0123456789') for _ in range(8))
+        data = {'action': action, 'csrfmiddlewaretoken': csrf_token}
+        if action == 'support':
+            data.update({
+                'user_name': name,
+                'user_phone': phone,
+                'user_national_id': rng.choice('23') + ''.join(rng.choice('0123456789') for _ in range(13)),
+                'user_city': rng.choice(CITIES),
+                'support_level': rng.choice(['supporter', 'supporter', 'volunteer', 'donor']),
+            })
+        elif action == 'ask':
+            data.update({'asker_name': name, 'asker_phone': phone, 'question_text': rng.choice(QUESTIONS)})
+        elif mobile:
+            # The mobile page votes by IP, with its own field names
+            poll_id, option_count = rng.choice(target['polls'])
+            data.update({'action': 'poll', 'poll_id': poll_id, 'selected_option': str(rng.randrange(option_count))})
+        else:
+            poll_id, option_count = rng.choice(target['polls'])
+            data.update({
+                'poll_id': poll_id,
+                'option_index': str(rng.randrange(option_count)),
+                'voter_name': name,
+                'voter_phone': phone,
+            })
+        return data
+
+    def request(self, visitor, action, method, path, data=None):
+        """Time one request and record its outcome; returns the JSON body of a good JSON response."""
+        t0 = time.perf_counter()
+        body, detail = None, None
+        try:
+            if method == 'GET':
+                status, content, content_type, queries = visitor.get(path)
+            else:
+                status, content, content_type, queries = visitor.post(path, data)
+            outcome, body = classify(status, content, content_type, method)
+            if outcome == 'rejected':
+                detail = body.get('message')
+            elif outcome == 'error':
+                detail = f'HTTP {status}'
+        except Exception as ex:
+            outcome, queries, detail = 'error', None, type(ex).__name__
+        latency = time.perf_counter() - t0
+        with self.lock:
+            self.samples[action].append((latency, queries, outcome, detail))
+        return body if outcome == 'ok' else None
+
+    # Report
+
+    def summarize(self, elapsed):
+        def summary(samples):
+            latencies = sorted(sample[0] for sample in samples)
+            queries = [sample[1] for sample in samples if sample[1] is not None]
+            outcomes = {name: 0 for name in OUTCOMES}
+            for sample in samples:
+                outcomes[sample[2]] += 1
+            reasons = Counter(sample[3] for sample in samples if sample[3])
+            return {
+                'requests': len(samples),
+                'throughput': len(samples) / elapsed,
+                'latency_ms': {
+                    name: percentile(latencies, pct) * 1000.0
+                    for name, pct in (('p50', 50), ('p90', 90), ('p95', 95), ('p99', 99), ('max', 100))
+                },
+                'queries_avg': sum(queries) / len(queries) if queries else None,
+                'queries_max': max(queries) if queries else None,
+                **outcomes,
+                'error_rate': outcomes['error'] / len(samples) if samples else 0.0,
+                'reasons': dict(reasons.most_common(5)),
+            }
+
+        order = ['page', 'page_mobile', 'live', *ACTIONS]
+        actions = {name: summary(self.samples[name]) for name in order if self.samples.get(name)}
+        everything = [sample for samples in self.samples.values() for sample in samples]
+        return {
+            'target': self.options['target'],
+            'users': self.options['users'],
+            'elapsed': elapsed,
+            'actions': actions,
+            'total': summary(everything),
+        }
+
+    def report(self, report):
+        self.stdout.write(self.style.SUCCESS(f"Load test finished in {report['elapsed']:.1f}s"))
+        header = (
+            f"{'action':<12}{'requests':>9}{'req/s':>8}{'p50':>8}{'p90':>8}{'p95':>8}{'p99':>8}{'max':>8}"
+            f"{'queries':>12}{'errors':>8}{'rejected':>9}{'429':>6}"
+        )
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        rows = list(report['actions'].items()) + [('total', report['total'])]
+        for name, row in rows:
+            latency = row['latency_ms']
+            if row['queries_avg'] is None:
+                queries = '-'
+            else:
+                queries = f"{row['queries_avg']:.1f}/{row['queries_max']}"
+            line = (
+                f"{name:<12}{row['requests']:>9}{row['throughput']:>8.1f}{latency['p50']:>8.0f}{latency['p90']:>8.0f}"
+                f"{latency['p95']:>8.0f}{latency['p99']:>8.0f}{latency['max']:>8.0f}{queries:>12}"
+                f"{row['error_rate']:>8.1%}{row['rejected']:>9}{row['throttled']:>6}"
+            )
+            self.stdout.write(self.style.WARNING(line) if row['error'] else line)
+        self.stdout.write('Latencies in ms; queries per request as avg/max; rejected = the page refused the submission')
+        for name, row in report['actions'].items():
+            for reason, count in row['reasons'].items():
+                self.stdout.write(f'  {name}: {count} x {reason}')
@@ -0,0 +1,46 @@
+"""
+Management command that pre-renders candidate landing pages to static files
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hub import prerender
+
+
+class Command(BaseCommand):
+    help = 'Render changed candidate landing pages to LANDING_PRERENDER_ROOT (see hub.prerender)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--every',
+            type=float,
+            default=0,
+            help='Run continuously, checking for changes every N seconds (0 = run once)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-render every active candidate on the first run (e.g. after a deploy)',
+        )
+
+    def handle(self, *args, **options):
+        if not prerender.prerender_root():
+            raise CommandError('LANDING_PRERENDER_ROOT is not set')
+        publisher = prerender.Publisher()
+        force = options['force']
+        while True:
+            try:
+                changed = publisher.run(force=force)
+            except Exception as ex:
+                if not options['every']:
+                    raise
+                self.stderr.write(f'Publish failed, retrying: {ex}')
+                changed = []
+            else:
+                force = False
+            if changed:
+                self.stdout.write(f'Published landing pages of {len(changed)} candidate(s)')
+            if not options['every']:
+                break
+            time.sleep(options['every'])
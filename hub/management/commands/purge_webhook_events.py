@@ -0,0 +1,71 @@
+"""
+Management command to enforce WebhookEvent retention and maintain monthly partitions
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from hub import retention
+from hub.models import ProcessedUpdate, WebhookEvent
+
+
+class Command(BaseCommand):
+    help = 'Purge WebhookEvent rows past retention and create upcoming monthly partitions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=getattr(settings, 'WEBHOOK_EVENT_RETENTION_DAYS', 30),
+            help='Keep webhook events for this many days',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=getattr(settings, 'WEBHOOK_EVENT_PURGE_CHUNK', 5000),
+            help='Rows deleted per transaction',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.2,
+            help='Seconds to sleep between delete chunks',
+        )
+        parser.add_argument(
+            '--every',
+            type=int,
+            default=0,
+            help='Run continuously, repeating every N seconds (0 = run once)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.purge(options['days'], options['chunk_size'], options['pause'])
+            if not options['every']:
+                break
+            time.sleep(options['every'])
+
+    def purge(self, days, chunk_size, pause):
+        now = timezone.now()
+        cutoff = now - timedelta(days=days)
+
+        if retention.is_partitioned():
+            created = retention.ensure_partitions(now)
+            for name in created:
+                self.stdout.write(f'Created partition {name}')
+            for name in retention.drop_expired_partitions(cutoff):
+                self.stdout.write(f'Dropped partition {name}')
+
+        # Rows left in a partially expired month (or everything, when not partitioned)
+        deleted = retention.purge_rows(WebhookEvent, 'created_at', cutoff, chunk_size, pause)
+        self.stdout.write(f'Deleted {deleted} webhook event(s) older than {cutoff:%Y-%m-%d}')
+
+        # Dedup records only need to outlive Telegram's retry window
+        dedup_cutoff = now - timedelta(days=getattr(settings, 'PROCESSED_UPDATE_RETENTION_DAYS', 7))
+        deleted = retention.purge_rows(ProcessedUpdate, 'processed_at', dedup_cutoff, chunk_size, pause)
+        self.stdout.write(f'Deleted {deleted} processed update record(s)')
+
+        self.stdout.write(self.style.SUCCESS('Webhook event retention completed'))
@@ -0,0 +1,254 @@
+"""
+Management command to replay stored or synthetic Telegram updates through the ingest pipeline
+"""
+import contextlib
+import io
+import json
+import math
+import random
+import time
+from collections import Counter
+from datetime import datetime
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.utils import timezone
+
+from hub.batching import message_log_buffer
+from hub.management.commands.poll_updates import Command as PollCommand
+from hub.models import Bot, MessageLog, WebhookEvent
+from hub.telegram_standin import TelegramStandIn
+from hub.views import telegram_webhook
+
+SYNTHETIC_TEXTS = [
+    'مرحبا، متى موعد المؤتمر القادم؟',
+    'ما هو برنامجكم الانتخابي للشباب؟',
+    'Hello, where can I vote?',
+    'شكرا على المجهود',
+]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, math.ceil(pct / 100.0 * len(values)) - 1))
+    return values[index]
+
+
+class QueryCounter:
+    """connection.execute_wrapper that counts queries on this thread's connection."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay WebhookEvent / MessageLog updates, or a synthetic stream, through the '
+        'poller or webhook code and report throughput, queries per update and latency. '
+        'Writes to the configured database like real traffic would.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bot-id', type=int, required=True, help='Bot to replay for (and to read stored updates from)')
+        parser.add_argument('--source', choices=['webhook', 'messages', 'synthetic'], default='webhook',
+                            help='WebhookEvent payloads, MessageLog.raw messages, or generated updates')
+        parser.add_argument('--target', choices=['poller', 'webhook'], default='poller',
+                            help='Process updates with poll_updates.handle_update or the telegram_webhook view')
+        parser.add_argument('--from-id', type=int, help='First stored row id to replay')
+        parser.add_argument('--to-id', type=int, help='Last stored row id to replay')
+        parser.add_argument('--since', help='Only rows created at or after this ISO date/time')
+        parser.add_argument('--until', help='Only rows created before this ISO date/time')
+        parser.add_argument('--limit', type=int, default=1000, help='Maximum number of updates to replay')
+        parser.add_argument('--users', type=int, default=200, help='Distinct chats in the synthetic stream')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for the synthetic stream')
+        parser.add_argument('--rate', type=float, default=0, help='Updates per second (0 = as fast as possible)')
+        parser.add_argument('--batch', type=int, default=100,
+                            help='Poller target: flush buffered writes every N updates, like one getUpdates page')
+        parser.add_argument('--keep-update-ids', action='store_true',
+                            help='Keep the stored update_ids (they will mostly be dropped as duplicates)')
+        parser.add_argument('--no-stand-in', dest='stand_in', action='store_false',
+                            help='Use the configured TELEGRAM_API_BASE instead of a local stand-in server')
+        parser.add_argument('--api-latency', type=float, default=0.0,
+                            help='Seconds the stand-in waits before answering each Bot API call')
+
+    def handle(self, *args, **options):
+        try:
+            bot = Bot.objects.get(id=options['bot_id'])
+        except Bot.DoesNotExist:
+            raise CommandError('Bot not found for --bot-id')
+
+        updates = list(self.load_updates(bot, options))
+        if not updates:
+            raise CommandError('No updates to replay')
+        if not options['keep_update_ids']:
+            # Fresh ids so the dedup layer treats the replay as new traffic
+            base = int(time.time() * 1000) * 1000
+            for index, upd in enumerate(updates):
+                upd['update_id'] = base + index
+
+        self.stdout.write(
+            f"Replaying {len(updates)} update(s) from {options['source']} into the {options['target']} pipeline"
+        )
+
+        standin = TelegramStandIn(latency=options['api_latency']) if options['stand_in'] else None
+        if standin:
+            standin.start()
+            self.stdout.write(f'Telegram stand-in listening on {standin.base_url}')
+        try:
+            stats = self.replay(bot, updates, options)
+        finally:
+            if standin:
+                standin.stop()
+
+        self.report(stats, standin)
+
+    # ===== Sources =====
+
+    def load_updates(self, bot, options):
+        source = options['source']
+        if source == 'synthetic':
+            yield from self.synthetic_updates(options['limit'], options['users'], options['seed'])
+            return
+
+        if source == 'webhook':
+            qs, date_field = WebhookEvent.objects.filter(bot=bot), 'created_at'
+        else:
+            qs, date_field = MessageLog.objects.filter(bot=bot, raw__isnull=False), 'received_at'
+        if options['from_id']:
+            qs = qs.filter(id__gte=options['from_id'])
+        if options['to_id']:
+            qs = qs.filter(id__lte=options['to_id'])
+        if options['since']:
+            qs = qs.filter(**{f'{date_field}__gte': self.parse_time(options['since'])})
+        if options['until']:
+            qs = qs.filter(**{f'{date_field}__lt': self.parse_time(options['until'])})
+        qs = qs.order_by('id')[:options['limit']]
+
+        if source == 'webhook':
+            for payload in qs.values_list('payload', flat=True).iterator():
+                if isinstance(payload, dict):
+                    yield dict(payload)
+        else:
+            # MessageLog keeps only the message; wrap it back into an update
+            for message_log_id, raw in qs.values_list('id', 'raw').iterator():
+                if isinstance(raw, dict):
+                    yield {'update_id': message_log_id, 'message': raw}
+
+    def parse_time(self, value):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f'Invalid date/time: {value}')
+        return timezone.make_aware(value) if timezone.is_naive(value) else value
+
+    def synthetic_updates(self, count, users, seed):
+        """/start, questions, button presses and contacts from ``users`` chats."""
+        rng = random.Random(seed)
+        for index in range(count):
+            chat_id = 9_000_000_000 + rng.randrange(users)
+            sender = {'id': chat_id, 'first_name': 'مستخدم', 'username': f'user{chat_id % 100000}', 'language_code': 'ar'}
+            chat = {'id': chat_id, 'type': 'private'}
+            roll = rng.random()
+            if roll < 0.15:
+                yield {'update_id': index, 'callback_query': {
+                    'id': str(index), 'from': sender, 'message': {'message_id': index, 'chat': chat},
+                    'data': 'enable_questions',
+                }}
+                continue
+            message = {'message_id': index, 'date': int(time.time()), 'chat': chat, 'from': sender}
+            if roll < 0.30:
+                message['text'] = '/start'
+            elif roll < 0.35:
+                message['contact'] = {'phone_number': f'+2010{chat_id % 100000000:08d}', 'user_id': chat_id}
+            else:
+                message['text'] = rng.choice(SYNTHETIC_TEXTS)
+            yield {'update_id': index, 'message': message}
+
+    # ===== Replay =====
+
+    def replay(self, bot, updates, options):
+        target = options['target']
+        rate = options['rate']
+        quiet = options['verbosity'] < 2
+        counter = QueryCounter()
+        latencies = []
+        errors = Counter()
+
+        if target == 'poller':
+            poller = PollCommand(stdout=io.StringIO() if quiet else None, stderr=io.StringIO() if quiet else None)
+            poller.setup(bot)
+            process = poller.handle_update
+        else:
+            factory = RequestFactory()
+            path = f'/hub/bots/{bot.id}/webhook/'
+
+            def process(upd):
+                request = factory.post(path, data=json.dumps(upd), content_type='application/json')
+                response = async_to_sync(telegram_webhook)(request, bot_id=bot.id)
+                if response.status_code >= 400:
+                    raise RuntimeError(f'HTTP {response.status_code}')
+
+        # The webhook prints every payload; keep the report readable
+        output = contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext()
+        started = time.perf_counter()
+        with output, connection.execute_wrapper(counter):
+            for index, upd in enumerate(updates):
+                if rate:
+                    delay = started + index / rate - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                t0 = time.perf_counter()
+                try:
+                    process(upd)
+                except Exception as ex:
+                    errors[type(ex).__name__] += 1
+                latencies.append(time.perf_counter() - t0)
+                if target == 'poller' and (index + 1) % options['batch'] == 0:
+                    poller.message_logs.flush()
+                    poller.conversations.flush_if_due()
+            if target == 'poller':
+                # Wait for every reply, so the stand-in's call counts are complete
+                poller.teardown(send_timeout=60)
+            else:
+                message_log_buffer.flush()
+        elapsed = time.perf_counter() - started
+
+        return {
+            'updates': len(updates),
+            'elapsed': elapsed,
+            'queries': counter.count,
+            'latencies': sorted(latencies),
+            'errors': errors,
+        }
+
+    def report(self, stats, standin):
+        count = stats['updates']
+        lat = stats['latencies']
+        ms = lambda v: v * 1000.0
+        self.stdout.write(self.style.SUCCESS('Replay finished'))
+        self.stdout.write(f"  updates:            {count}")
+        self.stdout.write(f"  elapsed:            {stats['elapsed']:.2f}s")
+        self.stdout.write(f"  throughput:         {count / stats['elapsed']:.1f} updates/s")
+        self.stdout.write(f"  queries:            {stats['queries']} ({stats['queries'] / count:.2f} per update)")
+        self.stdout.write(
+            f"  latency ms:         p50={ms(percentile(lat, 50)):.2f} p95={ms(percentile(lat, 95)):.2f} "
+            f"p99={ms(percentile(lat, 99)):.2f} max={ms(lat[-1]):.2f}"
+        )
+        errors = stats['errors']
+        if errors:
+            self.stdout.write(self.style.WARNING(
+                f"  errors:             {sum(errors.values())} " + ', '.join(f'{k}={v}' for k, v in errors.items())
+            ))
+        else:
+            self.stdout.write("  errors:             0")
+        if standin:
+            calls = ', '.join(f'{k}={v}' for k, v in sorted(standin.calls.items())) or 'none'
+            self.stdout.write(f"  bot api calls:      {calls}")
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0021_contactmessage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessedUpdate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('update_id', models.BigIntegerField()),
+                ('processed_at', models.DateTimeField(auto_now_add=True)),
+                ('bot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='processed_updates', to='hub.bot')),
+            ],
+            options={
+                'unique_together': {('bot', 'update_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:26
+
+from datetime import date
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def _month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def _next_month(month):
+    return date(month.year + (month.month // 12), month.month % 12 + 1, 1)
+
+
+def partition_webhook_events(apps, schema_editor):
+    """Rebuild hub_webhookevent as a table range-partitioned by month (PostgreSQL only).
+
+    Monthly partitions are created for every month that already holds rows plus
+    the next two months; anything outside those ranges lands in the default
+    partition. Later months are added by ``manage.py purge_webhook_events``.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT MIN(created_at) FROM hub_webhookevent")
+        oldest = cursor.fetchone()[0]
+
+    now = timezone.now()
+    month = _month_start(oldest or now)
+    last = _month_start(now)
+    for _ in range(2):
+        last = _next_month(last)
+
+    statements = [
+        "ALTER TABLE hub_webhookevent RENAME TO hub_webhookevent_unpartitioned",
+        "CREATE SEQUENCE hub_webhookevent_part_id_seq",
+        "SELECT setval('hub_webhookevent_part_id_seq', "
+        "COALESCE((SELECT MAX(id) FROM hub_webhookevent_unpartitioned), 0) + 1, false)",
+        """
+        CREATE TABLE hub_webhookevent (
+            id bigint NOT NULL DEFAULT nextval('hub_webhookevent_part_id_seq'),
+            event_type varchar(100) NOT NULL,
+            payload jsonb NOT NULL,
+            created_at timestamp with time zone NOT NULL,
+            bot_id bigint NOT NULL REFERENCES hub_bot (id) DEFERRABLE INITIALLY DEFERRED,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """,
+        "ALTER SEQUENCE hub_webhookevent_part_id_seq OWNED BY hub_webhookevent.id",
+        "CREATE TABLE hub_webhookevent_default PARTITION OF hub_webhookevent DEFAULT",
+    ]
+    while month <= last:
+        statements.append(
+            f"CREATE TABLE hub_webhookevent_p{month:%Y_%m} PARTITION OF hub_webhookevent "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+        )
+        month = _next_month(month)
+    statements += [
+        "INSERT INTO hub_webhookevent (id, event_type, payload, created_at, bot_id) "
+        "SELECT id, event_type, payload, created_at, bot_id FROM hub_webhookevent_unpartitioned",
+        "DROP TABLE hub_webhookevent_unpartitioned",
+        # Fire the deferred FK checks now; indexes can't be built while they are pending
+        "SET CONSTRAINTS ALL IMMEDIATE",
+        # Keep the FK index Django created in 0001 so later schema changes find it
+        "CREATE INDEX hub_webhookevent_bot_id_40c76141 ON hub_webhookevent (bot_id)",
+    ]
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0022_processedupdate'),
+    ]
+
+    operations = [
+        # Not reversible into a plain table; reversing leaves the partitions in place
+        migrations.RunPython(partition_webhook_events, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='webhookevent',
+            index=models.Index(fields=['bot', 'created_at'], name='hub_webhook_bot_id_58e7b4_idx'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+TOTAL_OPTION = -1
+
+
+def selected_indices(selected):
+    """Frozen copy of hub.tallies.selected_indices."""
+    indices = set()
+    for value in selected or []:
+        try:
+            index = int(value)
+        except (TypeError, ValueError):
+            continue
+        if index >= 0:
+            indices.add(index)
+    return indices
+
+
+def backfill_tallies(apps, schema_editor):
+    Poll = apps.get_model('hub', 'Poll')
+    PollResponse = apps.get_model('hub', 'PollResponse')
+    PollTallyShard = apps.get_model('hub', 'PollTallyShard')
+    PollVote = apps.get_model('hub', 'PollVote')
+
+    tallies = {poll_id: [{}, 0] for poll_id in Poll.objects.values_list('id', flat=True).iterator()}
+    responses = PollResponse.objects.values_list('poll_id', 'selected_options').iterator()
+    public_votes = PollVote.objects.values_list('poll_id', 'option_index').iterator()
+    for poll_id, indices in [
+        *((poll_id, selected_indices(selected)) for poll_id, selected in responses),
+        *((poll_id, {option_index}) for poll_id, option_index in public_votes),
+    ]:
+        tally = tallies.setdefault(poll_id, [{}, 0])
+        tally[1] += 1
+        for index in indices:
+            tally[0][index] = tally[0].get(index, 0) + 1
+
+    batch = []
+    for poll_id, (counts, total) in tallies.items():
+        batch += [PollTallyShard(poll_id=poll_id, option=index, shard=0, count=count) for index, count in counts.items()]
+        batch.append(PollTallyShard(poll_id=poll_id, option=TOTAL_OPTION, shard=0, count=total))
+        if len(batch) >= 1000:
+            PollTallyShard.objects.bulk_create(batch)
+            batch = []
+    PollTallyShard.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0023_webhookevent_partitioning'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PollTallyShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('option', models.SmallIntegerField()),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('count', models.BigIntegerField(default=0)),
+                ('poll', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tally_shards', to='hub.poll')),
+            ],
+            options={
+                'unique_together': {('poll', 'option', 'shard')},
+            },
+        ),
+        migrations.RunPython(backfill_tallies, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:48
+
+import hashlib
+import hmac
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copies of the hub.identity helpers, so later edits don't change this migration
+NOTES_NATIONAL_ID_RE = re.compile(r'National ID:\s*(\d{14})')
+
+
+def national_id_fingerprint(national_id):
+    national_id = (national_id or '').strip()
+    if not national_id:
+        return None
+    key = getattr(settings, 'NATIONAL_ID_FINGERPRINT_KEY', None) or settings.SECRET_KEY
+    return hmac.new(key.encode(), national_id.encode(), hashlib.sha256).hexdigest()
+
+
+def national_id_from_notes(notes):
+    match = NOTES_NATIONAL_ID_RE.search(notes or '')
+    return match.group(1) if match else None
+
+
+def backfill_fingerprints(apps, schema_editor):
+    Supporter = apps.get_model('hub', 'Supporter')
+
+    # The oldest signup keeps the fingerprint; later duplicates stay unset
+    seen = set()
+    batch = []
+    rows = Supporter.objects.filter(notes__contains='National ID').order_by('registered_at', 'id')
+    for supporter_id, candidate_id, notes in rows.values_list('id', 'candidate_id', 'notes').iterator():
+        fingerprint = national_id_fingerprint(national_id_from_notes(notes))
+        if fingerprint is None or (candidate_id, fingerprint) in seen:
+            continue
+        seen.add((candidate_id, fingerprint))
+        batch.append(Supporter(id=supporter_id, national_id_fingerprint=fingerprint))
+        if len(batch) >= 1000:
+            Supporter.objects.bulk_update(batch, ['national_id_fingerprint'])
+            batch = []
+    if batch:
+        Supporter.objects.bulk_update(batch, ['national_id_fingerprint'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0024_polltallyshard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='supporter',
+            name='national_id_fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='supporter',
+            constraint=models.UniqueConstraint(condition=models.Q(('national_id_fingerprint__isnull', False)), fields=('candidate', 'national_id_fingerprint'), name='unique_supporter_national_id'),
+        ),
+    ]
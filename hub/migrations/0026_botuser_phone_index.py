@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:50
+
+from django.db import migrations, models
+
+# Frozen copy of hub.identity.normalize_phone, so later edits don't change this migration
+ARABIC_DIGITS = str.maketrans('\u0660\u0661\u0662\u0663\u0664\u0665\u0666\u0667\u0668\u0669'
+                              '\u06f0\u06f1\u06f2\u06f3\u06f4\u06f5\u06f6\u06f7\u06f8\u06f9',
+                              '01234567890123456789')
+
+
+def normalize_phone(value):
+    digits = ''.join(ch for ch in (value or '').translate(ARABIC_DIGITS) if ch.isascii() and ch.isdigit())
+    if digits.startswith('00'):
+        digits = digits[2:]
+    if digits.startswith('20') and len(digits) == 12:
+        digits = '0' + digits[2:]
+    return digits
+
+
+def normalize_phone_numbers(apps, schema_editor):
+    BotUser = apps.get_model('hub', 'BotUser')
+
+    batch = []
+    rows = BotUser.objects.exclude(phone_number__isnull=True).exclude(phone_number='')
+    for bot_user_id, phone in rows.values_list('id', 'phone_number').iterator():
+        normalized = normalize_phone(phone)
+        if normalized != phone:
+            batch.append(BotUser(id=bot_user_id, phone_number=normalized or None))
+        if len(batch) >= 1000:
+            BotUser.objects.bulk_update(batch, ['phone_number'])
+            batch = []
+    if batch:
+        BotUser.objects.bulk_update(batch, ['phone_number'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0025_supporter_national_id_fingerprint'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_phone_numbers, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='botuser',
+            index=models.Index(fields=['phone_number', 'bot'], name='hub_botuser_phone_bot_idx'),
+        ),
+    ]
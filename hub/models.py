@@ -34,6 +34,10 @@ class BotUser(models.Model):
 
     class Meta:
         unique_together = ("bot", "telegram_id")
+        indexes = [
+            # Phone first: landing signups also look supporters up by phone alone
+            models.Index(fields=["phone_number", "bot"], name="hub_botuser_phone_bot_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.username or self.telegram_id} ({self.bot.name})"
@@ -135,10 +139,30 @@ class WebhookEvent(models.Model):
     payload = models.JSONField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # On PostgreSQL the table is range-partitioned by month on created_at
+        # (see migration 0023 and hub.retention)
+        indexes = [
+            models.Index(fields=["bot", "created_at"]),
+        ]
+
     def __str__(self) -> str:
         return f"{self.bot.name} {self.event_type}"
 
 
+class ProcessedUpdate(models.Model):
+    """Telegram update_id already handled for a bot (webhook retries, poller overlap)."""
+    bot = models.ForeignKey(Bot, on_delete=models.CASCADE, related_name="processed_updates")
+    update_id = models.BigIntegerField()
+    processed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("bot", "update_id")
+
+    def __str__(self) -> str:
+        return f"{self.bot.name} update={self.update_id}"
+
+
 class MessageLog(models.Model):
     bot = models.ForeignKey(Bot, on_delete=models.CASCADE, related_name="message_logs")
     bot_user = models.ForeignKey(BotUser, on_delete=models.SET_NULL, null=True, blank=True, related_name="message_logs")
@@ -425,6 +449,29 @@ class PollResponse(models.Model):
         return f"{self.bot_user} responded to {self.poll.title}"
 
 
+class PollTallyShard(models.Model):
+    """One slice of a poll's running vote counts.
+
+    ``count`` is the number of votes (PollResponse and PollVote) for
+    ``option`` (TOTAL_OPTION for the number of votes) recorded in this
+    shard. Votes add to a random shard with an UPDATE ... SET count =
+    count + 1, so concurrent votes on one poll rarely wait on the same row.
+    Kept current by hub.tallies; sum the shards to read a tally.
+    """
+    TOTAL_OPTION = -1
+
+    poll = models.ForeignKey(Poll, on_delete=models.CASCADE, related_name='tally_shards')
+    option = models.SmallIntegerField()
+    shard = models.PositiveSmallIntegerField()
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('poll', 'option', 'shard')
+
+    def __str__(self):
+        return f"Tally shard {self.shard} of {self.poll_id} option {self.option}: {self.count}"
+
+
 class PollVote(models.Model):
     """Lightweight vote tracking by IP for public poll submissions.
 
@@ -458,12 +505,21 @@ class Supporter(models.Model):
         default=5
     )  # 1-5 scale
     notes = models.TextField(blank=True, null=True)
+    # HMAC of the national ID (hub.identity), unique per candidate
+    national_id_fingerprint = models.CharField(max_length=64, blank=True, null=True, editable=False)
     registered_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ['candidate', 'bot_user']
         ordering = ['-registered_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['candidate', 'national_id_fingerprint'],
+                condition=models.Q(national_id_fingerprint__isnull=False),
+                name='unique_supporter_national_id',
+            ),
+        ]
 
     def get_support_level_display(self):
         """Get Arabic display name for support level"""
@@ -0,0 +1,128 @@
+"""
+In-memory index of candidate names and URL slugs
+"""
+import re
+import threading
+import time
+import unicodedata
+
+from django.conf import settings
+from django.core.cache import cache
+
+GENERATION_KEY = 'candidate_names:generation'
+
+# Harakat, superscript alef and Quranic marks
+ARABIC_MARKS_RE = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed]')
+ARABIC_LETTERS = str.maketrans({
+    '\u0623': '\u0627',  # alef with hamza above -> alef
+    '\u0625': '\u0627',  # alef with hamza below -> alef
+    '\u0622': '\u0627',  # alef with madda -> alef
+    '\u0671': '\u0627',  # alef wasla -> alef
+    '\u0649': '\u064a',  # alef maqsura -> yaa
+    '\u06cc': '\u064a',  # Farsi yeh -> yaa
+    '\u0629': '\u0647',  # taa marbuta -> haa
+    '\u06a9': '\u0643',  # keheh -> kaf
+    '\u0640': None,  # tatweel
+})
+SEPARATORS_RE = re.compile(r'[\s+_\-./]+')
+
+# Longest Candidate.public_url_name / name; longer paths can't be candidates
+MAX_NAME_LENGTH = 300
+
+
+def normalize_name(value):
+    """Lookup form of a candidate name or URL segment.
+
+    Folds the usual Arabic spelling variants (alef forms, alef maqsura,
+    taa marbuta), drops diacritics and tatweel, lowercases Latin letters and
+    treats spaces, '+', '-', '_', '.' and '/' as one separator.
+    """
+    value = unicodedata.normalize('NFKC', value or '')
+    value = ARABIC_MARKS_RE.sub('', value).translate(ARABIC_LETTERS).casefold()
+    return SEPARATORS_RE.sub(' ', value).strip()
+
+
+class CandidateNameIndex:
+    """Normalised public_url_name and name of active candidates -> candidate id.
+
+    Built in one query and refreshed like hub.registry.BotRegistry: saving or
+    deleting a Candidate (see hub.signals) clears this process's copy and
+    bumps a generation counter that other processes check at most every
+    CANDIDATE_NAME_INDEX_CHECK_INTERVAL seconds.
+
+    URL names win over display names; when two candidates normalise to the
+    same key the newest one wins, as the old exact-match queries did. A name
+    missing from the index is unknown: there is no database fallback, so
+    probes of the root catch-all route cost no queries. A candidate created
+    in another process is found within the check interval.
+    """
+
+    def __init__(self, check_interval=None, max_age=None):
+        self.check_interval = (
+            check_interval if check_interval is not None
+            else getattr(settings, 'CANDIDATE_NAME_INDEX_CHECK_INTERVAL', 5)
+        )
+        self.max_age = max_age or getattr(settings, 'CANDIDATE_NAME_INDEX_MAX_AGE', 300)
+        self._lock = threading.Lock()
+        self._index = None
+        self._generation = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+
+    def _current_generation(self):
+        return cache.get(GENERATION_KEY) or 0
+
+    def _load(self):
+        from .models import Candidate
+
+        generation = self._current_generation()
+        rows = list(
+            Candidate.objects.filter(is_active=True).order_by('-created_at')
+            .values_list('id', 'public_url_name', 'name')
+        )
+        index = {}
+        for candidate_id, url_name, _ in rows:
+            if url_name:
+                index.setdefault(normalize_name(url_name), str(candidate_id))
+        for candidate_id, _, name in rows:
+            if name:
+                index.setdefault(normalize_name(name), str(candidate_id))
+        index.pop('', None)
+        self._index = index
+        self._generation = generation
+        self._loaded_at = self._checked_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        index = self._index
+        now = time.monotonic()
+        if index is not None and now - self._checked_at < self.check_interval:
+            return index
+        with self._lock:
+            if self._index is None or now - self._loaded_at >= self.max_age:
+                self._load()
+            elif now - self._checked_at >= self.check_interval:
+                self._checked_at = now
+                if self._current_generation() != self._generation:
+                    self._load()
+            return self._index
+
+    def resolve(self, name):
+        """Id (as a string) of the active candidate named ``name``, or None."""
+        if not name or len(name) > MAX_NAME_LENGTH:
+            return None
+        key = normalize_name(name)
+        if not key:
+            return None
+        return self._ensure_fresh().get(key)
+
+    def invalidate(self):
+        """Drop this process's copy and tell other processes to reload."""
+        with self._lock:
+            self._index = None
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.set(GENERATION_KEY, 1, None)
+
+
+name_index = CandidateNameIndex()
@@ -0,0 +1,92 @@
+"""
+Non-blocking outbound Telegram Bot API calls
+"""
+import logging
+import queue
+import threading
+import time
+
+import requests
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+def api_url(token, method):
+    base = getattr(settings, 'TELEGRAM_API_BASE', 'https://api.telegram.org').rstrip('/')
+    return f"{base}/bot{token}/{method}"
+
+
+class OutboundSender:
+    """Send Bot API calls from a bounded pool of worker threads.
+
+    Every chat is pinned to one worker, so replies to the same chat keep their
+    order while different chats are sent concurrently. Each worker has a
+    bounded queue; when it is full, submit() blocks, which slows the caller
+    down instead of buffering without limit.
+    """
+
+    def __init__(self, token, workers=None, queue_size=None, timeout=10, on_error=None):
+        self.token = token
+        self.timeout = timeout
+        self.on_error = on_error
+        workers = workers or getattr(settings, 'OUTBOUND_WORKERS', 8)
+        queue_size = queue_size or getattr(settings, 'OUTBOUND_QUEUE_SIZE', 1000)
+        self._queues = [queue.Queue(maxsize=queue_size) for _ in range(workers)]
+        self._threads = []
+        for index, q in enumerate(self._queues):
+            t = threading.Thread(target=self._run, args=(q,), name=f'outbound-{index}', daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, chat_id, method, payload, then=None, label=None):
+        """Queue a call. ``then(response_json)`` runs on the same worker afterwards."""
+        q = self._queues[hash(chat_id) % len(self._queues)]
+        q.put((method, payload, then, label or method))
+
+    def call(self, method, payload, session=None):
+        """Perform one call synchronously and return the decoded JSON."""
+        r = (session or requests).post(api_url(self.token, method), json=payload, timeout=self.timeout)
+        try:
+            return r.json()
+        except ValueError:
+            return {'ok': False, 'status_code': r.status_code}
+
+    def pending(self):
+        return sum(q.qsize() for q in self._queues)
+
+    def close(self, timeout=30):
+        """Send what is already queued within ``timeout`` seconds in total, then stop the workers.
+
+        Calls still queued when the time is up are dropped with the daemon
+        workers.
+        """
+        deadline = time.monotonic() + timeout
+        for q in self._queues:
+            try:
+                q.put(_STOP, timeout=max(deadline - time.monotonic(), 0))
+            except queue.Full:
+                pass
+        for t in self._threads:
+            t.join(max(deadline - time.monotonic(), 0))
+
+    def _run(self, q):
+        # One keep-alive session per worker
+        session = requests.Session()
+        while True:
+            item = q.get()
+            if item is _STOP:
+                break
+            method, payload, then, label = item
+            try:
+                js = self.call(method, payload, session=session)
+                if then:
+                    then(js)
+            except Exception as ex:
+                if self.on_error:
+                    self.on_error(label, ex)
+                else:
+                    logger.warning('Outbound %s failed: %s', label, ex)
+        session.close()
@@ -0,0 +1,243 @@
+"""
+Full-page cache for anonymous candidate landing pages
+"""
+import re
+import uuid
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.http import condition
+
+VERSION_KEY = 'landing:version:{candidate_id}'
+LAYOUT_VERSION_KEY = 'landing:layout:{candidate_id}'
+PAGE_KEY = 'landing:page:{variant}:{candidate_id}:{version}'
+MODIFIED_KEY = 'landing:modified:{candidate_id}:{version}'
+
+# Set by the mobile page after a vote; such visitors see their own results
+VOTED_COOKIE = 'landing_voted'
+
+CSRF_INPUT_RE = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+CSRF_PLACEHOLDER = b'__landing_csrf_token__'
+
+# Part of every ETag, so a restart (a deploy with new templates) never
+# answers 304 for a page rendered by older code
+RELEASE = uuid.uuid4().hex[:8]
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def _version_timeout():
+    return getattr(settings, 'LANDING_VERSION_TIMEOUT', 24 * 3600)
+
+
+def candidate_version(candidate_id):
+    """Current content version of an active candidate's pages, or None.
+
+    Versions are random tokens, not counters, so a version key lost from the
+    cache can never bring back pages rendered under an older version. That
+    lets the keys expire (LANDING_VERSION_TIMEOUT).
+
+    A version is only issued for an active candidate, so probing random ids
+    leaves no keys behind and their 404s carry no validators.
+    """
+    return _current_version(VERSION_KEY, candidate_id)
+
+
+def layout_version(candidate_id):
+    """Version of everything on the candidate's pages except the live counts and tallies, or None.
+
+    Pre-rendered pages (hub.prerender) are valid for as long as it holds:
+    they fetch the counts and tallies themselves (hub.live). Issued like
+    candidate_version(), and bumped by hub.snapshot only for changes that
+    are not live-only.
+    """
+    return _current_version(LAYOUT_VERSION_KEY, candidate_id)
+
+
+def _current_version(key_format, candidate_id):
+    from .models import Candidate
+
+    key = key_format.format(candidate_id=candidate_id)
+    version = cache.get(key)
+    if version is None:
+        if not Candidate.objects.filter(pk=candidate_id, is_active=True).exists():
+            return None
+        cache.add(key, _new_version(), _version_timeout())
+        version = cache.get(key)
+    return version
+
+
+def bump_candidate_version(candidate_id, layout=False):
+    """Invalidate every cached page of the candidate; returns the new version.
+
+    With ``layout`` the layout version (and so the pre-rendered pages) is
+    invalidated too.
+    """
+    if candidate_id:
+        version = _new_version()
+        cache.set(VERSION_KEY.format(candidate_id=candidate_id), version, _version_timeout())
+        if layout:
+            cache.set(LAYOUT_VERSION_KEY.format(candidate_id=candidate_id), _new_version(), _version_timeout())
+        return version
+
+
+def content_modified(candidate_id, version):
+    """When the content served under ``version`` last changed, or None if not recorded yet."""
+    stamp = cache.get(MODIFIED_KEY.format(candidate_id=candidate_id, version=version))
+    return datetime.fromtimestamp(stamp, tz=timezone.utc) if stamp is not None else None
+
+
+def record_content_modified(candidate_id, version, modified_at, replace=True):
+    """Store the Last-Modified time of ``version`` (see hub.snapshot).
+
+    With ``replace`` off an existing record is kept.
+    """
+    if version and modified_at:
+        key = MODIFIED_KEY.format(candidate_id=candidate_id, version=version)
+        store = cache.set if replace else cache.add
+        store(key, modified_at.timestamp(), _version_timeout())
+
+
+def forget_candidate_version(candidate_id):
+    """Drop the versions of a deleted or deactivated candidate; its pages go with them."""
+    cache.delete_many([key.format(candidate_id=candidate_id) for key in (VERSION_KEY, LAYOUT_VERSION_KEY)])
+
+
+def canonical_candidate_id(value):
+    try:
+        return str(uuid.UUID(str(value)))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_cacheable_request(request):
+    """Anonymous GET without personal state (pending messages, own votes).
+
+    Renders for hub.prerender are not cacheable either: those pages carry
+    the live-update script.
+    """
+    if request.method not in ('GET', 'HEAD') or getattr(request, 'prerender', False):
+        return False
+    if request.COOKIES.get(VOTED_COOKIE):
+        return False
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return False
+    storage = getattr(request, '_messages', None)
+    if storage is not None and len(storage):
+        return False
+    return True
+
+
+def _with_csrf_token(request, content):
+    return content.replace(CSRF_PLACEHOLDER, get_token(request).encode())
+
+
+def cache_landing(variant, candidate_key=None):
+    """Serve a landing view from the cache for anonymous GETs.
+
+    ``candidate_key(request, *args, **kwargs)`` returns the candidate id the
+    page belongs to (default: the ``candidate_id`` URL argument), or None to
+    skip caching. Pages are keyed by variant, candidate and the candidate's
+    version, so hub.signals invalidates them by bumping the version.
+
+    The CSRF token of the visitor who rendered a page is swapped for a
+    placeholder before storing. Every visitor then gets their own token.
+    While a page is being rendered for the cache, ``request.landing_cache``
+    is True so the view can leave out per-visitor details.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not getattr(settings, 'LANDING_CACHE_ENABLED', True) or not is_cacheable_request(request):
+                return view(request, *args, **kwargs)
+            if candidate_key is not None:
+                candidate_id = candidate_key(request, *args, **kwargs)
+            else:
+                candidate_id = canonical_candidate_id(kwargs.get('candidate_id'))
+            version = candidate_version(candidate_id) if candidate_id else None
+            if not version:
+                return view(request, *args, **kwargs)
+
+            key = PAGE_KEY.format(variant=variant, candidate_id=candidate_id, version=version)
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(_with_csrf_token(request, content), content_type=content_type)
+                response['X-Landing-Cache'] = 'hit'
+                return response
+
+            request.landing_cache = True
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming and not response.cookies:
+                content = CSRF_INPUT_RE.sub(rb'\1' + CSRF_PLACEHOLDER + rb'\2', response.content)
+                cache.set(key, (content, response['Content-Type']), getattr(settings, 'LANDING_CACHE_TIMEOUT', 600))
+                response['X-Landing-Cache'] = 'miss'
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_candidate_get(candidate_key=None, applies=is_cacheable_request):
+    """Answer conditional GETs for a candidate's pages from its content version.
+
+    The ETag is the candidate version (plus the view name and RELEASE); it
+    changes whenever hub.signals sees a change to the candidate or its
+    content. Last-Modified is the newest updated_at (or creation time) among
+    the rows the candidate's snapshot was built from, as recorded by
+    hub.snapshot for that version (see content_modified()). A request with
+    a matching If-None-Match / If-Modified-Since gets 304 after two small
+    cache reads, before the view renders anything or runs a query.
+
+    ``candidate_key`` works as for cache_landing. ``applies(request)``
+    selects the requests whose response depends only on the candidate's
+    content (default: anonymous GETs without personal state). Other
+    requests get no validators. Responses with validators are marked
+    ``private, no-cache``, so browsers revalidate instead of guessing a
+    freshness lifetime from Last-Modified.
+    """
+    def decorator(view):
+        def validator(request, *args, **kwargs):
+            """(candidate_id, version) the request is validated against, or None."""
+            if not hasattr(request, '_candidate_validator'):
+                candidate_id = None
+                if applies(request):
+                    if candidate_key is not None:
+                        candidate_id = candidate_key(request, *args, **kwargs)
+                    else:
+                        candidate_id = canonical_candidate_id(kwargs.get('candidate_id'))
+                version = candidate_version(candidate_id) if candidate_id else None
+                request._candidate_validator = (candidate_id, version) if version else None
+            return request._candidate_validator
+
+        def etag(request, *args, **kwargs):
+            current = validator(request, *args, **kwargs)
+            return f'"{view.__name__}-{RELEASE}-{current[1]}"' if current else None
+
+        def last_modified(request, *args, **kwargs):
+            current = validator(request, *args, **kwargs)
+            return content_modified(*current) if current else None
+
+        @wraps(view)
+        def revalidated(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            current = getattr(request, '_candidate_validator', None)
+            if current:
+                patch_cache_control(response, private=True, no_cache=True)
+                # Rendering the page may have recorded the stamp just now
+                if response.status_code == 200 and not response.has_header('Last-Modified'):
+                    modified = content_modified(*current)
+                    if modified is not None:
+                        response['Last-Modified'] = http_date(modified.timestamp())
+            return response
+
+        return condition(etag_func=etag, last_modified_func=last_modified)(revalidated)
+    return decorator
@@ -0,0 +1,259 @@
+"""
+Static pre-rendered candidate landing pages
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import HttpRequest
+from django.urls import Resolver404, resolve, reverse
+from django.utils._os import safe_join
+from django.views.static import serve
+
+from .name_index import name_index
+from .page_cache import VOTED_COOKIE, layout_version
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = 'manifest.json'
+PAGE_FILE = 'index.html'
+
+
+def prerender_root():
+    return getattr(settings, 'LANDING_PRERENDER_ROOT', None)
+
+
+def is_enabled():
+    return bool(getattr(settings, 'LANDING_PRERENDER_ENABLED', False) and prerender_root())
+
+
+def page_file(path):
+    """File of the pre-rendered page for URL ``path``; raises SuspiciousFileOperation outside the root."""
+    return safe_join(prerender_root(), path.strip('/'), PAGE_FILE)
+
+
+def candidate_paths(candidate):
+    """URL paths of the candidate's landing pages: desktop, mobile and /<name>/ for each exact name."""
+    paths = [
+        reverse('candidate_landing', kwargs={'candidate_id': str(candidate.pk)}),
+        reverse('candidate_landing_mobile', kwargs={'candidate_id': str(candidate.pk)}),
+    ]
+    for name in dict.fromkeys([candidate.public_url_name, candidate.name]):
+        if not name or '/' in name or name.strip('.') == '':
+            continue
+        path = f'/{name}/'
+        try:
+            match = resolve(path)
+        except Resolver404:
+            continue
+        # Only names that really lead to this candidate (see hub.name_index)
+        if match.url_name == 'candidate_landing_by_name' and name_index.resolve(name) == str(candidate.pk):
+            paths.append(path)
+    return paths
+
+
+def _request(path):
+    """Anonymous GET for ``path``, flagged so the page carries the live-update script."""
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = path
+    request.META = {'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'REMOTE_ADDR': ''}
+    request.user = AnonymousUser()
+    request.prerender = True
+    request.landing_cache = True
+    return request
+
+
+def _write(path, content):
+    filename = page_file(path)
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    tmp = f'{filename}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(content)
+    os.replace(tmp, filename)
+
+
+def unpublish(paths):
+    for path in paths:
+        try:
+            os.remove(page_file(path))
+        except (FileNotFoundError, SuspiciousFileOperation):
+            pass
+
+
+def publish(candidate):
+    """Render the candidate's landing pages to LANDING_PRERENDER_ROOT.
+
+    Returns the layout version the pages were rendered under and the URL
+    paths written. Pages that do not render with 200 are skipped.
+    """
+    version = layout_version(candidate.pk)
+    written = []
+    for path in candidate_paths(candidate):
+        match = resolve(path)
+        response = match.func(_request(path), *match.args, **match.kwargs)
+        if response.status_code != 200:
+            logger.warning('prerender of %s returned %s', path, response.status_code)
+            continue
+        _write(path, response.content)
+        written.append(path)
+    return version, written
+
+
+class Publisher:
+    """Keeps the pre-rendered pages in step with the candidates' layout versions.
+
+    Each run re-renders the candidates whose layout version (see
+    hub.page_cache) changed since their last publish and removes the pages
+    of deactivated or renamed candidates. Signups and votes don't change
+    the layout version; the pages show those live.
+
+    Re-renders are debounced: a changed candidate is published once its
+    version has held for LANDING_PRERENDER_DEBOUNCE seconds, or at the
+    latest LANDING_PRERENDER_MAX_DELAY seconds after the first change was
+    seen, so a burst of edits costs one render. Until then the middleware
+    sends visitors to Django. What was published under which version is
+    kept in a manifest next to the pages, so a restarted publisher carries
+    on where it stopped.
+    """
+
+    def __init__(self, debounce=None, max_delay=None):
+        self.debounce = debounce if debounce is not None else getattr(settings, 'LANDING_PRERENDER_DEBOUNCE', 5)
+        self.max_delay = max_delay if max_delay is not None else getattr(settings, 'LANDING_PRERENDER_MAX_DELAY', 60)
+        self.manifest_file = os.path.join(prerender_root(), MANIFEST)
+        try:
+            with open(self.manifest_file) as f:
+                self.manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.manifest = {}
+        self._changes = {}  # candidate id -> (version seen, first seen, last changed), monotonic
+
+    def _save(self):
+        os.makedirs(prerender_root(), exist_ok=True)
+        tmp = f'{self.manifest_file}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp, self.manifest_file)
+
+    def _settled(self, candidate_id, version, now):
+        seen = self._changes.get(candidate_id)
+        if seen is None:
+            seen = (version, now, now)
+        elif seen[0] != version:
+            seen = (version, seen[1], now)
+        self._changes[candidate_id] = seen
+        return now - seen[2] >= self.debounce or now - seen[1] >= self.max_delay
+
+    def run(self, force=False):
+        """Publish what changed and has settled; returns the ids of the candidates re-rendered."""
+        from .models import Candidate
+
+        active = {str(c.pk): c for c in Candidate.objects.filter(is_active=True).select_related('bot')}
+        changed = []
+        for candidate_id in [cid for cid in self.manifest if cid not in active]:
+            unpublish(self.manifest.pop(candidate_id)['paths'])
+            changed.append(candidate_id)
+        now = time.monotonic()
+        for candidate_id, candidate in active.items():
+            entry = self.manifest.get(candidate_id)
+            if entry and not force:
+                version = layout_version(candidate_id)
+                if entry['version'] == version:
+                    self._changes.pop(candidate_id, None)
+                    continue
+                if not self._settled(candidate_id, version, now):
+                    continue
+            version, paths = publish(candidate)
+            if entry:
+                unpublish(set(entry['paths']) - set(paths))
+            self.manifest[candidate_id] = {'version': version, 'paths': paths}
+            self._changes.pop(candidate_id, None)
+            changed.append(candidate_id)
+        if changed:
+            self._save()
+        return changed
+
+
+class PublishedPages:
+    """URL path -> (candidate id, layout version) of the published pages, from the manifest.
+
+    Re-read whenever the publisher replaces the manifest file.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._pages = {}
+
+    def get(self, path):
+        filename = os.path.join(prerender_root(), MANIFEST)
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            return None
+        stamp = (filename, stat.st_mtime_ns, stat.st_size)
+        if stamp != self._stamp:
+            with self._lock:
+                if stamp != self._stamp:
+                    try:
+                        with open(filename) as f:
+                            manifest = json.load(f)
+                    except (OSError, ValueError):
+                        return None
+                    self._pages = {
+                        page: (candidate_id, entry['version'])
+                        for candidate_id, entry in manifest.items() for page in entry['paths']
+                    }
+                    self._stamp = stamp
+        return self._pages.get(path)
+
+
+class PrerenderedPageMiddleware:
+    """Serve pre-rendered landing pages before sessions, auth or views run.
+
+    Only anonymous GET/HEAD requests qualify: no session, pending-messages
+    or voted cookie, the same visitors the page cache serves. A page is
+    only served while the candidate is active and its layout version is
+    still the one the page was published under. Everything else, and every
+    path without a current page, goes on to Django. Place it right after
+    WhiteNoise.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.pages = PublishedPages()
+
+    def __call__(self, request):
+        response = self._serve(request) if is_enabled() else None
+        return response if response is not None else self.get_response(request)
+
+    def _serve(self, request):
+        if request.method not in ('GET', 'HEAD') or not request.path_info.endswith('/'):
+            return None
+        cookies = request.COOKIES
+        if VOTED_COOKIE in cookies or settings.SESSION_COOKIE_NAME in cookies or 'messages' in cookies:
+            return None
+        published = self.pages.get(request.path_info)
+        if published is None:
+            return None
+        candidate_id, version = published
+        if layout_version(candidate_id) != version:
+            return None
+        try:
+            filename = page_file(request.path_info)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(filename):
+            return None
+        relative = os.path.relpath(filename, prerender_root()).replace(os.sep, '/')
+        response = serve(request, relative, document_root=prerender_root())
+        if response.status_code == 200:
+            response['Content-Type'] = 'text/html; charset=utf-8'
+            response['Cache-Control'] = 'no-cache'
+        response['X-Landing-Cache'] = 'static'
+        return response
@@ -0,0 +1,161 @@
+"""
+Sliding-window rate limits for public landing-page POSTs
+"""
+import ipaddress
+import logging
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+
+from .identity import normalize_phone
+from .name_index import name_index
+
+logger = logging.getLogger(__name__)
+
+BUCKET_KEY = 'ratelimit:{scope}:{value}:{bucket}'
+
+# Form fields that carry the visitor's phone, by action
+PHONE_FIELDS = ('user_phone', 'asker_phone', 'voter_phone')
+
+LIMITED_MESSAGE = 'عدد كبير من المحاولات. يرجى المحاولة مرة أخرى بعد قليل.'
+
+# Each scope uses two keys (current and previous fixed window). The estimate
+# for the sliding window is current + previous * weight. Returns the 1-based
+# index of the first scope over its limit, or 0 after counting the request in
+# every scope.
+CHECK_SCRIPT = """
+local n = #KEYS / 2
+for i = 1, n do
+    local current = tonumber(redis.call('GET', KEYS[2 * i - 1]) or '0')
+    local previous = tonumber(redis.call('GET', KEYS[2 * i]) or '0')
+    local limit = tonumber(ARGV[3 * i - 2])
+    local weight = tonumber(ARGV[3 * i - 1])
+    if current + previous * weight >= limit then
+        return i
+    end
+end
+for i = 1, n do
+    redis.call('INCR', KEYS[2 * i - 1])
+    redis.call('EXPIRE', KEYS[2 * i - 1], ARGV[3 * i])
+end
+return 0
+"""
+
+
+def _redis():
+    from django_redis import get_redis_connection
+
+    return get_redis_connection('default')
+
+
+def _limits():
+    return getattr(settings, 'LANDING_RATE_LIMITS', {})
+
+
+def client_ip(request):
+    """Address of the visitor behind TRUSTED_PROXY_COUNT reverse proxies.
+
+    Daphne runs without --proxy-headers, so REMOTE_ADDR is the platform's
+    proxy. Each trusted proxy appends the address it received the request
+    from to X-Forwarded-For, so the client is the entry that many places
+    from the right; entries further left are whatever the client sent and
+    are ignored. Falls back to REMOTE_ADDR when the header is missing,
+    shorter than expected or malformed.
+    """
+    remote_addr = request.META.get('REMOTE_ADDR', '')
+    proxies = getattr(settings, 'TRUSTED_PROXY_COUNT', 0)
+    forwarded = [value.strip() for value in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')]
+    if proxies <= 0 or len(forwarded) < proxies:
+        return remote_addr
+    try:
+        return str(ipaddress.ip_address(forwarded[-proxies]))
+    except ValueError:
+        return remote_addr
+
+
+def request_phone(request):
+    for field in PHONE_FIELDS:
+        phone = normalize_phone(request.POST.get(field))
+        if phone:
+            return phone
+    return None
+
+
+def request_candidate(kwargs):
+    if 'candidate_id' in kwargs:
+        return str(kwargs['candidate_id'])
+    if 'candidate_name' in kwargs:
+        return name_index.resolve(kwargs['candidate_name'])
+    return None
+
+
+def check(identities, now=None):
+    """Count one request against every ``(scope, value)`` in ``identities``.
+
+    Limits come from LANDING_RATE_LIMITS (scope -> (requests, seconds)).
+    Scopes without a limit or value are skipped. All scopes are checked
+    and counted in one Redis round trip. A rejected request is not
+    counted anywhere.
+
+    Returns None when the request is allowed, otherwise ``(scope,
+    retry_after)``. When Redis is unavailable every request is allowed.
+    """
+    limits = _limits()
+    now = time.time() if now is None else now
+    scopes, keys, args = [], [], []
+    for scope, value in identities:
+        if not value or scope not in limits:
+            continue
+        limit, window = limits[scope]
+        bucket, elapsed = divmod(now, window)
+        bucket = int(bucket)
+        keys += [
+            BUCKET_KEY.format(scope=scope, value=value, bucket=bucket),
+            BUCKET_KEY.format(scope=scope, value=value, bucket=bucket - 1),
+        ]
+        args += [limit, repr(1 - elapsed / window), 2 * window]
+        scopes.append((scope, window - elapsed))
+    if not scopes:
+        return None
+    try:
+        over = _redis().eval(CHECK_SCRIPT, len(keys), *keys, *args)
+    except Exception as ex:
+        logger.warning('rate limiter unavailable, allowing request: %s', ex)
+        return None
+    if not over:
+        return None
+    scope, retry_after = scopes[over - 1]
+    return scope, max(1, int(retry_after + 0.5))
+
+
+def throttle_landing_posts(view):
+    """Rate-limit POSTs to a landing view by client IP, phone and (optionally) candidate.
+
+    The candidate comes from the ``candidate_id`` or ``candidate_name`` URL
+    argument. The phone is whichever of PHONE_FIELDS the form posted. GETs
+    pass straight through. Rejected POSTs get 429 with Retry-After: JSON
+    ({'success': False, 'message': ...}) for the pages' AJAX calls, plain
+    text otherwise. The check runs before the view touches the database.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method == 'POST':
+            limited = check([
+                ('ip', client_ip(request)),
+                ('phone', request_phone(request)),
+                ('candidate', request_candidate(kwargs)),
+            ])
+            if limited:
+                scope, retry_after = limited
+                logger.warning('Landing POST rate-limited by %s (%s)', scope, request.path)
+                is_ajax = request.headers.get('x-requested-with') == 'XMLHttpRequest'
+                if is_ajax or 'application/json' in request.headers.get('accept', ''):
+                    response = JsonResponse({'success': False, 'message': LIMITED_MESSAGE}, status=429)
+                else:
+                    response = HttpResponse(LIMITED_MESSAGE, status=429, content_type='text/plain; charset=utf-8')
+                response['Retry-After'] = str(retry_after)
+                return response
+        return view(request, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,116 @@
+"""
+Process-wide registry of Bot rows
+"""
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+GENERATION_KEY = 'bot_registry:generation'
+
+
+class BotRegistry:
+    """Every Bot row kept in memory, indexed by id and token.
+
+    The Bot table is small and rarely changes, so it is loaded in one query
+    and served from memory. Saving or deleting a Bot (see hub.signals) clears
+    this process's copy and bumps a generation counter in the shared cache.
+    Other processes compare against that counter at most every
+    BOT_REGISTRY_CHECK_INTERVAL seconds. They also reload after
+    BOT_REGISTRY_MAX_AGE seconds in case the cache is unavailable.
+
+    Lookups return copies, so callers may modify them without affecting the
+    registry. A miss falls back to the database, because the bot may have been
+    created in another process since the last reload.
+    """
+
+    def __init__(self, check_interval=None, max_age=None):
+        self.check_interval = (
+            check_interval if check_interval is not None
+            else getattr(settings, 'BOT_REGISTRY_CHECK_INTERVAL', 5)
+        )
+        self.max_age = max_age or getattr(settings, 'BOT_REGISTRY_MAX_AGE', 300)
+        self._lock = threading.Lock()
+        self._index = None  # (by_id, by_token), swapped as a whole
+        self._generation = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+
+    def _current_generation(self):
+        return cache.get(GENERATION_KEY) or 0
+
+    def _load(self):
+        from .models import Bot
+
+        generation = self._current_generation()
+        bots = list(Bot.objects.order_by('pk'))
+        self._index = ({bot.pk: bot for bot in bots}, {bot.token: bot for bot in bots})
+        self._generation = generation
+        self._loaded_at = self._checked_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        index = self._index
+        now = time.monotonic()
+        if index is not None and now - self._checked_at < self.check_interval:
+            return index
+        with self._lock:
+            if self._index is None or now - self._loaded_at >= self.max_age:
+                self._load()
+            elif now - self._checked_at >= self.check_interval:
+                self._checked_at = now
+                if self._current_generation() != self._generation:
+                    self._load()
+            return self._index
+
+    def _remember(self, bot):
+        with self._lock:
+            if self._index is not None:
+                self._index[0][bot.pk] = bot
+                self._index[1][bot.token] = bot
+
+    def get(self, id=None, token=None):
+        """Bot by ``id`` or ``token``; raises Bot.DoesNotExist like objects.get()."""
+        from .models import Bot
+
+        by_id, by_token = self._ensure_fresh()
+        bot = by_id.get(int(id)) if id is not None else by_token.get(token)
+        if bot is None:
+            bot = Bot.objects.get(pk=id) if id is not None else Bot.objects.get(token=token)
+            self._remember(bot)
+        return copy.copy(bot)
+
+    def find(self, id=None, token=None):
+        """Like get() but returns None when there is no such bot."""
+        from .models import Bot
+
+        try:
+            return self.get(id=id, token=token)
+        except (Bot.DoesNotExist, ValueError, TypeError):
+            return None
+
+    def first(self):
+        """The bot with the lowest id (Bot.objects.first()), or None."""
+        by_id, _ = self._ensure_fresh()
+        if not by_id:
+            from .models import Bot
+
+            bot = Bot.objects.order_by('pk').first()
+            if bot is None:
+                return None
+            self._remember(bot)
+            return copy.copy(bot)
+        return copy.copy(by_id[min(by_id)])
+
+    def invalidate(self):
+        """Drop this process's copy and tell other processes to reload."""
+        with self._lock:
+            self._index = None
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.set(GENERATION_KEY, 1, None)
+
+
+bot_registry = BotRegistry()
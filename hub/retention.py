@@ -0,0 +1,146 @@
+"""
+Retention, monthly partitions and sampling for WebhookEvent
+"""
+import logging
+import time
+from datetime import date
+
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+TABLE = 'hub_webhookevent'
+PARTITION_PREFIX = f'{TABLE}_p'
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def next_month(month):
+    return date(month.year + (month.month // 12), month.month % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{PARTITION_PREFIX}{month:%Y_%m}"
+
+
+def is_partitioned():
+    """True when hub_webhookevent is a partitioned table (PostgreSQL after 0023)."""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE relname = %s", [TABLE])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def list_partitions():
+    """Return [(name, month_start)] for the monthly partitions, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = %s
+            """,
+            [TABLE],
+        )
+        names = [r[0] for r in cursor.fetchall()]
+    partitions = []
+    for name in names:
+        suffix = name[len(PARTITION_PREFIX):] if name.startswith(PARTITION_PREFIX) else ''
+        try:
+            year, month = suffix.split('_')
+            partitions.append((name, date(int(year), int(month), 1)))
+        except ValueError:
+            continue  # default partition
+    return sorted(partitions, key=lambda p: p[1])
+
+
+def ensure_partitions(today, months_ahead=2):
+    """Create monthly partitions from the current month up to ``months_ahead`` ahead."""
+    existing = {name for name, _ in list_partitions()}
+    created = []
+    month = month_start(today)
+    for _ in range(months_ahead + 1):
+        name = partition_name(month)
+        if name not in existing:
+            try:
+                with transaction.atomic():
+                    with connection.cursor() as cursor:
+                        cursor.execute(
+                            f"CREATE TABLE {name} PARTITION OF {TABLE} "
+                            f"FOR VALUES FROM (%s) TO (%s)",
+                            [month.isoformat(), next_month(month).isoformat()],
+                        )
+                created.append(name)
+            except Exception as ex:
+                # Usually rows for this month already sit in the default partition
+                logger.warning('Could not create partition %s: %s', name, ex)
+        month = next_month(month)
+    return created
+
+
+def drop_expired_partitions(cutoff):
+    """Detach and drop monthly partitions that end on or before ``cutoff``.
+
+    Dropping a whole partition is a metadata operation, so old months go away
+    without a long DELETE holding locks on the live table.
+    """
+    dropped = []
+    for name, month in list_partitions():
+        if next_month(month) > cutoff.date():
+            break
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+                cursor.execute(f"DROP TABLE {name}")
+        dropped.append(name)
+    return dropped
+
+
+def purge_rows(model, field, cutoff, chunk_size=None, pause=0.0):
+    """Delete rows of ``model`` with ``field`` older than ``cutoff`` in small chunks.
+
+    Each chunk is its own short transaction so the purge never holds long locks.
+    Returns the number of rows deleted.
+    """
+    chunk_size = chunk_size or getattr(settings, 'WEBHOOK_EVENT_PURGE_CHUNK', 5000)
+    deleted = 0
+    while True:
+        ids = list(
+            model.objects.filter(**{f'{field}__lt': cutoff})
+            .order_by(field)
+            .values_list('id', flat=True)[:chunk_size]
+        )
+        if not ids:
+            return deleted
+        count, _ = model.objects.filter(id__in=ids).delete()
+        deleted += count
+        if pause:
+            time.sleep(pause)
+
+
+def should_store_event(payload, sample_rate=None):
+    """Decide whether a webhook payload is kept in WebhookEvent.
+
+    With WEBHOOK_EVENT_SAMPLE_RATE = N > 1 only 1 in N routine updates (plain
+    chat messages) is stored. Commands, contacts, callbacks and membership
+    changes are always stored. Sampling is keyed on update_id so every
+    process makes the same decision without shared state.
+    """
+    sample_rate = sample_rate or getattr(settings, 'WEBHOOK_EVENT_SAMPLE_RATE', 1)
+    if sample_rate <= 1:
+        return True
+    message = payload.get('message') or payload.get('edited_message')
+    if not message:
+        return True
+    if message.get('contact') or (message.get('text') or '').startswith('/'):
+        return True
+    update_id = payload.get('update_id')
+    if update_id is None:
+        return True
+    return update_id % sample_rate == 0
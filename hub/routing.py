@@ -0,0 +1,10 @@
+"""
+WebSocket URL patterns
+"""
+from django.urls import path
+
+from .consumers import CandidateLiveConsumer
+
+websocket_urlpatterns = [
+    path('ws/candidate/<str:candidate_id>/', CandidateLiveConsumer.as_asgi()),
+]
@@ -0,0 +1,144 @@
+"""
+Signal handlers that keep caches and counters in sync with the database
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import images, tallies
+from .models import (
+    Bot, Candidate, CampaignBenefit, Event, Gallery, Poll, PollResponse, PollVote, Question,
+    Speech, Supporter, Testimonial,
+)
+from .name_index import name_index
+from .registry import bot_registry
+from .snapshot import content_changed
+
+
+@receiver(post_save, sender=Bot)
+@receiver(post_delete, sender=Bot)
+def invalidate_bot_registry(sender, instance, **kwargs):
+    # After commit, or another process could reload the old row under the new generation
+    transaction.on_commit(bot_registry.invalidate)
+    # Landing pages show the candidate's bot link
+    for candidate_id in Candidate.objects.filter(bot_id=instance.pk).values_list('id', flat=True):
+        content_changed(candidate_id, 'Bot')
+
+
+# ===== Image variants =====
+
+@receiver(pre_save, sender=Candidate)
+@receiver(pre_save, sender=Event)
+@receiver(pre_save, sender=Gallery)
+def remember_previous_images(sender, instance, update_fields=None, **kwargs):
+    # Saves that leave the image fields alone don't need the stored names
+    instance._previous_images = None
+    if update_fields is None or set(update_fields) & set(images.IMAGE_FIELDS[sender.__name__]):
+        instance._previous_images = images.stored_images(instance)
+
+
+# The variant job refreshes the candidate's snapshot once the files exist
+@receiver(post_save, sender=Candidate)
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=Gallery)
+def generate_image_variants(sender, instance, **kwargs):
+    images.schedule_variants(instance, getattr(instance, '_previous_images', None))
+
+
+# ===== Landing pages and snapshots =====
+
+@receiver(post_save, sender=Candidate)
+@receiver(post_delete, sender=Candidate)
+def refresh_candidate_profile(sender, instance, **kwargs):
+    # The index is the only source for /<name>/, so announce only committed names
+    transaction.on_commit(name_index.invalidate)
+    content_changed(instance.pk, 'Candidate')
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+@receiver(post_save, sender=Speech)
+@receiver(post_delete, sender=Speech)
+@receiver(post_save, sender=Poll)
+@receiver(post_delete, sender=Poll)
+@receiver(post_save, sender=Gallery)
+@receiver(post_delete, sender=Gallery)
+@receiver(post_save, sender=Testimonial)
+@receiver(post_delete, sender=Testimonial)
+@receiver(post_save, sender=CampaignBenefit)
+@receiver(post_delete, sender=CampaignBenefit)
+def refresh_candidate_content(sender, instance, **kwargs):
+    content_changed(instance.candidate_id, sender.__name__)
+
+
+@receiver(post_save, sender=Supporter)
+@receiver(post_delete, sender=Supporter)
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def refresh_candidate_counts(sender, instance, created=True, **kwargs):
+    # Only the counts are shown, so edits don't matter
+    if created:
+        content_changed(instance.candidate_id, sender.__name__)
+
+
+# ===== Poll tallies =====
+
+@receiver(pre_save, sender=PollResponse)
+def remember_previous_selection(sender, instance, **kwargs):
+    # Only changed responses need the stored value, to move their votes
+    instance._previous_selection = None
+    if instance.pk:
+        instance._previous_selection = (
+            sender.objects.filter(pk=instance.pk).values_list('poll_id', 'selected_options').first()
+        )
+
+
+@receiver(post_save, sender=PollResponse)
+def count_poll_response(sender, instance, created, **kwargs):
+    added = tallies.selected_indices(instance.selected_options)
+    previous = getattr(instance, '_previous_selection', None)
+    if created or previous is None:
+        tallies.apply_change(instance.poll_id, added=sorted(added), total_delta=1)
+        return
+    previous_poll_id, previous_selected = previous
+    removed = tallies.selected_indices(previous_selected)
+    if previous_poll_id != instance.poll_id:
+        tallies.apply_change(previous_poll_id, removed=sorted(removed), total_delta=-1)
+        tallies.apply_change(instance.poll_id, added=sorted(added), total_delta=1)
+    else:
+        tallies.apply_change(instance.poll_id, removed=sorted(removed - added), added=sorted(added - removed))
+
+
+@receiver(post_delete, sender=PollResponse)
+def uncount_poll_response(sender, instance, **kwargs):
+    tallies.apply_change(
+        instance.poll_id, removed=sorted(tallies.selected_indices(instance.selected_options)), total_delta=-1
+    )
+
+
+@receiver(pre_save, sender=PollVote)
+def remember_previous_vote(sender, instance, **kwargs):
+    instance._previous_vote = None
+    if instance.pk:
+        instance._previous_vote = (
+            sender.objects.filter(pk=instance.pk).values_list('poll_id', 'option_index').first()
+        )
+
+
+@receiver(post_save, sender=PollVote)
+def count_poll_vote(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_vote', None)
+    if created or previous is None:
+        tallies.apply_change(instance.poll_id, added=[instance.option_index], total_delta=1)
+        return
+    previous_poll_id, previous_index = previous
+    if previous_poll_id != instance.poll_id:
+        tallies.apply_change(previous_poll_id, removed=[previous_index], total_delta=-1)
+        tallies.apply_change(instance.poll_id, added=[instance.option_index], total_delta=1)
+    elif previous_index != instance.option_index:
+        tallies.apply_change(instance.poll_id, removed=[previous_index], added=[instance.option_index])
+
+
+@receiver(post_delete, sender=PollVote)
+def uncount_poll_vote(sender, instance, **kwargs):
+    tallies.apply_change(instance.poll_id, removed=[instance.option_index], total_delta=-1)
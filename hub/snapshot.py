@@ -0,0 +1,335 @@
+"""
+Denormalised per-candidate landing snapshot
+"""
+import threading
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import models, transaction
+from django.utils import timezone
+
+from . import live
+from .images import image_variants
+from .loaders import load_landing_candidate
+from .page_cache import (
+    bump_candidate_version, candidate_version, content_modified, forget_candidate_version, record_content_modified,
+)
+from .tallies import attach_tallies
+
+SNAPSHOT_KEY = 'landing:snapshot:{candidate_id}'
+LOCK_KEY = 'landing:snapshot:{candidate_id}:lock'
+
+_deferred = threading.local()
+
+# Which source rows feed which snapshot sections
+SECTIONS_BY_MODEL = {
+    'Candidate': ('profile',),
+    'Bot': ('profile',),
+    'Event': ('events',),
+    'Speech': ('speeches',),
+    'Poll': ('polls',),
+    'PollTallyShard': ('polls',),
+    'Gallery': ('gallery',),
+    'Testimonial': ('testimonials',),
+    'CampaignBenefit': ('benefits',),
+    'Supporter': ('counts',),
+    'Question': ('counts',),
+}
+
+# Rows whose changes only move the counts and tallies that pages update live
+# (hub.live); they leave the layout version, and so pre-rendered pages, alone
+LIVE_MODELS = ('PollTallyShard', 'Supporter', 'Question')
+
+
+def _file(value):
+    return {'url': value.url, 'name': value.name, **image_variants(value)} if value else None
+
+
+def row(obj, *extra):
+    """Template-friendly dict of a model instance's concrete fields.
+
+    File fields become {'url', 'name'} (or None) so ``item.file.url`` keeps
+    working, plus ``src``, ``srcset`` and ``webp_srcset`` for images with
+    variants (see hub.images). Foreign keys are stored as ``<name>_id``.
+    ``extra`` names properties or methods whose values are copied as well.
+    """
+    data = {}
+    for field in obj._meta.concrete_fields:
+        if isinstance(field, models.FileField):
+            data[field.name] = _file(getattr(obj, field.name))
+        elif field.is_relation:
+            data[field.attname] = getattr(obj, field.attname)
+        else:
+            data[field.name] = getattr(obj, field.name)
+    for name in extra:
+        value = getattr(obj, name)
+        data[name] = value() if callable(value) else value
+    return data
+
+
+# ===== Section builders: each returns the snapshot keys it owns =====
+# They read what hub.loaders.landing_plan() prefetched onto the candidate
+
+def build_profile(candidate):
+    bot = candidate.bot
+    profile = row(candidate)
+    # Served publicly by the snapshot API
+    profile.pop('created_by_id')
+    return {
+        'candidate': profile,
+        'candidate_bot': (
+            {'id': bot.id, 'name': bot.name, 'bot_link': bot.bot_link, 'is_active': bot.is_active} if bot else None
+        ),
+    }
+
+
+def build_events(candidate):
+    return {'events': [row(e, 'get_event_type_display') for e in candidate.landing_events]}
+
+
+def build_speeches(candidate):
+    return {'speeches': [row(s) for s in candidate.landing_speeches]}
+
+
+def _poll_row(poll):
+    data = row(poll)
+    data.update(
+        options_with_counts=poll.options_with_counts,
+        option_votes_list=poll.option_votes_list,
+        total_votes=poll.total_votes,
+    )
+    return data
+
+
+def build_polls(candidate):
+    return {
+        'polls': [_poll_row(p) for p in attach_tallies(candidate.landing_polls)],
+        'active_polls': [_poll_row(p) for p in attach_tallies(candidate.landing_active_polls)],
+    }
+
+
+def build_gallery(candidate):
+    extra = ('file_url', 'thumbnail_url', 'is_youtube', 'youtube_embed_id')
+    return {
+        'gallery_items': [row(g, *extra) for g in candidate.landing_gallery],
+        'recent_gallery_items': [row(g, *extra) for g in candidate.landing_recent_gallery],
+    }
+
+
+def build_testimonials(candidate):
+    return {
+        'testimonials': [row(t) for t in candidate.landing_testimonials],
+        'recent_testimonials': [row(t) for t in candidate.landing_recent_testimonials],
+    }
+
+
+def build_benefits(candidate):
+    return {'benefits': [row(b) for b in candidate.landing_benefits]}
+
+
+def build_counts(candidate):
+    return {
+        'supporters_count': candidate.supporters_total,
+        'questions_count': candidate.questions_total,
+    }
+
+
+# ===== Section stamps: the newest row timestamp each section was built from =====
+
+def _latest(rows, *fields):
+    fields = fields or ('updated_at',)
+    return max(
+        (value for obj in rows for value in (getattr(obj, field) for field in fields) if value is not None),
+        default=None,
+    )
+
+
+STAMPS = {
+    'profile': lambda candidate: candidate.updated_at,
+    'events': lambda candidate: _latest(candidate.landing_events),
+    'speeches': lambda candidate: _latest(candidate.landing_speeches),
+    'polls': lambda candidate: _latest(
+        candidate.landing_polls + candidate.landing_active_polls, 'updated_at', 'last_vote_at', 'last_response_at',
+    ),
+    'gallery': lambda candidate: _latest(candidate.landing_gallery + candidate.landing_recent_gallery),
+    'testimonials': lambda candidate: _latest(
+        candidate.landing_testimonials + candidate.landing_recent_testimonials,
+    ),
+    'benefits': lambda candidate: _latest(candidate.landing_benefits),
+    'counts': lambda candidate: _latest([candidate], 'supporters_modified', 'questions_modified'),
+}
+
+
+def modified_at(snapshot):
+    """Newest section stamp of ``snapshot``, or None."""
+    return max((stamp for stamp in snapshot.get('modified', {}).values() if stamp is not None), default=None)
+
+
+BUILDERS = {
+    'profile': build_profile,
+    'events': build_events,
+    'speeches': build_speeches,
+    'polls': build_polls,
+    'gallery': build_gallery,
+    'testimonials': build_testimonials,
+    'benefits': build_benefits,
+    'counts': build_counts,
+}
+
+
+def build_snapshot(candidate_id, sections=None, base=None):
+    """Build ``sections`` (default: all) onto a copy of ``base``; None if the candidate is gone.
+
+    Loads everything in one planned round of queries (see hub.loaders).
+    ``snapshot['modified']`` holds each section's newest row timestamp.
+    """
+    sections = list(sections or BUILDERS)
+    candidate = load_landing_candidate(candidate_id, sections)
+    if candidate is None:
+        return None
+    snapshot = dict(base or {})
+    modified = dict(snapshot.get('modified', {}))
+    for name in sections:
+        snapshot.update(BUILDERS[name](candidate))
+        modified[name] = STAMPS[name](candidate)
+    snapshot['modified'] = modified
+    return snapshot
+
+
+def get_snapshot(candidate):
+    """The landing snapshot of ``candidate``: one cache read, or a full build on a miss.
+
+    A snapshot is valid for the candidate version it was built under (see
+    hub.page_cache), so one that missed an update is rebuilt rather than
+    served. A full build records the version's Last-Modified time unless
+    refresh_sections() already has.
+    """
+    version = candidate_version(candidate.pk)
+    key = SNAPSHOT_KEY.format(candidate_id=candidate.pk)
+    snapshot = cache.get(key)
+    if snapshot is None or snapshot.get('version') != version:
+        snapshot = build_snapshot(candidate.pk)
+        if snapshot is None:
+            raise type(candidate).DoesNotExist
+        snapshot['version'] = version
+        if version:
+            cache.set(key, snapshot, None)
+            record_content_modified(candidate.pk, version, modified_at(snapshot), replace=False)
+    return snapshot
+
+
+def cached_snapshot(candidate_id):
+    """The candidate's snapshot if the cache holds a current one, else None; never queries."""
+    snapshot = cache.get(SNAPSHOT_KEY.format(candidate_id=candidate_id))
+    if snapshot is None or not snapshot.get('version') or snapshot['version'] != candidate_version(candidate_id):
+        return None
+    return snapshot
+
+
+def refresh_sections(candidate_id, sections, layout=True):
+    """Bump the candidate version and rebuild only ``sections`` of a cached snapshot.
+
+    ``layout`` is False for live-only changes (see LIVE_MODELS), which keep
+    the layout version.
+
+    Updates are serialised with a short cache lock. When the lock is taken
+    by another process the snapshot is dropped instead, and the next read
+    rebuilds it in full. Only a snapshot of the version just replaced is
+    patched; an older one may be missing other changes, so it is dropped.
+    The patched snapshot is stamped with the version taken here, so a
+    change that lands while it is being built still forces a full rebuild.
+    Changed counts and tallies are then pushed to open pages (hub.live),
+    from the patched snapshot or, when there is none, built afresh.
+
+    The new version's Last-Modified is the newest row timestamp of the
+    patched snapshot. A change that leaves no newer timestamp behind
+    (a deletion, a bot edit, a row the pages don't show), or one applied
+    without patching, counts as made now.
+
+    A deleted or deactivated candidate loses its version and snapshot
+    instead, so its pages stop being cached or revalidated.
+    """
+    from .models import Candidate
+
+    key = SNAPSHOT_KEY.format(candidate_id=candidate_id)
+    previous = candidate_version(candidate_id)
+    if previous is None or (
+        'profile' in sections and not Candidate.objects.filter(pk=candidate_id, is_active=True).exists()
+    ):
+        forget_candidate_version(candidate_id)
+        cache.delete(key)
+        return
+    version = bump_candidate_version(candidate_id, layout=layout)
+    before = content_modified(candidate_id, previous)
+    lock = LOCK_KEY.format(candidate_id=candidate_id)
+    if not cache.add(lock, 1, 10):
+        cache.delete(key)
+        record_content_modified(candidate_id, version, timezone.now())
+        _broadcast_fresh(candidate_id, sections)
+        return
+    patched = None
+    try:
+        snapshot = cache.get(key)
+        if snapshot is not None and snapshot.get('version') == previous:
+            patched = build_snapshot(candidate_id, sections, base=snapshot)
+        if patched is None:
+            cache.delete(key)
+            record_content_modified(candidate_id, version, timezone.now())
+        else:
+            patched['version'] = version
+            cache.set(key, patched, None)
+            modified = modified_at(patched)
+            if modified is None or (before is not None and modified <= before):
+                modified = timezone.now()
+            record_content_modified(candidate_id, version, modified)
+    finally:
+        cache.delete(lock)
+    if patched is not None:
+        live.broadcast(candidate_id, patched, sections)
+    else:
+        _broadcast_fresh(candidate_id, sections)
+
+
+def _broadcast_fresh(candidate_id, sections):
+    """Push changed live sections built straight from the database, when no snapshot was patched."""
+    sections = [name for name in live.LIVE_SECTIONS if name in sections]
+    if not sections:
+        return
+    snapshot = build_snapshot(candidate_id, sections)
+    if snapshot is not None:
+        live.broadcast(candidate_id, snapshot, sections)
+
+
+def content_changed(candidate_id, model_name):
+    """Called from hub.signals when a row feeding the landing pages changes.
+
+    Runs after the surrounding transaction commits, so pages and snapshots
+    are never rebuilt from data that may still roll back.
+    """
+    if not candidate_id:
+        return
+    sections = SECTIONS_BY_MODEL[model_name]
+    layout = model_name not in LIVE_MODELS
+    pending = getattr(_deferred, 'pending', None)
+    if pending is not None:
+        entry = pending.setdefault(candidate_id, [set(), False])
+        entry[0].update(sections)
+        entry[1] = entry[1] or layout
+        return
+    transaction.on_commit(lambda: refresh_sections(candidate_id, sections, layout=layout))
+
+
+@contextmanager
+def coalesce_refreshes():
+    """Collect content_changed() calls and refresh each candidate once on exit.
+
+    For batch writers: wrap the whole transaction, so the refresh runs after
+    it has committed (or rolled back, which only costs a rebuild).
+    """
+    pending = _deferred.pending = {}
+    try:
+        yield
+    finally:
+        _deferred.pending = None
+        for candidate_id, (sections, layout) in pending.items():
+            refresh_sections(candidate_id, sorted(sections), layout=layout)
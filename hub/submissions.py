@@ -0,0 +1,137 @@
+"""
+Recording validated landing-page submissions (support, questions, votes)
+"""
+from django.db import IntegrityError, transaction
+
+from .identity import landing_bot, national_id_fingerprint, upsert_landing_user
+from .votes import AlreadyVoted, InvalidOption, cast_vote
+
+# Outcomes; the views turn them into their own messages
+CREATED = 'created'
+DUPLICATE = 'duplicate'
+DUPLICATE_PHONE = 'duplicate_phone'
+DUPLICATE_NATIONAL_ID = 'duplicate_national_id'
+ALREADY_VOTED = 'already_voted'
+INVALID_POLL = 'invalid_poll'
+INVALID_OPTION = 'invalid_option'
+NO_BOT = 'no_bot'
+
+
+def support(candidate_id, name, phone, national_id, email='', city='', district=None, support_level=1,
+            source='landing page'):
+    """Register a supporter unless the phone or national ID already supports the candidate."""
+    from .models import Supporter
+
+    if Supporter.objects.filter(candidate_id=candidate_id, bot_user__phone_number=phone).exists():
+        return DUPLICATE_PHONE
+    fingerprint = national_id_fingerprint(national_id)
+    if Supporter.objects.filter(candidate_id=candidate_id, national_id_fingerprint=fingerprint).exists():
+        return DUPLICATE_NATIONAL_ID
+    bot = landing_bot()
+    if bot is None:
+        return NO_BOT
+    bot_user = upsert_landing_user(bot, phone, name)
+    try:
+        # A concurrent signup with the same phone or ID loses here
+        with transaction.atomic():
+            Supporter.objects.create(
+                candidate_id=candidate_id,
+                bot_user=bot_user,
+                city=city,
+                district=district or None,
+                support_level=support_level,
+                # The candidate dashboard shows and exports the ID from here; dedup uses only the fingerprint
+                notes=f"Supporter from {source} - Email: {email}, National ID: {national_id}",
+                national_id_fingerprint=fingerprint,
+            )
+    except IntegrityError:
+        return DUPLICATE
+    return CREATED
+
+
+def question(candidate_id, name, phone, text, national_id=''):
+    """Store a private question to the candidate from the landing page."""
+    from .models import DailyQuestion
+
+    bot = landing_bot()
+    if bot is None:
+        return NO_BOT
+    bot_user = upsert_landing_user(bot, phone, name)
+    meta_suffix = f"\n— الهاتف: {phone}{' — الرقم القومي: ' + national_id if national_id else ''}"
+    DailyQuestion.objects.create(
+        candidate_id=candidate_id,
+        bot_user=bot_user,
+        question=f"{text}{meta_suffix}",
+        is_public=False,
+    )
+    return CREATED
+
+
+def vote(candidate_id, poll_id, option_index, name, phone):
+    """Vote on one of the candidate's polls as the person owning ``phone``."""
+    from .models import Poll
+
+    try:
+        poll = Poll.objects.filter(id=poll_id, candidate_id=candidate_id).first()
+    except (ValueError, TypeError):
+        poll = None
+    if poll is None:
+        return INVALID_POLL
+    bot = landing_bot()
+    if bot is None:
+        return NO_BOT
+    bot_user = upsert_landing_user(bot, phone, name)
+    try:
+        cast_vote(poll, [option_index], bot_user=bot_user)
+    except AlreadyVoted:
+        return ALREADY_VOTED
+    except InvalidOption:
+        return INVALID_OPTION
+    return CREATED
+
+
+def public_question(candidate_id, name, phone, text, national_id=''):
+    """Store a question from the mobile landing page, which counts towards the page's questions."""
+    from .models import Question
+
+    Question.objects.create(
+        candidate_id=candidate_id,
+        asker_name=name,
+        asker_phone=phone,
+        asker_national_id=national_id or None,
+        question_text=text,
+    )
+    return CREATED
+
+
+def public_vote(candidate_id, poll_id, option_index, user_ip):
+    """Anonymous vote from the mobile landing page, one per IP address."""
+    from .models import Poll
+
+    try:
+        poll = Poll.objects.filter(id=poll_id, candidate_id=candidate_id).first()
+    except (ValueError, TypeError):
+        poll = None
+    if poll is None:
+        return INVALID_POLL
+    try:
+        cast_vote(poll, [option_index], user_ip=user_ip)
+    except AlreadyVoted:
+        return ALREADY_VOTED
+    except InvalidOption:
+        return INVALID_OPTION
+    return CREATED
+
+
+HANDLERS = {
+    'support': support,
+    'ask': question,
+    'vote': vote,
+    'public_ask': public_question,
+    'public_vote': public_vote,
+}
+
+
+def record(kind, data):
+    """Record a submission of ``kind`` (a HANDLERS key); returns its outcome."""
+    return HANDLERS[kind](**data)
@@ -0,0 +1,133 @@
+"""
+Poll vote tallies maintained incrementally from PollResponse and PollVote
+"""
+import random
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+
+def selected_indices(selected_options):
+    """Distinct option indices from a PollResponse.selected_options value."""
+    indices = set()
+    for value in selected_options or []:
+        try:
+            index = int(value)
+        except (TypeError, ValueError):
+            continue
+        if index >= 0:
+            indices.add(index)
+    return indices
+
+
+def _shards():
+    return getattr(settings, 'POLL_TALLY_SHARDS', 8)
+
+
+def _increment(poll_id, option):
+    from .models import PollTallyShard
+
+    shard = random.randrange(_shards())
+    rows = PollTallyShard.objects.filter(poll_id=poll_id, option=option, shard=shard)
+    if rows.update(count=F('count') + 1):
+        return
+    try:
+        with transaction.atomic():
+            PollTallyShard.objects.create(poll_id=poll_id, option=option, shard=shard, count=1)
+    except IntegrityError:
+        # A concurrent vote created the shard first
+        rows.update(count=F('count') + 1)
+
+
+def _decrement(poll_id, option):
+    from .models import PollTallyShard
+
+    # Never creates a row: during a cascading Poll delete the shards may already be gone
+    rows = PollTallyShard.objects.filter(poll_id=poll_id, option=option, count__gt=0)
+    if rows.filter(shard=random.randrange(_shards())).update(count=F('count') - 1):
+        return
+    for pk in rows.values_list('pk', flat=True):
+        if rows.filter(pk=pk).update(count=F('count') - 1):
+            return
+
+
+def apply_change(poll_id, removed=(), added=(), total_delta=0):
+    """Adjust the tally of ``poll_id``: one counter UPDATE per option touched.
+
+    ``removed`` / ``added`` are option indices to decrement / increment.
+    Each change lands on a random shard, so concurrent votes on one poll
+    do not queue behind a single row lock.
+    """
+    from .models import Poll, PollTallyShard
+    from .snapshot import content_changed
+
+    if not removed and not added and not total_delta:
+        return
+    with transaction.atomic():
+        for index in removed:
+            _decrement(poll_id, index)
+        for index in added:
+            _increment(poll_id, index)
+        if total_delta > 0:
+            _increment(poll_id, PollTallyShard.TOTAL_OPTION)
+        elif total_delta < 0:
+            _decrement(poll_id, PollTallyShard.TOTAL_OPTION)
+    candidate_id = Poll.objects.filter(pk=poll_id).values_list('candidate_id', flat=True).first()
+    content_changed(candidate_id, 'PollTallyShard')
+
+
+def rebuild(poll):
+    """Recount ``poll`` from its votes (after bulk changes that skip signals)."""
+    from .models import PollResponse, PollTallyShard, PollVote
+
+    counts = [0] * len(poll.options or [])
+    total = 0
+    selections = PollResponse.objects.filter(poll=poll).values_list('selected_options', flat=True).iterator()
+    public_votes = PollVote.objects.filter(poll=poll).values_list('option_index', flat=True).iterator()
+    for indices in [*(selected_indices(s) for s in selections), *({i} for i in public_votes)]:
+        total += 1
+        for index in indices:
+            if index >= len(counts):
+                counts.extend([0] * (index + 1 - len(counts)))
+            counts[index] += 1
+    with transaction.atomic():
+        PollTallyShard.objects.filter(poll=poll).delete()
+        PollTallyShard.objects.bulk_create(
+            [PollTallyShard(poll=poll, option=i, shard=0, count=n) for i, n in enumerate(counts) if n]
+            + [PollTallyShard(poll=poll, option=PollTallyShard.TOTAL_OPTION, shard=0, count=total)]
+        )
+
+
+def read_tally(shards):
+    """(counts, total) from a poll's tally shards."""
+    from .models import PollTallyShard
+
+    counts, total = [], 0
+    for shard in shards:
+        if shard.option == PollTallyShard.TOTAL_OPTION:
+            total += shard.count
+            continue
+        if shard.option >= len(counts):
+            counts.extend([0] * (shard.option + 1 - len(counts)))
+        counts[shard.option] += shard.count
+    return counts, max(total, 0)
+
+
+def attach_tallies(polls):
+    """Set options_with_counts, option_votes_list and total_votes on each poll.
+
+    Reads poll.tally_shards, so prefetch_related('tally_shards') on the
+    queryset makes this free of extra queries.
+    """
+    for poll in polls:
+        counts, total = read_tally(poll.tally_shards.all())
+        options = poll.options or []
+        option_votes_list = [counts[i] if i < len(counts) else 0 for i in range(len(options))]
+        poll.option_votes_list = option_votes_list
+        poll.options_with_counts = [
+            {'index': i, 'text': option, 'count': option_votes_list[i]}
+            for i, option in enumerate(options)
+        ]
+        poll.total_votes = total
+    return polls
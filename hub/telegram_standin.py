@@ -0,0 +1,86 @@
+"""
+Local stand-in for the Telegram Bot API, used by replays and benchmarks
+"""
+import itertools
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test.utils import override_settings
+
+
+class TelegramStandIn:
+    """Minimal in-process Bot API server.
+
+    Every method answers ``ok`` with a fresh message id (getUpdates returns no
+    updates), optionally after ``latency`` seconds. Used as a context manager
+    it points TELEGRAM_API_BASE at itself, so hub.outbound and the webhook
+    talk to it instead of api.telegram.org.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0):
+        self.latency = latency
+        self.calls = Counter()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+        self._override = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self):
+                method = self.path.split('?')[0].rsplit('/', 1)[-1]
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+                with standin._lock:
+                    standin.calls[method] += 1
+                    message_id = next(standin._ids)
+                if standin.latency:
+                    time.sleep(standin.latency)
+                result = [] if method == 'getUpdates' else {'message_id': message_id}
+                body = json.dumps({'ok': True, 'result': result}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _reply
+            do_POST = _reply
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='telegram-standin', daemon=True)
+        self._thread.start()
+        self._override = override_settings(TELEGRAM_API_BASE=self.base_url)
+        self._override.enable()
+        return self
+
+    def stop(self):
+        if self._override is not None:
+            self._override.disable()
+            self._override = None
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
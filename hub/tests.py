@@ -1,3 +1,924 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from unittest import mock, skipUnless
 
-# Create your tests here.
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.db import IntegrityError, transaction
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from django.utils.http import http_date
+
+from PIL import Image
+
+from . import images, ingest_queue, prerender, submissions
+from .admission import AdmissionController, admission_control
+from .conversation import QUESTION_FLOW, STATE_AWAIT_BUTTON, STATE_ENABLED, ConversationStore
+from .dedup import UpdateDeduplicator
+from .identity import national_id_fingerprint, normalize_phone, synthetic_telegram_id, upsert_landing_user
+from .importer import import_backlog
+from .ingest_queue import FAILED_KEY, PENDING_KEY, PROCESSING_KEY
+from .models import (
+    Bot, BotUser, CampaignBenefit, Candidate, CandidateUser, DailyQuestion, Event, Gallery, MessageLog, Poll,
+    PollResponse, PollTallyShard, PollVote, ProcessedUpdate, Question, Speech, Supporter, Testimonial,
+)
+from .name_index import CandidateNameIndex, name_index
+from .page_cache import VERSION_KEY, VOTED_COOKIE, candidate_version
+from .ratelimit import check, client_ip, throttle_landing_posts
+from .registry import GENERATION_KEY as REGISTRY_GENERATION_KEY, BotRegistry, bot_registry
+from .snapshot import LOCK_KEY, build_snapshot, get_snapshot, refresh_sections
+from .tallies import attach_tallies, rebuild
+from .votes import AlreadyVoted, InvalidOption, cast_vote
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    LANDING_PRERENDER_ENABLED=False,
+)
+class CandidateQueryCountTests(TestCase):
+    """Landing and dashboard pages load in a fixed number of queries, however much content there is."""
+
+    def setUp(self):
+        cache.clear()
+        name_index.invalidate()
+        self.bot = Bot.objects.create(name='Bot', token='query-count-bot', is_active=True)
+        self.candidate = Candidate.objects.create(
+            name='Query Count', public_url_name='query-count', position='Mayor', bot=self.bot,
+        )
+        self.rows = 0
+
+    def add_content(self, n):
+        candidate = self.candidate
+        for _ in range(n):
+            i = self.rows = self.rows + 1
+            Event.objects.create(
+                candidate=candidate, title=f'e{i}', description='d', location='l', start_datetime=timezone.now(),
+            )
+            Speech.objects.create(candidate=candidate, title=f's{i}', ideas='i', full_speech='f', summary='s')
+            Poll.objects.create(candidate=candidate, title=f'p{i}', question='q', options=['a', 'b'])
+            Gallery.objects.create(
+                candidate=candidate, title=f'g{i}', media_type='external', external_url='https://example.com/',
+            )
+            Testimonial.objects.create(candidate=candidate, name=f't{i}', quote='q')
+            CampaignBenefit.objects.create(candidate=candidate, title=f'b{i}')
+            bot_user = BotUser.objects.create(bot=self.bot, telegram_id=i, first_name=f'u{i}')
+            Supporter.objects.create(candidate=candidate, bot_user=bot_user)
+            DailyQuestion.objects.create(candidate=candidate, bot_user=bot_user, question='q')
+            Question.objects.create(candidate=candidate, asker_name='a', asker_phone='0100', question_text='q')
+
+    def assertStableQueries(self, num, func):
+        """``func`` runs ``num`` queries with little content and with more of it."""
+        for n in (1, 7):
+            self.add_content(n)
+            cache.clear()
+            with self.assertNumQueries(num):
+                func()
+
+    def test_snapshot_build(self):
+        self.assertStableQueries(12, lambda: build_snapshot(self.candidate.pk))
+
+    def test_snapshot_counts(self):
+        self.add_content(3)
+        snapshot = build_snapshot(self.candidate.pk)
+        self.assertEqual(snapshot['supporters_count'], 3)
+        self.assertEqual(snapshot['questions_count'], 3)
+        self.assertEqual(len(snapshot['events']), 3)
+        self.assertEqual(snapshot['candidate_bot']['id'], self.bot.id)
+
+    def test_landing_pages(self):
+        for url in (f'/hub/candidate/{self.candidate.pk}/', f'/hub/candidate/{self.candidate.pk}/mobile/'):
+            with self.subTest(url=url):
+                # Issuing the page version, the candidate, then its snapshot
+                self.assertStableQueries(14, lambda: self.assertEqual(self.client.get(url).status_code, 200))
+                # Served from the page cache
+                with self.assertNumQueries(0):
+                    self.client.get(url)
+
+    def test_landing_by_name(self):
+        def get():
+            name_index.invalidate()
+            self.assertEqual(self.client.get('/query-count/').status_code, 200)
+
+        # Name index load, issuing the page version, the candidate, then its snapshot
+        self.assertStableQueries(15, get)
+
+    def test_dashboard(self):
+        user = get_user_model().objects.create_user('query-count', password='x')
+        CandidateUser.objects.create(user=user, candidate=self.candidate)
+        self.client.force_login(user)
+        url = f'/hub/candidate/{self.candidate.pk}/dashboard/'
+        # Session, user, the candidate with its lists, the user's candidate profile
+        self.assertStableQueries(12, lambda: self.assertEqual(self.client.get(url).status_code, 200))
+
+
+class UpdateDedupTests(TestCase):
+    """Each update_id is claimed once per bot, however many processes see it."""
+
+    def setUp(self):
+        self.bot = Bot.objects.create(name='Bot', token='dedup-bot', is_active=True)
+
+    def test_claim_many_returns_only_inserted_ids(self):
+        ProcessedUpdate.objects.create(bot=self.bot, update_id=2)
+        self.assertEqual(UpdateDeduplicator().claim_many(self.bot.id, [1, 2, 3, None]), {1, 3})
+        self.assertEqual(
+            set(ProcessedUpdate.objects.filter(bot=self.bot).values_list('update_id', flat=True)), {1, 2, 3},
+        )
+
+    def test_second_process_claims_nothing(self):
+        # Separate instances share nothing in memory, like two pollers
+        self.assertEqual(UpdateDeduplicator().claim_many(self.bot.id, [10, 11]), {10, 11})
+        other = UpdateDeduplicator()
+        self.assertEqual(other.claim_many(self.bot.id, [10, 11, 12]), {12})
+        self.assertFalse(other.claim(self.bot.id, 10))
+        self.assertFalse(UpdateDeduplicator().claim(self.bot.id, 12))
+
+    def test_ids_are_per_bot(self):
+        other_bot = Bot.objects.create(name='Other', token='dedup-bot-2', is_active=True)
+        dedup = UpdateDeduplicator()
+        self.assertEqual(dedup.claim_many(self.bot.id, [5]), {5})
+        self.assertEqual(dedup.claim_many(other_bot.id, [5]), {5})
+        self.assertEqual(dedup.claim_many(self.bot.id, [5]), set())
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ConversationFlowTests(TestCase):
+    """Question gating: one question per button press, state kept in the cache and written back in batches."""
+
+    def setUp(self):
+        cache.clear()
+        self.bot = Bot.objects.create(name='Bot', token='conversation-bot', is_active=True)
+        self.user = BotUser.objects.create(bot=self.bot, telegram_id=1, first_name='u')
+
+    def test_question_flow(self):
+        self.assertEqual(
+            QUESTION_FLOW.step(None, 'message'), (STATE_AWAIT_BUTTON, ('delete_message', 'send_gate_prompt')),
+        )
+        self.assertEqual(QUESTION_FLOW.step(STATE_AWAIT_BUTTON, 'enable_questions')[0], STATE_ENABLED)
+        self.assertEqual(
+            QUESTION_FLOW.step(STATE_ENABLED, 'message'), (STATE_AWAIT_BUTTON, ('log_message', 'send_relock')),
+        )
+        self.assertEqual(QUESTION_FLOW.step(STATE_ENABLED, 'start')[0], STATE_AWAIT_BUTTON)
+        self.assertEqual(QUESTION_FLOW.step(STATE_ENABLED, 'unknown'), (STATE_ENABLED, ()))
+
+    def test_dispatch_touches_only_the_cache(self):
+        store = ConversationStore(QUESTION_FLOW)
+        with self.assertNumQueries(0):
+            self.assertEqual(store.dispatch(self.user, 'enable_questions'), ('mark_started', 'send_enabled'))
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.state)
+        # Another process sees the state through the cache
+        self.assertEqual(ConversationStore(QUESTION_FLOW).get(self.user), STATE_ENABLED)
+
+    def test_state_falls_back_to_the_row(self):
+        self.user.state = STATE_ENABLED
+        self.assertEqual(ConversationStore(QUESTION_FLOW).dispatch(self.user, 'message'), ('log_message', 'send_relock'))
+
+    def test_flush_writes_one_update_per_state(self):
+        store = ConversationStore(QUESTION_FLOW)
+        users = [self.user] + [BotUser.objects.create(bot=self.bot, telegram_id=i, first_name='u') for i in (2, 3)]
+        for user in users:
+            store.dispatch(user, 'enable_questions')
+        store.dispatch(users[0], 'message')
+        with self.assertNumQueries(2):
+            self.assertEqual(store.flush(), 3)
+        states = dict(BotUser.objects.filter(bot=self.bot).values_list('telegram_id', 'state'))
+        self.assertEqual(states, {1: STATE_AWAIT_BUTTON, 2: STATE_ENABLED, 3: STATE_ENABLED})
+        self.assertEqual(store.flush(), 0)
+
+
+class ImportBacklogTests(TestCase):
+    """import_updates: users are upserted and every confirmed message lands in the message history."""
+
+    def setUp(self):
+        self.bot = Bot.objects.create(name='Bot', token='import-bot', is_active=True)
+        BotUser.objects.create(bot=self.bot, telegram_id=1, first_name='old')
+
+    @staticmethod
+    def update(update_id, chat_id, text):
+        return {'update_id': update_id, 'message': {
+            'message_id': update_id, 'chat': {'id': chat_id}, 'from': {'id': chat_id, 'first_name': f'u{chat_id}'},
+            'text': text,
+        }}
+
+    def test_import_backlog(self):
+        pages = [[self.update(1, 1, 'hi'), self.update(2, 2, '/start')], [self.update(3, 2, 'سؤال')]]
+        with mock.patch('hub.importer.fetch_pages', return_value=iter(pages)):
+            stats = import_backlog(self.bot)
+        self.assertEqual(stats['created'], 1)
+        self.assertEqual(stats['updated'], 2)
+        self.assertEqual(stats['upserted'], 3)
+        self.assertEqual(stats['started_marked'], 1)
+        self.assertEqual(stats['messages_logged'], 3)
+        logs = MessageLog.objects.filter(bot=self.bot).order_by('message_id')
+        self.assertEqual([(log.chat_id, log.text) for log in logs], [(1, 'hi'), (2, '/start'), (2, 'سؤال')])
+        self.assertTrue(all(log.bot_user_id for log in logs))
+        self.assertEqual(BotUser.objects.get(bot=self.bot, telegram_id=1).first_name, 'u1')
+
+    def test_max_pages_must_be_a_positive_integer(self):
+        for value in ('2', 0, -1, 1.5, True):
+            with self.subTest(max_pages=value):
+                response = self.client.post(
+                    '/hub/import_updates/', {'bot_token': 'import-bot', 'max_pages': value},
+                    content_type='application/json',
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'error': 'max_pages must be a positive integer'})
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class WebhookAdmissionTests(SimpleTestCase):
+    """Concurrent webhook calls beyond the limits wait briefly, then get 429; /start gets headroom."""
+
+    CHATTER = {'update_id': 1, 'message': {'text': 'hello', 'chat': {'id': 1}}}
+    START = {'update_id': 2, 'message': {'text': '/start', 'chat': {'id': 2}}}
+
+    def fire(self, controller, payloads):
+        """Send ``payloads`` at once; the view blocks its thread like a sync view under Daphne."""
+        def slow_view(request, bot_id):
+            time.sleep(0.2)
+            return JsonResponse({'ok': True})
+
+        view = admission_control(slow_view)
+        factory = RequestFactory()
+
+        async def fire():
+            return await asyncio.gather(*(
+                view(factory.post('/', data=json.dumps(payload), content_type='application/json'), 1)
+                for payload in payloads
+            ))
+
+        with mock.patch('hub.admission.webhook_admission', controller):
+            return sorted(response.status_code for response in asyncio.run(fire()))
+
+    def test_overload_is_shed(self):
+        controller = AdmissionController(max_in_flight=1, per_bot=1, headroom=0, max_queue=1, queue_timeout=0.05)
+        # One runs, one waits and times out, one finds the queue full
+        self.assertEqual(self.fire(controller, [self.CHATTER] * 3), [200, 429, 429])
+        self.assertEqual(controller.shed, 2)
+        self.assertEqual(controller.snapshot()['in_flight'], 0)
+
+    def test_waiting_requests_are_admitted(self):
+        controller = AdmissionController(max_in_flight=1, per_bot=1, headroom=0, max_queue=4, queue_timeout=2)
+        self.assertEqual(self.fire(controller, [self.CHATTER] * 2), [200, 200])
+
+    def test_priority_updates_use_headroom(self):
+        controller = AdmissionController(max_in_flight=1, per_bot=1, headroom=1, max_queue=0, queue_timeout=0.05)
+        self.assertEqual(self.fire(controller, [self.CHATTER, self.START]), [200, 200])
+        self.assertEqual(self.fire(controller, [self.CHATTER, self.CHATTER]), [200, 429])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}, POLL_TALLY_SHARDS=4)
+class PollTallyTests(TestCase):
+    """Every vote path keeps the sharded tally equal to a recount of the votes."""
+
+    def setUp(self):
+        bot_registry.invalidate()
+        self.bot = Bot.objects.create(name='Bot', token='tally-bot', is_active=True)
+        candidate = Candidate.objects.create(name='Tally', position='Mayor', bot=self.bot)
+        self.poll = Poll.objects.create(candidate=candidate, title='p', question='q', options=['a', 'b', 'c'])
+        self.users = [BotUser.objects.create(bot=self.bot, telegram_id=i, first_name='u') for i in range(3)]
+
+    def tally(self):
+        poll = Poll.objects.prefetch_related('tally_shards').get(pk=self.poll.pk)
+        attach_tallies([poll])
+        return poll.option_votes_list, poll.total_votes
+
+    def test_votes_count_once(self):
+        cast_vote(self.poll, [0], user_ip='10.0.0.1')
+        cast_vote(self.poll, [1], user_ip='10.0.0.2')
+        cast_vote(self.poll, [1], bot_user=self.users[0])
+        self.assertEqual(self.tally(), ([1, 2, 0], 3))
+        with self.assertRaises(AlreadyVoted):
+            cast_vote(self.poll, [2], user_ip='10.0.0.1')
+        with self.assertRaises(InvalidOption):
+            cast_vote(self.poll, [5], user_ip='10.0.0.3')
+        self.assertEqual(self.tally(), ([1, 2, 0], 3))
+
+    def test_changed_and_deleted_votes(self):
+        self.poll.allows_multiple_answers = True
+        self.poll.save()
+        cast_vote(self.poll, [0, 1], bot_user=self.users[0])
+        cast_vote(self.poll, [1, 2], bot_user=self.users[0], replace=True)
+        self.assertEqual(self.tally(), ([0, 1, 1], 1))
+        vote, _ = cast_vote(self.poll, [0], user_ip='10.0.0.1')
+        vote.option_index = 2
+        vote.save()
+        self.assertEqual(self.tally(), ([0, 1, 2], 2))
+        vote.delete()
+        PollResponse.objects.filter(poll=self.poll).delete()
+        self.assertEqual(self.tally(), ([0, 0, 0], 0))
+
+    def test_votes_spread_over_shards(self):
+        for i in range(40):
+            cast_vote(self.poll, [i % 2], user_ip=f'10.0.1.{i}')
+        self.assertEqual(self.tally(), ([20, 20, 0], 40))
+        self.assertGreater(PollTallyShard.objects.filter(poll=self.poll, option=0).count(), 1)
+        self.assertLessEqual(PollTallyShard.objects.filter(poll=self.poll, option=0).count(), 4)
+        # Decrements find a non-empty shard whichever one they try first
+        PollVote.objects.filter(poll=self.poll, option_index=0).delete()
+        self.assertEqual(self.tally(), ([0, 20, 0], 20))
+        self.assertFalse(PollTallyShard.objects.filter(count__lt=0).exists())
+
+    def test_rebuild_matches_the_votes(self):
+        cast_vote(self.poll, [2], user_ip='10.0.0.1')
+        cast_vote(self.poll, [2], bot_user=self.users[1])
+        PollTallyShard.objects.filter(poll=self.poll).update(count=99)
+        rebuild(self.poll)
+        self.assertEqual(self.tally(), ([0, 0, 2], 2))
+
+    def test_landing_and_mobile_votes_use_cast_vote(self):
+        candidate_id = self.poll.candidate_id
+        vote = dict(candidate_id=candidate_id, poll_id=self.poll.id, option_index=1, name='N', phone='01012345678')
+        self.assertEqual(submissions.vote(**vote), submissions.CREATED)
+        # The same person under another spelling of the number
+        self.assertEqual(submissions.vote(**dict(vote, phone='+20 101 234 5678')), submissions.ALREADY_VOTED)
+        self.assertEqual(submissions.vote(**dict(vote, phone='01099999999', option_index=7)),
+                         submissions.INVALID_OPTION)
+        url = f'/hub/candidate/{candidate_id}/mobile/'
+        data = {'action': 'poll', 'poll_id': self.poll.id, 'selected_option': 2}
+        self.assertTrue(self.client.post(url, data, REMOTE_ADDR='10.0.0.9').json()['success'])
+        self.assertFalse(self.client.post(url, data, REMOTE_ADDR='10.0.0.9').json()['success'])
+        self.assertEqual(self.tally(), ([0, 1, 1], 2))
+
+    def test_deleting_the_poll(self):
+        cast_vote(self.poll, [0], user_ip='10.0.0.1')
+        self.poll.delete()
+        self.assertFalse(PollTallyShard.objects.exists())
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    LANDING_PRERENDER_ENABLED=False,
+)
+class CandidateVersionTests(TestCase):
+    """Page versions exist only for active candidates."""
+
+    def setUp(self):
+        cache.clear()
+        self.candidate = Candidate.objects.create(name='Versioned', position='Mayor')
+        self.url = f'/hub/candidate/{self.candidate.pk}/'
+
+    def test_unknown_candidates_get_no_version(self):
+        missing = str(uuid.uuid4())
+        self.assertIsNone(candidate_version(missing))
+        self.assertIsNone(cache.get(VERSION_KEY.format(candidate_id=missing)))
+        response = self.client.get(f'/hub/candidate/{missing}/')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertFalse(response.has_header('Last-Modified'))
+
+    def test_version_keys_expire(self):
+        with mock.patch.object(cache, 'add', wraps=cache.add) as add:
+            self.assertTrue(candidate_version(self.candidate.pk))
+        self.assertEqual(add.call_args.args[2], settings.LANDING_VERSION_TIMEOUT)
+
+    def test_deactivated_candidates_lose_their_version(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.candidate.is_active = False
+            self.candidate.save()
+        self.assertIsNone(cache.get(VERSION_KEY.format(candidate_id=self.candidate.pk)))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class BotRegistryTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.bot = Bot.objects.create(name='Bot', token='registry-bot', is_active=True)
+        self.registry = BotRegistry(check_interval=0)
+
+    def test_changes_are_announced_after_commit(self):
+        self.assertTrue(self.registry.get(token='registry-bot').is_active)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bot.is_active = False
+            self.bot.save()
+            # Until the commit, other processes keep (and may reload) the committed row
+            self.assertIsNone(cache.get(REGISTRY_GENERATION_KEY))
+        self.assertFalse(self.registry.get(token='registry-bot').is_active)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CandidateNameIndexTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.candidate = Candidate.objects.create(name='أحمد علي', public_url_name='ahmed-ali', position='Mayor')
+        self.index = CandidateNameIndex(check_interval=0)
+
+    def test_spelling_variants(self):
+        expected = str(self.candidate.pk)
+        for name in ('ahmed-ali', 'Ahmed_Ali', 'احمد علي', 'أحمد+علي', 'أَحْمَد علي'):
+            with self.subTest(name=name):
+                self.assertEqual(self.index.resolve(name), expected)
+
+    def test_unknown_names_cost_no_queries(self):
+        self.index.resolve('ahmed-ali')
+        with self.assertNumQueries(0):
+            for name in ('wp-login.php', '.env', 'x' * 1000, 'ahmed-ali-2'):
+                self.assertIsNone(self.index.resolve(name))
+
+    def test_candidates_created_elsewhere_are_found(self):
+        self.assertIsNone(self.index.resolve('new-candidate'))
+        # Committing a candidate bumps the generation that every process checks
+        with self.captureOnCommitCallbacks(execute=True):
+            Candidate.objects.create(name='New', public_url_name='new-candidate', position='Mayor')
+            self.assertIsNone(self.index.resolve('new-candidate'))
+        self.assertIsNotNone(self.index.resolve('new-candidate'))
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    NATIONAL_ID_FINGERPRINT_KEY='test-key',
+)
+class SupporterDedupTests(TestCase):
+    """One supporter per national ID and candidate, enforced by the database."""
+
+    def setUp(self):
+        bot_registry.invalidate()
+        Bot.objects.create(name='Bot', token='dedup-bot', is_active=True)
+        self.candidate = Candidate.objects.create(name='Dedup', position='Mayor')
+        self.signup = dict(candidate_id=self.candidate.pk, name='Mona Said', national_id='29001011234567')
+
+    def test_fingerprint(self):
+        fingerprint = national_id_fingerprint(' 29001011234567 ')
+        self.assertEqual(fingerprint, national_id_fingerprint('29001011234567'))
+        self.assertEqual(len(fingerprint), 64)
+        self.assertNotIn('29001011234567', fingerprint)
+        self.assertIsNone(national_id_fingerprint(''))
+        with override_settings(NATIONAL_ID_FINGERPRINT_KEY='other-key'):
+            self.assertNotEqual(national_id_fingerprint('29001011234567'), fingerprint)
+
+    def test_same_national_id_is_a_duplicate(self):
+        self.assertEqual(submissions.support(phone='01011111111', **self.signup), submissions.CREATED)
+        self.assertEqual(submissions.support(phone='01022222222', **self.signup),
+                         submissions.DUPLICATE_NATIONAL_ID)
+        self.assertEqual(submissions.support(phone='01011111111', **dict(self.signup, national_id='29001019999999')),
+                         submissions.DUPLICATE_PHONE)
+        # Another candidate takes the same person
+        other = Candidate.objects.create(name='Other', position='Mayor')
+        self.assertEqual(submissions.support(phone='01022222222', **dict(self.signup, candidate_id=other.pk)),
+                         submissions.CREATED)
+        self.assertEqual(Supporter.objects.count(), 2)
+
+    def test_database_rejects_a_concurrent_duplicate(self):
+        fingerprint = national_id_fingerprint('29001011234567')
+        users = [BotUser.objects.create(bot=Bot.objects.get(), telegram_id=i, first_name='u') for i in (1, 2)]
+        Supporter.objects.create(candidate=self.candidate, bot_user=users[0], national_id_fingerprint=fingerprint)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Supporter.objects.create(candidate=self.candidate, bot_user=users[1], national_id_fingerprint=fingerprint)
+        # Supporters without an ID don't collide
+        Supporter.objects.filter(bot_user=users[0]).update(national_id_fingerprint=None)
+        Supporter.objects.create(candidate=self.candidate, bot_user=users[1])
+
+
+class LandingUserTests(TestCase):
+    """People known only by phone map to one BotUser per bot, however they type the number."""
+
+    def setUp(self):
+        self.bot = Bot.objects.create(name='Bot', token='landing-user-bot', is_active=True)
+
+    def test_normalize_phone(self):
+        for value in ('01012345678', '+20 101 234 5678', '00201012345678', '201012345678',
+                      '٠١٠١٢٣٤٥٦٧٨', '010-1234-5678'):
+            with self.subTest(value=value):
+                self.assertEqual(normalize_phone(value), '01012345678')
+        self.assertEqual(normalize_phone('+44 20 7946 0958'), '442079460958')
+
+    def test_synthetic_telegram_id(self):
+        telegram_id = synthetic_telegram_id('+20 101 234 5678')
+        self.assertLess(telegram_id, 0)
+        self.assertEqual(telegram_id, synthetic_telegram_id('01012345678'))
+        self.assertNotEqual(telegram_id, synthetic_telegram_id('01012345679'))
+
+    def test_upsert_converges_on_one_row(self):
+        first = upsert_landing_user(self.bot, '01012345678', 'Mona Said Ali')
+        self.assertEqual((first.first_name, first.last_name), ('Mona', 'Said Ali'))
+        self.assertEqual(first.telegram_id, synthetic_telegram_id('01012345678'))
+        with self.assertNumQueries(1):
+            self.assertEqual(upsert_landing_user(self.bot, '+20 101 234 5678', 'M').pk, first.pk)
+        # A concurrent submit that missed the lookup hits the ON CONFLICT path
+        first.phone_number = ''
+        first.save()
+        self.assertEqual(upsert_landing_user(self.bot, '01012345678', 'Mona').pk, first.pk)
+        self.assertEqual(BotUser.objects.get().phone_number, '01012345678')
+        other_bot = Bot.objects.create(name='Other', token='landing-user-bot-2')
+        self.assertNotEqual(upsert_landing_user(other_bot, '01012345678', 'Mona').pk, first.pk)
+
+
+@skipUnless(fakeredis, 'fakeredis is not installed')
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class IngestQueueTests(TestCase):
+    """Queued submissions are acknowledged once, written by drain() and never lost."""
+
+    def setUp(self):
+        bot_registry.invalidate()
+        self.redis = fakeredis.FakeRedis()
+        patcher = mock.patch('hub.ingest_queue._redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        Bot.objects.create(name='Bot', token='queue-bot', is_active=True)
+        self.candidate = Candidate.objects.create(name='Queue', position='Mayor')
+        self.signup = dict(candidate_id=str(self.candidate.pk), name='Mona', phone='01011111111',
+                           national_id='29001011234567')
+
+    def test_submit_dedups_before_the_database(self):
+        self.assertEqual(ingest_queue.submit('support', self.signup), ingest_queue.QUEUED)
+        self.assertEqual(ingest_queue.submit('support', dict(self.signup, national_id='29001019999999')),
+                         submissions.DUPLICATE_PHONE)
+        self.assertEqual(ingest_queue.submit('support', dict(self.signup, phone='01022222222')),
+                         submissions.DUPLICATE_NATIONAL_ID)
+        self.assertEqual(self.redis.llen(PENDING_KEY), 1)
+        self.assertFalse(Supporter.objects.exists())
+
+    def test_drain_records_in_order_and_isolates_failures(self):
+        ingest_queue.submit('support', self.signup)
+        ingest_queue.submit('ask', dict(self.signup, text='q?'))
+        ingest_queue.submit('ask', {'candidate_id': str(self.candidate.pk)})  # missing fields
+        with self.captureOnCommitCallbacks(execute=True), self.assertLogs('hub.ingest_queue', 'ERROR'):
+            outcomes = ingest_queue.drain()
+        self.assertEqual(outcomes, {submissions.CREATED: 2, 'failed': 1})
+        self.assertEqual(Supporter.objects.get().bot_user.phone_number, '01011111111')
+        self.assertEqual(DailyQuestion.objects.count(), 1)
+        self.assertEqual(self.redis.llen(FAILED_KEY), 1)
+        self.assertEqual(self.redis.llen(PROCESSING_KEY.format(worker='default')), 0)
+        self.assertEqual(ingest_queue.drain(), {})
+
+    def test_database_errors_keep_the_batch(self):
+        ingest_queue.submit('support', self.signup)
+        with mock.patch('hub.ingest_queue.coalesce_refreshes', side_effect=RuntimeError('db down')):
+            with self.assertRaises(RuntimeError):
+                ingest_queue.drain()
+        self.assertEqual(self.redis.llen(PENDING_KEY), 1)
+        # A crash between taking and recording leaves entries in flight until recover()
+        self.redis.rpoplpush(PENDING_KEY, PROCESSING_KEY.format(worker='default'))
+        self.assertEqual(ingest_queue.recover(), 1)
+        self.assertEqual(ingest_queue.drain(), {submissions.CREATED: 1})
+
+    def test_redis_outage_falls_back_to_sync(self):
+        with mock.patch('hub.ingest_queue._redis', side_effect=ConnectionError), self.assertLogs('hub.ingest_queue'):
+            self.assertIsNone(ingest_queue.submit('support', self.signup))
+
+    @override_settings(LANDING_INGEST_MODE='queue', LANDING_PRERENDER_ENABLED=False)
+    def test_mobile_page_submissions_are_queued(self):
+        poll = Poll.objects.create(candidate=self.candidate, title='p', question='q', options=['a', 'b'])
+        url = f'/hub/candidate/{self.candidate.pk}/mobile/'
+
+        def post(**data):
+            return json.loads(self.client.post(url, data, REMOTE_ADDR='41.0.0.1').content)
+
+        self.assertTrue(post(action='support', user_name='Mona', user_phone='01011111111',
+                             user_national_id='29001011234567')['success'])
+        self.assertTrue(post(action='ask', asker_name='Mona', asker_phone='01011111111', question_text='q?')['success'])
+        self.assertTrue(post(action='poll', poll_id=str(poll.pk), selected_option='1')['success'])
+        self.assertFalse(post(action='poll', poll_id=str(poll.pk), selected_option='0')['success'])
+        self.assertEqual(self.redis.llen(PENDING_KEY), 3)
+        self.assertFalse(Question.objects.exists() or PollVote.objects.exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(ingest_queue.drain(), {submissions.CREATED: 3})
+        self.assertEqual(Question.objects.get().asker_phone, '01011111111')
+        self.assertEqual(PollVote.objects.get().user_ip, '41.0.0.1')
+        self.assertEqual(Supporter.objects.count(), 1)
+
+
+class ClientIpTests(SimpleTestCase):
+
+    def ip(self, forwarded=None, **kwargs):
+        extra = {'HTTP_X_FORWARDED_FOR': forwarded} if forwarded is not None else {}
+        return client_ip(RequestFactory().get('/', REMOTE_ADDR='10.0.0.1', **extra, **kwargs))
+
+    def test_trusted_proxies(self):
+        with override_settings(TRUSTED_PROXY_COUNT=1):
+            self.assertEqual(self.ip('41.33.1.2'), '41.33.1.2')
+            # Whatever the client put in front of the proxy's entry is ignored
+            self.assertEqual(self.ip('1.2.3.4, 41.33.1.2'), '41.33.1.2')
+            self.assertEqual(self.ip(), '10.0.0.1')
+            self.assertEqual(self.ip('not-an-address'), '10.0.0.1')
+        with override_settings(TRUSTED_PROXY_COUNT=2):
+            self.assertEqual(self.ip('1.2.3.4, 41.33.1.2, 172.16.0.9'), '41.33.1.2')
+            self.assertEqual(self.ip('41.33.1.2'), '10.0.0.1')
+        with override_settings(TRUSTED_PROXY_COUNT=0):
+            self.assertEqual(self.ip('41.33.1.2'), '10.0.0.1')
+
+
+@skipUnless(fakeredis, 'fakeredis is not installed')
+@override_settings(LANDING_RATE_LIMITS={'ip': (3, 60), 'phone': (2, 600)}, TRUSTED_PROXY_COUNT=1)
+class LandingRateLimitTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch('hub.ratelimit._redis', return_value=fakeredis.FakeRedis())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.view = throttle_landing_posts(lambda request, candidate_id: JsonResponse({'success': True}))
+
+    def post(self, ip, phone):
+        request = RequestFactory().post(
+            '/', {'user_phone': phone}, REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=ip,
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        return self.view(request, candidate_id=str(uuid.uuid4()))
+
+    @mock.patch('hub.ratelimit.time.time', return_value=6000.0)
+    def test_scopes(self, _):
+        self.assertEqual([self.post('41.0.0.1', f'0101111111{i}').status_code for i in range(4)],
+                         [200, 200, 200, 429])
+        # Other visitors behind the same proxy are not affected
+        self.assertEqual(self.post('41.0.0.2', '01011111110').status_code, 200)
+        with self.assertLogs('hub.ratelimit'):
+            response = self.post('41.0.0.3', '+20 101 111 1110')
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(json.loads(response.content)['success'])
+        # The phone window (10 minutes) starts now
+        self.assertEqual(response['Retry-After'], '600')
+
+    def test_window_slides(self):
+        identities = [('ip', '41.0.0.1')]
+        for _ in range(3):
+            self.assertIsNone(check(identities, now=30))
+        self.assertEqual(check(identities, now=59), ('ip', 1))
+        # The previous window counts by how much of it still overlaps the last minute
+        self.assertIsNone(check(identities, now=70))
+        self.assertEqual(check(identities, now=71)[0], 'ip')
+        self.assertIsNone(check(identities, now=130))
+        self.assertIsNone(check([('ip', '41.0.0.1'), ('candidate', 'x'), ('phone', None)], now=200))
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    LANDING_PRERENDER_ENABLED=False,
+)
+class ConditionalLandingTests(TestCase):
+    """Landing pages carry an ETag from the content version and Last-Modified from the rows' timestamps."""
+
+    def setUp(self):
+        cache.clear()
+        self.bot = Bot.objects.create(name='Bot', token='conditional-bot', is_active=True)
+        self.candidate = Candidate.objects.create(name='Conditional', position='Mayor', bot=self.bot)
+        self.edited = timezone.now() - timezone.timedelta(days=30)
+        Candidate.objects.filter(pk=self.candidate.pk).update(updated_at=self.edited)
+        self.url = f'/hub/candidate/{self.candidate.pk}/'
+
+    def test_validators(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['Last-Modified'], http_date(self.edited.timestamp()))
+        self.assertIn('no-cache', response['Cache-Control'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+            self.assertEqual(
+                self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304,
+            )
+        self.client.force_login(get_user_model().objects.create_user('conditional', password='x'))
+        response = self.client.get(self.url)
+        self.assertFalse(response.has_header('ETag') or response.has_header('Last-Modified'))
+
+    def test_changes(self):
+        first = self.client.get(self.url)
+        bot_user = BotUser.objects.create(bot=self.bot, telegram_id=1, first_name='u')
+        with self.captureOnCommitCallbacks(execute=True):
+            supporter = Supporter.objects.create(candidate=self.candidate, bot_user=bot_user)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertEqual(response['Last-Modified'], http_date(supporter.updated_at.timestamp()))
+        # A deletion leaves no newer timestamp behind, so it counts as made when it was applied
+        with self.captureOnCommitCallbacks(execute=True):
+            Speech.objects.create(candidate=self.candidate, title='s', ideas='i', full_speech='f', summary='s')
+        self.client.get(self.url)
+        deleted_at = timezone.now() + timezone.timedelta(hours=1)
+        # On-commit refreshes run when the inner block exits
+        with mock.patch('hub.snapshot.timezone.now', return_value=deleted_at):
+            with self.captureOnCommitCallbacks(execute=True):
+                Speech.objects.all().delete()
+        self.assertEqual(self.client.get(self.url)['Last-Modified'], http_date(deleted_at.timestamp()))
+
+
+class ImageVariantTests(TestCase):
+    """Variants follow the image fields: generated after commit, deleted when the image goes."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        overrides = override_settings(
+            MEDIA_ROOT=media_root, IMAGE_VARIANT_WIDTHS=(320, 640), IMAGE_VARIANT_BACKGROUND=False,
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.candidate = Candidate.objects.create(name='Images', position='Mayor')
+
+    def upload(self, name, width=800):
+        buffer = io.BytesIO()
+        Image.new('RGB', (width, width // 2), 'red').save(buffer, 'PNG' if name.endswith('.png') else 'JPEG')
+        return SimpleUploadedFile(name, buffer.getvalue())
+
+    def variants(self, field_file):
+        storage = field_file.storage
+        return sorted(
+            f'{w}.{ext}' for w in (320, 640) for ext in ('webp', 'jpg')
+            if storage.exists(images.variant_name(field_file.name, w, ext))
+        )
+
+    def test_variant_names_keep_the_source_extension(self):
+        self.assertEqual(images.variant_name('gallery/photo.jpg', 640, 'webp'), 'gallery/photo.jpg.w640.webp')
+        self.assertNotEqual(images.variant_name('photo.jpg', 320, 'jpg'), images.variant_name('photo.png', 320, 'jpg'))
+
+    def test_variants_follow_the_image(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            item = Gallery.objects.create(
+                candidate=self.candidate, title='g', media_type='image', file=self.upload('photo.jpg'),
+            )
+        # Nothing is generated inside the request's transaction
+        self.assertEqual(self.variants(item.file), [])
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.variants(item.file), ['320.jpg', '320.webp', '640.jpg', '640.webp'])
+
+        old = item.file.name
+        with self.captureOnCommitCallbacks(execute=True):
+            item.file = self.upload('photo.png', width=400)
+            item.save()
+        self.assertEqual(self.variants(item.file), ['320.jpg', '320.webp'])
+        self.assertFalse(any(item.file.storage.exists(images.variant_name(old, 320, ext)) for ext in ('jpg', 'webp')))
+
+        with mock.patch('hub.images._submit') as submit, self.captureOnCommitCallbacks(execute=True):
+            item.title = 'renamed'
+            item.save(update_fields=['title'])
+            item.save()
+        submit.assert_not_called()
+
+        current, storage = item.file.name, item.file.storage
+        with self.captureOnCommitCallbacks(execute=True):
+            item.file = None
+            item.save()
+        self.assertFalse(storage.exists(images.variant_name(current, 320, 'jpg')))
+        self.assertTrue(storage.exists(current))
+
+
+class PrerenderedPageTests(TestCase):
+    """Static pages are served only while they match the candidate's layout; live changes keep them."""
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        overrides = override_settings(
+            LANDING_PRERENDER_ENABLED=True, LANDING_PRERENDER_ROOT=root,
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        cache.clear()
+        self.bot = Bot.objects.create(name='Bot', token='prerender-bot', is_active=True)
+        self.candidate = Candidate.objects.create(name='Static', position='Mayor', bot=self.bot)
+        self.url = f'/hub/candidate/{self.candidate.pk}/'
+        self.publisher = prerender.Publisher(debounce=5, max_delay=60)
+        self.assertEqual(self.publisher.run(), [str(self.candidate.pk)])
+
+    def served_from(self):
+        response = self.client.get(self.url)
+        return response.status_code, response.get('X-Landing-Cache')
+
+    def test_live_changes_keep_the_page(self):
+        self.assertEqual(self.served_from(), (200, 'static'))
+        bot_user = BotUser.objects.create(bot=self.bot, telegram_id=1, first_name='u')
+        with self.captureOnCommitCallbacks(execute=True):
+            Supporter.objects.create(candidate=self.candidate, bot_user=bot_user)
+        self.assertEqual(self.served_from(), (200, 'static'))
+        self.assertEqual(self.publisher.run(), [])
+
+    def test_edits_are_debounced(self):
+        with mock.patch('hub.prerender.time.monotonic', return_value=1000):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.candidate.position = 'Governor'
+                self.candidate.save()
+            # Visitors get the current page from Django until the re-render
+            self.assertEqual(self.served_from(), (200, 'miss'))
+            self.assertEqual(self.publisher.run(), [])
+        with mock.patch('hub.prerender.time.monotonic', return_value=1006):
+            self.assertEqual(self.publisher.run(), [str(self.candidate.pk)])
+        self.assertEqual(self.served_from(), (200, 'static'))
+
+    def test_deactivated_candidates_are_not_served(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.candidate.is_active = False
+            self.candidate.save()
+        self.assertEqual(self.served_from(), (404, None))
+        self.publisher.run()
+        self.assertFalse(os.path.exists(prerender.page_file(self.url)))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class LiveBroadcastTests(TestCase):
+    """Every refresh pushes the new counts, whether or not a cached snapshot could be patched."""
+
+    def setUp(self):
+        cache.clear()
+        self.bot = Bot.objects.create(name='Bot', token='live-bot', is_active=True)
+        self.candidate = Candidate.objects.create(name='Live', position='Mayor', bot=self.bot)
+        self.candidate_id = self.candidate.pk
+        patcher = mock.patch('hub.snapshot.live.broadcast')
+        self.broadcast = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def add_supporter(self):
+        bot_user = BotUser.objects.create(bot=self.bot, telegram_id=BotUser.objects.count() + 1, first_name='u')
+        Supporter.objects.create(candidate=self.candidate, bot_user=bot_user)
+        self.broadcast.reset_mock()
+        refresh_sections(self.candidate_id, ['counts'], layout=False)
+        self.broadcast.assert_called_once()
+        candidate_id, snapshot, sections = self.broadcast.call_args.args
+        self.assertEqual((candidate_id, list(sections)), (self.candidate_id, ['counts']))
+        return snapshot['supporters_count']
+
+    def test_patched_snapshot(self):
+        get_snapshot(self.candidate)
+        self.assertEqual(self.add_supporter(), 1)
+
+    def test_without_a_cached_snapshot(self):
+        self.assertEqual(self.add_supporter(), 1)
+
+    def test_while_another_refresh_holds_the_lock(self):
+        get_snapshot(self.candidate)
+        cache.add(LOCK_KEY.format(candidate_id=self.candidate_id), 1, 10)
+        self.assertEqual(self.add_supporter(), 1)
+        self.assertEqual(self.add_supporter(), 2)
+
+    def test_sections_without_live_data(self):
+        refresh_sections(self.candidate_id, ['speeches'])
+        self.broadcast.assert_not_called()
+
+    @override_settings(LANDING_PRERENDER_ENABLED=False)
+    def test_pages_carry_the_live_hooks(self):
+        poll = Poll.objects.create(candidate=self.candidate, title='p', question='q', options=['a', 'b'])
+        cast_vote(poll, [1], user_ip='41.0.0.1')
+        self.client.cookies[VOTED_COOKIE] = '1'
+        for url in (f'/hub/candidate/{self.candidate_id}/', f'/hub/candidate/{self.candidate_id}/mobile/'):
+            with self.subTest(url=url):
+                content = self.client.get(url, REMOTE_ADDR='41.0.0.1').content.decode()
+                self.assertEqual(content.count(f'/ws/candidate/{self.candidate_id}/'), 1)
+                self.assertIn(f'data-poll-id="{poll.pk}" data-option-index="1"', content)
+                self.assertIn(f'data-poll-total="{poll.pk}">1<', content)
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    LANDING_PRERENDER_ENABLED=False,
+)
+class LoadTestPayloadTests(TestCase):
+    """The load test posts each page the form it actually serves, and only JSON answers count."""
+
+    def setUp(self):
+        from random import Random
+
+        from .management.commands.loadtest_landing import Command
+
+        bot_registry.invalidate()
+        name_index.invalidate()
+        bot = Bot.objects.create(name='Bot', token='loadtest-bot', is_active=True)
+        self.candidate = Candidate.objects.create(name='Load', position='Mayor', bot=bot, public_url_name='load')
+        Poll.objects.create(candidate=self.candidate, question='Q?', options=['A', 'B'], is_active=True)
+        self.command = Command()
+        self.target = self.command.load_targets([])[0]
+        self.rng = Random(1)
+
+    def test_classify(self):
+        from .management.commands.loadtest_landing import classify
+
+        self.assertEqual(classify(200, b'<html>', 'text/html'), ('ok', None))
+        self.assertEqual(classify(200, b'<html>', 'text/html', 'POST'), ('error', None))
+        self.assertEqual(classify(200, b'{"success": false}', 'application/json', 'POST'),
+                         ('rejected', {'success': False}))
+        self.assertEqual(classify(200, b'{"success": true}', 'application/json', 'POST'),
+                         ('ok', {'success': True}))
+        self.assertEqual(classify(429, b'', 'text/html', 'POST'), ('throttled', None))
+
+    def post(self, path, action, mobile):
+        data = self.command.payload(action, self.target, self.rng, '', mobile)
+        response = self.client.post(path, data, REMOTE_ADDR=f'10.0.0.{self.rng.randrange(1, 250)}')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return json.loads(response.content)
+
+    def test_every_page_accepts_its_own_form(self):
+        self.assertEqual(self.target['by_name'], '/load/')
+        for path, mobile in ((self.target['mobile'], True), (self.target['page'], False),
+                             (self.target['by_name'], False)):
+            for action in ('support', 'ask', 'vote'):
+                with self.subTest(path=path, action=action):
+                    self.assertTrue(self.post(path, action, mobile)['success'])
+        self.assertEqual(Supporter.objects.filter(candidate=self.candidate).count(), 3)
@@ -31,6 +31,8 @@ from .views import (
     public_landing,
     candidate_landing,
     candidate_landing_mobile,
+    candidate_snapshot,
+    candidate_live,
     candidate_login,
     candidate_login_simple,
     candidate_dashboard,
@@ -92,6 +94,8 @@ urlpatterns = [
     # Candidate landing pages (must come after the non-parameterized routes above)
     path('candidate/<str:candidate_id>/', candidate_landing, name='candidate_landing'),
     path('candidate/<str:candidate_id>/mobile/', candidate_landing_mobile, name='candidate_landing_mobile'),
+    path('candidate/<str:candidate_id>/snapshot/', candidate_snapshot, name='candidate_snapshot'),
+    path('candidate/<str:candidate_id>/live/', candidate_live, name='candidate_live'),
     path('candidate/<str:candidate_id>/support/', candidate_support, name='candidate_support'),
     path('candidate/<str:candidate_id>/ask/', candidate_ask, name='candidate_ask'),
     path('candidate/<str:candidate_id>/login/', candidate_login, name='candidate_login'),
@@ -1,9 +1,12 @@
 import json
 import requests
 import logging
+from asgiref.sync import async_to_sync
 from django.http import JsonResponse, HttpRequest, HttpResponse
 from django.shortcuts import render, redirect
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.cache import never_cache
+from django.middleware.csrf import get_token
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import authenticate, login, logout
 from django.views.decorators.http import require_http_methods
@@ -14,6 +17,20 @@ from .models import (
     Volunteer, VolunteerActivity, FakeNewsAlert, DailyQuestion, CampaignAnalytics, Question, PollVote, Testimonial,
     ContactMessage,
 )
+from . import ingest_queue, live, submissions
+from .admission import admission_control
+from .batching import message_log_buffer
+from .dedup import update_dedup
+from .identity import normalize_phone
+from .importer import TelegramError, import_backlog
+from .loaders import load_dashboard_candidate
+from .name_index import name_index
+from .outbound import api_url
+from .page_cache import VOTED_COOKIE, cache_landing, canonical_candidate_id, conditional_candidate_get
+from .ratelimit import client_ip, throttle_landing_posts
+from .registry import bot_registry
+from .retention import should_store_event
+from .snapshot import get_snapshot
 from django.utils import timezone
 from django.views.decorators.http import require_POST
 from django.core.files.storage import default_storage
@@ -21,6 +38,8 @@ from django.core.files.base import ContentFile
 from django.conf import settings
 from django.http import StreamingHttpResponse
 from django.http import FileResponse
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 import mimetypes
 
 # Set up logging
@@ -83,7 +102,7 @@ def broadcast_landing(request: HttpRequest) -> HttpResponse:
 def broadcast_landing_bot(request: HttpRequest, bot_id: int) -> HttpResponse:
     """Per-bot landing page; access controlled by simple mapping rules."""
     try:
-        bot = Bot.objects.get(id=bot_id)
+        bot = bot_registry.get(id=bot_id)
     except Bot.DoesNotExist:
         return HttpResponse(status=404)
 
@@ -115,7 +134,7 @@ def broadcast_landing_bot(request: HttpRequest, bot_id: int) -> HttpResponse:
 def broadcast_landing_bot_token(request: HttpRequest, bot_token: str) -> HttpResponse:
     """Per-bot landing page by token; same access rules as ID-based view."""
     try:
-        bot = Bot.objects.get(token=bot_token)
+        bot = bot_registry.get(token=bot_token)
     except Bot.DoesNotExist:
         return HttpResponse(status=404)
 
@@ -140,7 +159,7 @@ def broadcast_landing_bot_token(request: HttpRequest, bot_token: str) -> HttpRes
 @login_required()
 def bot_logs_html_token(request: HttpRequest, bot_token: str) -> HttpResponse:
     try:
-        bot = Bot.objects.get(token=bot_token)
+        bot = bot_registry.get(token=bot_token)
     except Bot.DoesNotExist:
         return HttpResponse(status=404)
     # Access control mirrors ID-based
@@ -163,7 +182,7 @@ def bot_logs_html_token(request: HttpRequest, bot_token: str) -> HttpResponse:
 @login_required()
 def bot_logs_pdf_token(request: HttpRequest, bot_token: str):
     try:
-        bot = Bot.objects.get(token=bot_token)
+        bot = bot_registry.get(token=bot_token)
     except Bot.DoesNotExist:
         return HttpResponse(status=404)
     user = request.user
@@ -239,7 +258,7 @@ def upload_photo(request: HttpRequest) -> JsonResponse:
 @login_required()
 def bot_logs_html(request: HttpRequest, bot_id: int) -> HttpResponse:
     try:
-        bot = Bot.objects.get(id=bot_id)
+        bot = bot_registry.get(id=bot_id)
     except Bot.DoesNotExist:
         return HttpResponse(status=404)
     # Access control: superuser or candidate user owning the bot
@@ -262,7 +281,7 @@ def bot_logs_html(request: HttpRequest, bot_id: int) -> HttpResponse:
 @login_required()
 def bot_logs_pdf(request: HttpRequest, bot_id: int):
     try:
-        bot = Bot.objects.get(id=bot_id)
+        bot = bot_registry.get(id=bot_id)
     except Bot.DoesNotExist:
         return HttpResponse(status=404)
     user = request.user
@@ -352,11 +371,11 @@ def send_to_chat(request: HttpRequest) -> JsonResponse:
     bot = None
     if bot_id:
         try:
-            bot = Bot.objects.get(id=bot_id)
+            bot = bot_registry.get(id=bot_id)
         except Bot.DoesNotExist:
             return JsonResponse({'error': 'bot not found'}, status=404)
     elif bot_token:
-        bot = Bot.objects.filter(token=bot_token).first()
+        bot = bot_registry.find(token=bot_token)
         if not bot:
             return JsonResponse({'error': 'bot not found for token'}, status=404)
     else:
@@ -597,7 +616,7 @@ def assign_bot_to_campaign(request: HttpRequest) -> JsonResponse:
     bot_id = data.get('bot_id')
     campaign_id = data.get('campaign_id')
     try:
-        bot = Bot.objects.get(id=bot_id)
+        bot = bot_registry.get(id=bot_id)
         campaign = Campaign.objects.get(id=campaign_id)
     except (Bot.DoesNotExist, Campaign.DoesNotExist):
         return JsonResponse({'error': 'bot or campaign not found'}, status=404)
@@ -607,6 +626,7 @@ def assign_bot_to_campaign(request: HttpRequest) -> JsonResponse:
 
 @csrf_exempt
 @require_http_methods(['POST'])
+@admission_control
 def telegram_webhook(request: HttpRequest, bot_id: int) -> JsonResponse:
     # Log the incoming request
     logger.info(f"Webhook received for bot_id: {bot_id}")
@@ -615,7 +635,7 @@ def telegram_webhook(request: HttpRequest, bot_id: int) -> JsonResponse:
     print(f"Request body: {request.body.decode('utf-8')}")
     
     try:
-        bot = Bot.objects.get(id=bot_id)
+        bot = bot_registry.get(id=bot_id)
         print(f"Bot found: {bot.name} (Active: {bot.is_active})")
     except Bot.DoesNotExist:
         print(f"Bot with ID {bot_id} not found!")
@@ -628,10 +648,16 @@ def telegram_webhook(request: HttpRequest, bot_id: int) -> JsonResponse:
         print(f"Error parsing payload: {e}")
         payload = {}
 
-    # Persist event for debugging
+    # Telegram retries webhooks that time out; handle each update_id once
+    if not update_dedup.claim(bot.id, payload.get('update_id')):
+        logger.debug('duplicate update_id %s for bot %s, skipping', payload.get('update_id'), bot.id)
+        return JsonResponse({'ok': True, 'duplicate': True})
+
+    # Persist event for debugging (routine chatter may be sampled, see hub.retention)
     try:
-        webhook_event = WebhookEvent.objects.create(bot=bot, event_type='update', payload=payload)
-        print(f"WebhookEvent created: {webhook_event.id}")
+        if should_store_event(payload):
+            webhook_event = WebhookEvent.objects.create(bot=bot, event_type='update', payload=payload)
+            print(f"WebhookEvent created: {webhook_event.id}")
     except Exception as e:
         print(f"Error creating WebhookEvent: {e}")
 
@@ -666,7 +692,7 @@ def telegram_webhook(request: HttpRequest, bot_id: int) -> JsonResponse:
                             'language_code': from_user.get('language_code') or chat.get('language_code'),
                         }
                     )
-                    phone = (contact.get('phone_number') or '').strip()
+                    phone = normalize_phone(contact.get('phone_number'))
                     if phone and bu.phone_number != phone:
                         bu.phone_number = phone
                         bu.save(update_fields=['phone_number'])
@@ -676,7 +702,8 @@ def telegram_webhook(request: HttpRequest, bot_id: int) -> JsonResponse:
                     bot_user = bu
                 except Exception as e:
                     print(f"Error saving phone number: {e}")
-            MessageLog.objects.create(
+            # Buffered: rows are bulk-inserted per time window
+            message_log_buffer.add(
                 bot=bot,
                 bot_user=bot_user,
                 message_id=str(message.get('message_id')) if message.get('message_id') is not None else None,
@@ -707,7 +734,7 @@ def telegram_webhook(request: HttpRequest, bot_id: int) -> JsonResponse:
         # Send welcome message first
         try:
             welcome_response = requests.post(
-                f"https://api.telegram.org/bot{bot.token}/sendMessage", 
+                api_url(bot.token, 'sendMessage'),
                 json={
                     'chat_id': chat_id,
                     'text': 'Welcome! You are now registered and can receive broadcasts.'
@@ -722,7 +749,7 @@ def telegram_webhook(request: HttpRequest, bot_id: int) -> JsonResponse:
         # Ask user to share their contact (phone number)
         try:
             contact_prompt = requests.post(
-                f"https://api.telegram.org/bot{bot.token}/sendMessage",
+                api_url(bot.token, 'sendMessage'),
                 json={
                     'chat_id': chat_id,
                     'text': 'Please share your phone number to complete registration.',
@@ -804,7 +831,7 @@ def telegram_webhook(request: HttpRequest, bot_id: int) -> JsonResponse:
             print(f"✓ VERIFICATION: User saved with started_at={saved_user.started_at}, blocked={saved_user.is_blocked}")
 
             # If Telegram unexpectedly includes phone in from_user (rare), save it
-            possible_phone = (from_user.get('phone_number') or '').strip()
+            possible_phone = normalize_phone(from_user.get('phone_number'))
             if possible_phone and saved_user.phone_number != possible_phone:
                 saved_user.phone_number = possible_phone
                 saved_user.save(update_fields=['phone_number'])
@@ -925,7 +952,7 @@ def set_webhook(request: HttpRequest) -> JsonResponse:
     if not bot_id or not webhook_url:
         return JsonResponse({'error': 'bot_id and webhook_url required'}, status=400)
     try:
-        bot = Bot.objects.get(id=bot_id)
+        bot = bot_registry.get(id=bot_id)
     except Bot.DoesNotExist:
         return JsonResponse({'error': 'bot not found'}, status=404)
     r = requests.post(f"https://api.telegram.org/bot{bot.token}/setWebhook", json={
@@ -947,7 +974,7 @@ def staff_send_form(request: HttpRequest) -> HttpResponse:
         error = None
         ok = False
         try:
-            bot = Bot.objects.get(id=bot_id)
+            bot = bot_registry.get(id=bot_id)
         except Bot.DoesNotExist:
             bot = None
             error = 'Bot not found'
@@ -1020,14 +1047,14 @@ def broadcast_all(request: HttpRequest) -> JsonResponse:
     bot = None
     if bot_id:
         try:
-            bot = Bot.objects.get(id=bot_id)
+            bot = bot_registry.get(id=bot_id)
             print(f"Bot found by ID: {bot.name}")
             print(f"Bot token (last 10 chars): ...{bot.token[-10:] if bot.token else 'None'}")
         except Bot.DoesNotExist:
             print(f"Bot with ID {bot_id} not found!")
             return JsonResponse({'error': 'bot not found'}, status=404)
     elif bot_token:
-        bot = Bot.objects.filter(token=bot_token).first()
+        bot = bot_registry.find(token=bot_token)
         if bot:
             print(f"Bot found by token: {bot.name}")
         else:
@@ -1197,11 +1224,11 @@ def broadcast_action(request: HttpRequest) -> JsonResponse:
     bot = None
     if bot_id:
         try:
-            bot = Bot.objects.get(id=bot_id)
+            bot = bot_registry.get(id=bot_id)
         except Bot.DoesNotExist:
             return JsonResponse({'error': 'bot not found'}, status=404)
     elif bot_token:
-        bot = Bot.objects.filter(token=bot_token).first()
+        bot = bot_registry.find(token=bot_token)
         if not bot:
             return JsonResponse({'error': 'bot not found for token'}, status=404)
     else:
@@ -1457,7 +1484,7 @@ def broadcast_action(request: HttpRequest) -> JsonResponse:
 def debug_bot_users(request: HttpRequest, bot_id: int) -> JsonResponse:
     """Enhanced debug endpoint"""
     try:
-        bot = Bot.objects.get(id=bot_id)
+        bot = bot_registry.get(id=bot_id)
     except Bot.DoesNotExist:
         return JsonResponse({'error': 'bot not found'}, status=404)
     
@@ -1510,7 +1537,8 @@ def debug_bot_users(request: HttpRequest, bot_id: int) -> JsonResponse:
 def test_webhook(request: HttpRequest, bot_id: int) -> JsonResponse:
     """Test webhook with a simulated /start message"""
     test_payload = {
-        "update_id": 999999,
+        # Unique per call so repeated tests are not rejected as duplicates
+        "update_id": int(timezone.now().timestamp() * 1000),
         "message": {
             "message_id": 999,
             "from": {
@@ -1537,7 +1565,7 @@ def test_webhook(request: HttpRequest, bot_id: int) -> JsonResponse:
     
     # Simulate the webhook call
     request._body = json.dumps(test_payload).encode('utf-8')
-    return telegram_webhook(request, bot_id)
+    return async_to_sync(telegram_webhook)(request, bot_id)
 
 
 # Manual user creation endpoint for testing
@@ -1546,7 +1574,7 @@ def test_webhook(request: HttpRequest, bot_id: int) -> JsonResponse:
 def create_test_user(request: HttpRequest, bot_id: int) -> JsonResponse:
     """Manually create a test user for debugging"""
     try:
-        bot = Bot.objects.get(id=bot_id)
+        bot = bot_registry.get(id=bot_id)
     except Bot.DoesNotExist:
         return JsonResponse({'error': 'bot not found'}, status=404)
     
@@ -1594,64 +1622,23 @@ def import_updates(request: HttpRequest) -> JsonResponse:
     if not bot_token:
         return JsonResponse({'error': 'bot_token required'}, status=400)
 
-    bot = Bot.objects.filter(token=bot_token).first()
+    max_pages = data.get('max_pages')
+    if max_pages is not None and (type(max_pages) is not int or max_pages < 1):
+        return JsonResponse({'error': 'max_pages must be a positive integer'}, status=400)
+
+    bot = bot_registry.find(token=bot_token)
     if not bot:
         bot = Bot.objects.create(name='Imported Bot', token=bot_token, is_active=True)
 
     try:
-        r = requests.get(f"https://api.telegram.org/bot{bot_token}/getUpdates", timeout=15)
-        js = r.json()
+        stats = import_backlog(bot, max_pages=max_pages)
+    except TelegramError as ex:
+        # Bad token, webhook still set, ...
+        return JsonResponse(ex.response, status=400)
     except Exception as ex:
         return JsonResponse({'error': f'failed to fetch updates: {ex}'}, status=400)
 
-    if not js.get('ok'):
-        return JsonResponse(js, status=400)
-
-    upserted = 0
-    started = 0
-    for upd in js.get('result', []):
-        msg = upd.get('message') or upd.get('edited_message') or {}
-        if not msg:
-            continue
-        from_user = msg.get('from') or {}
-        chat = msg.get('chat') or {}
-        chat_id = chat.get('id') or from_user.get('id')
-        if not chat_id:
-            continue
-        bu, created = BotUser.objects.get_or_create(
-            bot=bot,
-            telegram_id=chat_id,
-            defaults={
-                'username': from_user.get('username'),
-                'first_name': from_user.get('first_name'),
-                'last_name': from_user.get('last_name'),
-                'language_code': from_user.get('language_code'),
-                'last_seen_at': timezone.now(),
-            }
-        )
-        if created:
-            upserted += 1
-        else:
-            changed = False
-            for field, value in {
-                'username': from_user.get('username'),
-                'first_name': from_user.get('first_name'),
-                'last_name': from_user.get('last_name'),
-                'language_code': from_user.get('language_code'),
-            }.items():
-                if value and getattr(bu, field) != value:
-                    setattr(bu, field, value)
-                    changed = True
-            bu.last_seen_at = timezone.now()
-            if changed:
-                bu.save()
-        text = (msg.get('text') or '').strip()
-        if text.startswith('/start') and not bu.started_at:
-            bu.started_at = timezone.now()
-            bu.save(update_fields=['started_at'])
-            started += 1
-
-    return JsonResponse({'ok': True, 'upserted': upserted, 'started_marked': started})
+    return JsonResponse({'ok': True, **stats})
 
 
 # ===== ELECTION 360 DASHBOARD =====
@@ -1753,7 +1740,25 @@ def cv_download(request: HttpRequest) -> FileResponse:
         return HttpResponse(status=404)
 
 
+def _record_submission(kind, data):
+    """Queue a validated landing submission (LANDING_INGEST_MODE = 'queue') or record it now."""
+    if ingest_queue.is_enabled():
+        outcome = ingest_queue.submit(kind, data)
+        if outcome is not None:
+            return outcome
+    return submissions.record(kind, data)
+
+
+def _landing_context(snapshot):
+    """Template context of the desktop landing page, from a hub.snapshot snapshot."""
+    keys = ('candidate', 'events', 'supporters_count', 'speeches', 'polls', 'candidate_bot', 'gallery_items', 'testimonials', 'benefits')
+    return {key: snapshot[key] for key in keys}
+
+
 @csrf_exempt
+@throttle_landing_posts
+@conditional_candidate_get()
+@cache_landing('desktop')
 def candidate_landing(request: HttpRequest, candidate_id: str) -> HttpResponse:
     """Individual candidate landing page"""
     try:
@@ -1777,7 +1782,7 @@ def candidate_landing(request: HttpRequest, candidate_id: str) -> HttpResponse:
         try:
             # Get user data from request
             user_name = request.POST.get('user_name', '').strip()
-            user_phone = request.POST.get('user_phone', '').strip()
+            user_phone = normalize_phone(request.POST.get('user_phone'))
             user_national_id = request.POST.get('user_national_id', '').strip()
             user_email = request.POST.get('user_email', '').strip()
             user_city = request.POST.get('user_city', '').strip()
@@ -1797,46 +1802,25 @@ def candidate_landing(request: HttpRequest, candidate_id: str) -> HttpResponse:
                 ph = (user_phone or '').strip()
                 if not (ph.isdigit() and len(ph) == 11):
                     return JsonResponse({'success': False, 'message': 'رقم الهاتف غير صالح. يجب أن يكون 11 رقمًا.'})
-                existing_supporter = Supporter.objects.filter(
-                    candidate=candidate,
-                    bot_user__phone_number=ph
-                ).first()
-                existing_by_national = Supporter.objects.filter(
-                    candidate=candidate,
-                    notes__icontains=user_national_id
-                ).first()
-                if not existing_supporter and not existing_by_national:
-                    temp_bot = Bot.objects.first()
-                    if not temp_bot:
-                        try:
-                            import uuid as _uuid
-                            temp_bot = Bot.objects.create(name='Default Bot', token=str(_uuid.uuid4()), is_active=False)
-                        except Exception:
-                            temp_bot = None
-                    if temp_bot:
-                        bot_user, created = BotUser.objects.get_or_create(
-                            bot=temp_bot,
-                            phone_number=ph,
-                            defaults={
-                                'first_name': user_name.split()[0] if user_name.split() else user_name,
-                                'last_name': ' '.join(user_name.split()[1:]) if len(user_name.split()) > 1 else '',
-                                'telegram_id': hash(user_national_id) % 1000000000,
-                            }
-                        )
-                        Supporter.objects.create(
-                            candidate=candidate,
-                            bot_user=bot_user,
-                            city=user_city,
-                            support_level=support_level,
-                            notes=f"Supporter from landing page - Email: {user_email}, National ID: {user_national_id}"
-                        )
-                        return JsonResponse({'success': True, 'message': 'تم تسجيل دعمك بنجاح!'})
-                    else:
-                        return JsonResponse({'success': False, 'message': 'خطأ: لم يتم العثور على بوت للربط'})
-                else:
-                    if existing_supporter:
-                        return JsonResponse({'success': False, 'message': 'هذا الرقم مسجل كمؤيد بالفعل لهذا المرشح.'})
+                outcome = _record_submission('support', {
+                    'candidate_id': str(candidate.id),
+                    'name': user_name,
+                    'phone': ph,
+                    'national_id': nat,
+                    'email': user_email,
+                    'city': user_city,
+                    'support_level': support_level,
+                    'source': 'landing page',
+                })
+                if outcome in (submissions.CREATED, ingest_queue.QUEUED):
+                    return JsonResponse({'success': True, 'message': 'تم تسجيل دعمك بنجاح!'})
+                if outcome == submissions.NO_BOT:
+                    return JsonResponse({'success': False, 'message': 'خطأ: لم يتم العثور على بوت للربط'})
+                if outcome == submissions.DUPLICATE_PHONE:
+                    return JsonResponse({'success': False, 'message': 'هذا الرقم مسجل كمؤيد بالفعل لهذا المرشح.'})
+                if outcome == submissions.DUPLICATE_NATIONAL_ID:
                     return JsonResponse({'success': False, 'message': 'الرقم القومي مسجل مسبقًا لهذا المرشح.'})
+                return JsonResponse({'success': False, 'message': 'هذا الرقم/الرقم القومي مسجل بالفعل لهذا المرشح.'})
             else:
                 return JsonResponse({'success': False, 'message': 'يرجى ملء جميع الحقول المطلوبة'})
         except Exception as ex:
@@ -1852,7 +1836,7 @@ def candidate_landing(request: HttpRequest, candidate_id: str) -> HttpResponse:
     if request.method == 'POST' and request.POST.get('action') == 'ask':
         try:
             asker_name = (request.POST.get('asker_name') or '').strip()
-            asker_phone = (request.POST.get('asker_phone') or '').strip()
+            asker_phone = normalize_phone(request.POST.get('asker_phone'))
             asker_national_id = (request.POST.get('asker_national_id') or '').strip()
             question_text = (request.POST.get('question_text') or '').strip()
 
@@ -1861,34 +1845,15 @@ def candidate_landing(request: HttpRequest, candidate_id: str) -> HttpResponse:
             if not (asker_phone.isdigit() and len(asker_phone) == 11):
                 return JsonResponse({'success': False, 'message': 'رقم الهاتف غير صالح. يجب أن يكون 11 رقمًا.'})
 
-            temp_bot = Bot.objects.first()
-            if not temp_bot:
-                try:
-                    import uuid as _uuid
-                    temp_bot = Bot.objects.create(name='Default Bot', token=str(_uuid.uuid4()), is_active=False)
-                except Exception:
-                    temp_bot = None
-            if not temp_bot:
+            outcome = _record_submission('ask', {
+                'candidate_id': str(candidate.id),
+                'name': asker_name,
+                'phone': asker_phone,
+                'text': question_text,
+                'national_id': asker_national_id,
+            })
+            if outcome == submissions.NO_BOT:
                 return JsonResponse({'success': False, 'message': 'خطأ: لم يتم العثور على بوت للربط'})
-
-            bot_user, _ = BotUser.objects.get_or_create(
-                bot=temp_bot,
-                phone_number=asker_phone,
-                defaults={
-                    'first_name': asker_name.split()[0] if asker_name.split() else asker_name,
-                    'last_name': ' '.join(asker_name.split()[1:]) if len(asker_name.split()) > 1 else '',
-                    'telegram_id': hash(asker_phone + asker_name) % 1000000000,
-                }
-            )
-            meta_suffix = ''
-            if asker_phone or asker_national_id:
-                meta_suffix = f"\n— الهاتف: {asker_phone}{' — الرقم القومي: ' + asker_national_id if asker_national_id else ''}"
-            DailyQuestion.objects.create(
-                candidate=candidate,
-                bot_user=bot_user,
-                question=f"{question_text}{meta_suffix}",
-                is_public=False,
-            )
             return JsonResponse({'success': True, 'message': 'تم إرسال سؤالك بنجاح!'})
         except Exception as ex:
             logger.exception('landing ask error: %s', ex)
@@ -1917,110 +1882,39 @@ def candidate_landing(request: HttpRequest, candidate_id: str) -> HttpResponse:
         poll_id = request.POST.get('poll_id')
         option_index = request.POST.get('option_index')
         voter_name = request.POST.get('voter_name', '').strip()
-        voter_phone = request.POST.get('voter_phone', '').strip()
+        voter_phone = normalize_phone(request.POST.get('voter_phone'))
         
         if poll_id and option_index and voter_name and voter_phone:
             # Validate phone: exactly 11 digits
             phone_clean = (voter_phone or '').strip()
             if not (phone_clean.isdigit() and len(phone_clean) == 11):
                 return JsonResponse({'success': False, 'message': 'رقم الهاتف غير صالح. يجب أن يكون 11 رقمًا.'})
-            try:
-                poll = Poll.objects.get(id=poll_id, candidate=candidate)
-                
-                # Create a temporary BotUser for the voter
-                temp_bot = Bot.objects.first()
-                if temp_bot:
-                    # Use phone number as unique identifier instead of telegram_id
-                    bot_user, created = BotUser.objects.get_or_create(
-                        bot=temp_bot,
-                        phone_number=voter_phone,
-                        defaults={
-                            'first_name': voter_name.split()[0] if voter_name.split() else voter_name,
-                            'last_name': ' '.join(voter_name.split()[1:]) if len(voter_name.split()) > 1 else '',
-                            'telegram_id': hash(voter_phone + voter_name) % 1000000000,  # Generate unique ID from phone + name
-                        }
-                    )
-                    
-                    # Check if user already voted
-                    existing_response = PollResponse.objects.filter(
-                        poll=poll,
-                        bot_user=bot_user
-                    ).first()
-                    
-                    if not existing_response:
-                        # Create poll response
-                        PollResponse.objects.create(
-                            poll=poll,
-                            bot_user=bot_user,
-                            selected_options=[int(option_index)]
-                        )
-                        return JsonResponse({'success': True, 'message': 'تم تسجيل تصويتك بنجاح!'})
-                    else:
-                        return JsonResponse({'success': False, 'message': 'لقد قمت بالتصويت من قبل باستخدام هذا الرقم.'})
-                else:
-                    return JsonResponse({'success': False, 'message': 'خطأ: لم يتم العثور على بوت للربط'})
-            except (Poll.DoesNotExist, ValueError):
-                return JsonResponse({'success': False, 'message': 'خطأ: استطلاع غير صحيح'})
+            outcome = _record_submission('vote', {
+                'candidate_id': str(candidate.id),
+                'poll_id': poll_id,
+                'option_index': option_index,
+                'name': voter_name,
+                'phone': voter_phone,
+            })
+            if outcome in (submissions.CREATED, ingest_queue.QUEUED):
+                return JsonResponse({'success': True, 'message': 'تم تسجيل تصويتك بنجاح!'})
+            if outcome == submissions.ALREADY_VOTED:
+                return JsonResponse({'success': False, 'message': 'لقد قمت بالتصويت من قبل باستخدام هذا الرقم.'})
+            if outcome == submissions.NO_BOT:
+                return JsonResponse({'success': False, 'message': 'خطأ: لم يتم العثور على بوت للربط'})
+            return JsonResponse({'success': False, 'message': 'خطأ: استطلاع غير صحيح'})
         else:
             return JsonResponse({'success': False, 'message': 'يرجى ملء جميع الحقول المطلوبة'})
     
-    # Get candidate's events
-    events = Event.objects.filter(candidate=candidate, is_public=True).order_by('-start_datetime')[:5]
-    
-    # Get candidate's supporters count
-    supporters_count = Supporter.objects.filter(candidate=candidate).count()
-    
-    # Get recent speeches
-    speeches = Speech.objects.filter(candidate=candidate).order_by('-created_at')[:3]
-    
-    # Get recent polls with vote counts
-    polls = Poll.objects.filter(candidate=candidate).order_by('-created_at')[:5]
-    for poll in polls:
-        # Calculate vote counts for each option
-        all_responses = PollResponse.objects.filter(poll=poll)
-        option_votes_list = []
-        options_with_counts = []
-        for i, option in enumerate(poll.options):
-            vote_count = 0
-            for response in all_responses:
-                if i in response.selected_options:
-                    vote_count += 1
-            option_votes_list.append(vote_count)
-            options_with_counts.append({
-                'index': i,
-                'text': option,
-                'count': vote_count,
-            })
-        # Attach convenient attributes for templates
-        poll.option_votes_list = option_votes_list
-        poll.options_with_counts = options_with_counts
-    
-    # Get candidate's bot (if any)
-    candidate_bot = candidate.bot
-    
-    # Get gallery items
-    gallery_items = Gallery.objects.filter(candidate=candidate, is_public=True).order_by('-is_featured', '-created_at')[:12]
-    # Get testimonials
-    from .models import Testimonial
-    testimonials = Testimonial.objects.filter(candidate=candidate, is_public=True).order_by('display_order', '-created_at')[:6]
-    # Get dynamic benefits
-    from .models import CampaignBenefit
-    benefits = CampaignBenefit.objects.filter(candidate=candidate, is_public=True).order_by('display_order', '-created_at')[:8]
-    
-    context = {
-        'candidate': candidate,
-        'events': events,
-        'supporters_count': supporters_count,
-        'speeches': speeches,
-        'polls': polls,
-        'candidate_bot': candidate_bot,
-        'gallery_items': gallery_items,
-        'testimonials': testimonials,
-        'benefits': benefits,
-    }
+    # Everything the page shows comes from the candidate's snapshot
+    snapshot = get_snapshot(candidate)
+    context = _landing_context(snapshot)
     return render(request, 'hub/candidate_landing.html', context)
 
 
+@throttle_landing_posts
+@conditional_candidate_get()
+@cache_landing('mobile')
 def candidate_landing_mobile(request: HttpRequest, candidate_id: str) -> HttpResponse:
     """Mobile-optimized candidate landing page"""
     try:
@@ -2038,11 +1932,13 @@ def candidate_landing_mobile(request: HttpRequest, candidate_id: str) -> HttpRes
         try:
             # Get user data from request
             user_name = request.POST.get('user_name', '').strip()
-            user_phone = request.POST.get('user_phone', '').strip()
+            user_phone = normalize_phone(request.POST.get('user_phone'))
             user_national_id = request.POST.get('user_national_id', '').strip()
             user_email = request.POST.get('user_email', '').strip()
             user_city = request.POST.get('user_city', '').strip()
-            support_level = request.POST.get('support_level', '').strip()
+            support_level_str = request.POST.get('support_level', '').strip() or 'supporter'
+            support_level_map = {'supporter': 1, 'volunteer': 2, 'donor': 3}
+            support_level = support_level_map.get(support_level_str, 1)
             
             # Validation
             if not (user_name and user_phone and user_national_id):
@@ -2054,16 +1950,21 @@ def candidate_landing_mobile(request: HttpRequest, candidate_id: str) -> HttpRes
             if not (user_national_id.isdigit() and len(user_national_id) == 14):
                 return JsonResponse({'success': False, 'message': 'الرقم القومي غير صالح. يجب أن يكون 14 رقمًا.'})
             
-            # Create supporter
-            supporter = Supporter.objects.create(
-                candidate=candidate,
-                name=user_name,
-                phone_number=user_phone,
-                national_id=user_national_id,
-                email=user_email or None,
-                city=user_city or None,
-                support_level=support_level or 'supporter'
-            )
+            # Same path as the desktop page: dedupe by phone/national ID, link to the bot
+            outcome = _record_submission('support', {
+                'candidate_id': str(candidate.id),
+                'name': user_name,
+                'phone': user_phone,
+                'national_id': user_national_id,
+                'email': user_email,
+                'city': user_city,
+                'support_level': support_level,
+                'source': 'mobile page',
+            })
+            if outcome == submissions.NO_BOT:
+                return JsonResponse({'success': False, 'message': 'خطأ: لم يتم العثور على بوت للربط'})
+            if outcome not in (submissions.CREATED, ingest_queue.QUEUED):
+                return JsonResponse({'success': False, 'message': 'هذا الرقم/الرقم القومي مسجل بالفعل لهذا المرشح.'})
             
             return JsonResponse({
                 'success': True, 
@@ -2071,14 +1972,14 @@ def candidate_landing_mobile(request: HttpRequest, candidate_id: str) -> HttpRes
             })
             
         except Exception as e:
-            print(f"Error creating supporter: {e}")
+            logger.exception('mobile support error: %s', e)
             return JsonResponse({'success': False, 'message': 'حدث خطأ أثناء تسجيل الدعم. يرجى المحاولة مرة أخرى.'})
     
     # Handle ask question
     elif request.method == 'POST' and request.POST.get('action') == 'ask':
         try:
             asker_name = request.POST.get('asker_name', '').strip()
-            asker_phone = request.POST.get('asker_phone', '').strip()
+            asker_phone = normalize_phone(request.POST.get('asker_phone'))
             asker_national_id = request.POST.get('asker_national_id', '').strip()
             question_text = request.POST.get('question_text', '').strip()
             
@@ -2088,14 +1989,13 @@ def candidate_landing_mobile(request: HttpRequest, candidate_id: str) -> HttpRes
             if not (asker_phone.isdigit() and len(asker_phone) == 11):
                 return JsonResponse({'success': False, 'message': 'رقم الهاتف غير صالح. يجب أن يكون 11 رقمًا.'})
             
-            # Create question
-            question = Question.objects.create(
-                candidate=candidate,
-                asker_name=asker_name,
-                asker_phone=asker_phone,
-                asker_national_id=asker_national_id or None,
-                question_text=question_text
-            )
+            _record_submission('public_ask', {
+                'candidate_id': str(candidate.id),
+                'name': asker_name,
+                'phone': asker_phone,
+                'text': question_text,
+                'national_id': asker_national_id,
+            })
             
             return JsonResponse({
                 'success': True, 
@@ -2103,7 +2003,7 @@ def candidate_landing_mobile(request: HttpRequest, candidate_id: str) -> HttpRes
             })
             
         except Exception as e:
-            print(f"Error creating question: {e}")
+            logger.exception('mobile ask error: %s', e)
             return JsonResponse({'success': False, 'message': 'حدث خطأ أثناء إرسال السؤال. يرجى المحاولة مرة أخرى.'})
     
     # Handle poll voting
@@ -2115,68 +2015,110 @@ def candidate_landing_mobile(request: HttpRequest, candidate_id: str) -> HttpRes
             if not (poll_id and selected_option):
                 return JsonResponse({'success': False, 'message': 'يرجى اختيار خيار للتصويت'})
             
-            poll = Poll.objects.get(id=poll_id, candidate=candidate)
-            
-            # Check if user already voted (simple check by IP)
-            user_ip = request.META.get('REMOTE_ADDR', '')
-            if PollVote.objects.filter(poll=poll, user_ip=user_ip).exists():
-                return JsonResponse({'success': False, 'message': 'لقد قمت بالتصويت مسبقاً في هذا الاستطلاع'})
+            try:
+                selected_index = int(selected_option)
+            except ValueError:
+                return JsonResponse({'success': False, 'message': 'خيار التصويت غير موجود'})
             
-            # Create vote
-            PollVote.objects.create(
-                poll=poll,
-                option_index=int(selected_option),
-                user_ip=user_ip
-            )
+            # One vote per IP (enforced by the PollVote unique constraint)
+            outcome = _record_submission('public_vote', {
+                'candidate_id': str(candidate.id),
+                'poll_id': poll_id,
+                'option_index': selected_index,
+                'user_ip': client_ip(request),
+            })
+            if outcome == submissions.ALREADY_VOTED:
+                response = JsonResponse({'success': False, 'message': 'لقد قمت بالتصويت مسبقاً في هذا الاستطلاع'})
+                response.set_cookie(VOTED_COOKIE, '1', max_age=365 * 24 * 3600, samesite='Lax')
+                return response
+            if outcome == submissions.INVALID_OPTION:
+                return JsonResponse({'success': False, 'message': 'خيار التصويت غير موجود'})
+            if outcome == submissions.INVALID_POLL:
+                return JsonResponse({'success': False, 'message': 'الاستطلاع غير موجود'})
             
-            return JsonResponse({
+            # Voters get the uncached page, which shows their poll results
+            response = JsonResponse({
                 'success': True, 
                 'message': 'تم إرسال تصويتك بنجاح!'
             })
+            response.set_cookie(VOTED_COOKIE, '1', max_age=365 * 24 * 3600, samesite='Lax')
+            return response
             
-        except Poll.DoesNotExist:
-            return JsonResponse({'success': False, 'message': 'الاستطلاع غير موجود'})
         except Exception as e:
-            print(f"Error creating poll vote: {e}")
+            logger.exception('mobile vote error: %s', e)
             return JsonResponse({'success': False, 'message': 'حدث خطأ أثناء إرسال التصويت. يرجى المحاولة مرة أخرى.'})
     
     # Get data for template
-    supporters_count = Supporter.objects.filter(candidate=candidate).count()
-    questions_count = Question.objects.filter(candidate=candidate).count()
-    polls = Poll.objects.filter(candidate=candidate, is_active=True).order_by('-created_at')[:3]
-    events = Event.objects.filter(candidate=candidate, is_public=True).order_by('-start_datetime')[:5]
-    gallery_items = Gallery.objects.filter(candidate=candidate, is_public=True).order_by('-created_at')[:12]
-    testimonials = Testimonial.objects.filter(candidate=candidate, is_public=True).order_by('-created_at')[:5]
-    events_count = events.count()
-    
-    # Get candidate bot
-    candidate_bot = candidate.bot if (getattr(candidate, 'bot', None) and candidate.bot.is_active) else None
+    snapshot = get_snapshot(candidate)
+    polls = snapshot['active_polls']
+    voted_poll_ids = set()
+    if not getattr(request, 'landing_cache', False):
+        # Shared cached pages never show one visitor's voting state
+        voted_poll_ids = set(
+            PollVote.objects.filter(poll__in=[p['id'] for p in polls], user_ip=client_ip(request))
+            .values_list('poll_id', flat=True)
+        )
+    polls = [{**poll, 'user_has_voted': poll['id'] in voted_poll_ids} for poll in polls]
+    candidate_bot = snapshot['candidate_bot']
     
     context = {
-        'candidate': candidate,
-        'supporters_count': supporters_count,
-        'questions_count': questions_count,
-        'events_count': events_count,
+        'candidate': snapshot['candidate'],
+        'supporters_count': snapshot['supporters_count'],
+        'questions_count': snapshot['questions_count'],
+        'events_count': len(snapshot['events']),
         'polls': polls,
-        'events': events,
-        'candidate_bot': candidate_bot,
-        'gallery_items': gallery_items,
-        'testimonials': testimonials,
+        'events': snapshot['events'],
+        'candidate_bot': candidate_bot if candidate_bot and candidate_bot['is_active'] else None,
+        'gallery_items': snapshot['recent_gallery_items'],
+        'testimonials': snapshot['recent_testimonials'],
     }
     return render(request, 'hub/candidate_landing_mobile.html', context)
 
 
+@require_http_methods(['GET'])
+def candidate_snapshot(request: HttpRequest, candidate_id: str) -> JsonResponse:
+    """Landing page data of an active candidate as JSON (same snapshot the pages render)."""
+    try:
+        candidate = Candidate.objects.select_related('bot').get(id=candidate_id, is_active=True)
+    except (Candidate.DoesNotExist, ValidationError):
+        return JsonResponse({'error': 'candidate not found'}, status=404)
+    return JsonResponse(get_snapshot(candidate), encoder=DjangoJSONEncoder, json_dumps_params={'ensure_ascii': False})
+
+
+@never_cache
+@require_http_methods(['GET'])
+def candidate_live(request: HttpRequest, candidate_id: str) -> JsonResponse:
+    """Counts, poll tallies and a CSRF token for pre-rendered landing pages (see hub.prerender)."""
+    candidate_id = canonical_candidate_id(candidate_id)
+    snapshot = live.current_snapshot(candidate_id) if candidate_id else None
+    if snapshot is None:
+        return JsonResponse({'error': 'candidate not found'}, status=404)
+    return JsonResponse({**live.live_state(snapshot), 'csrf_token': get_token(request)})
+
+
+def _landing_candidate_for_name(candidate_name):
+    candidate_id = name_index.resolve(candidate_name)
+    if not candidate_id:
+        return None
+    return Candidate.objects.filter(id=candidate_id, is_active=True).first()
+
+
+def _landing_by_name_cache_key(request, candidate_name):
+    return name_index.resolve(candidate_name)
+
+
 @csrf_exempt
+@throttle_landing_posts
+@conditional_candidate_get(candidate_key=_landing_by_name_cache_key)
+@cache_landing('by_name', candidate_key=_landing_by_name_cache_key)
 def candidate_landing_by_name(request: HttpRequest, candidate_name: str) -> HttpResponse:
     """Public friendly URL: /<candidate_name> → candidate landing.
-    Supports URL-encoded Arabic names. Matches active candidates by exact name.
+    Supports URL-encoded Arabic names. Matches active candidates by URL name or
+    name, tolerating common Arabic spelling variants (see hub.name_index).
     """
     try:
         # Prefer matching by public_url_name if set, else fallback to exact name
-        normalized = (candidate_name or '').replace('+', ' ').strip()
-        candidate = Candidate.objects.filter(is_active=True, public_url_name=normalized).first()
-        if not candidate:
-            candidate = Candidate.objects.filter(is_active=True, name=normalized).first()
+        candidate = _landing_candidate_for_name(candidate_name)
         if not candidate:
             return HttpResponse("Candidate not found", status=404)
     except Exception:
@@ -2186,7 +2128,7 @@ def candidate_landing_by_name(request: HttpRequest, candidate_name: str) -> Http
     if request.method == 'POST' and request.POST.get('action') == 'ask':
         try:
             asker_name = (request.POST.get('asker_name') or '').strip()
-            asker_phone = (request.POST.get('asker_phone') or '').strip()
+            asker_phone = normalize_phone(request.POST.get('asker_phone'))
             asker_national_id = (request.POST.get('asker_national_id') or '').strip()
             question_text = (request.POST.get('question_text') or '').strip()
 
@@ -2195,34 +2137,15 @@ def candidate_landing_by_name(request: HttpRequest, candidate_name: str) -> Http
             if not (asker_phone.isdigit() and len(asker_phone) == 11):
                 return JsonResponse({'success': False, 'message': 'رقم الهاتف غير صالح. يجب أن يكون 11 رقمًا.'})
 
-            temp_bot = Bot.objects.first()
-            if not temp_bot:
-                try:
-                    import uuid as _uuid
-                    temp_bot = Bot.objects.create(name='Default Bot', token=str(_uuid.uuid4()), is_active=False)
-                except Exception:
-                    temp_bot = None
-            if not temp_bot:
+            outcome = _record_submission('ask', {
+                'candidate_id': str(candidate.id),
+                'name': asker_name,
+                'phone': asker_phone,
+                'text': question_text,
+                'national_id': asker_national_id,
+            })
+            if outcome == submissions.NO_BOT:
                 return JsonResponse({'success': False, 'message': 'خطأ: لم يتم العثور على بوت للربط'})
-
-            bot_user, _ = BotUser.objects.get_or_create(
-                bot=temp_bot,
-                phone_number=asker_phone,
-                defaults={
-                    'first_name': asker_name.split()[0] if asker_name.split() else asker_name,
-                    'last_name': ' '.join(asker_name.split()[1:]) if len(asker_name.split()) > 1 else '',
-                    'telegram_id': hash(asker_phone + asker_name) % 1000000000,
-                }
-            )
-            meta_suffix = ''
-            if asker_phone or asker_national_id:
-                meta_suffix = f"\n— الهاتف: {asker_phone}{' — الرقم القومي: ' + asker_national_id if asker_national_id else ''}"
-            DailyQuestion.objects.create(
-                candidate=candidate,
-                bot_user=bot_user,
-                question=f"{question_text}{meta_suffix}",
-                is_public=False,
-            )
             return JsonResponse({'success': True, 'message': 'تم إرسال سؤالك بنجاح!'})
         except Exception as ex:
             logger.exception('landing_by_name ask error: %s', ex)
@@ -2232,7 +2155,7 @@ def candidate_landing_by_name(request: HttpRequest, candidate_name: str) -> Http
     if request.method == 'POST' and request.POST.get('action') == 'support':
         try:
             user_name = (request.POST.get('user_name') or '').strip()
-            user_phone = (request.POST.get('user_phone') or '').strip()
+            user_phone = normalize_phone(request.POST.get('user_phone'))
             user_national_id = (request.POST.get('user_national_id') or '').strip()
             user_email = (request.POST.get('user_email') or '').strip()
             user_city = (request.POST.get('user_city') or '').strip()
@@ -2247,38 +2170,21 @@ def candidate_landing_by_name(request: HttpRequest, candidate_name: str) -> Http
             if not (user_phone.isdigit() and len(user_phone) == 11):
                 return JsonResponse({'success': False, 'message': 'رقم الهاتف غير صالح. يجب أن يكون 11 رقمًا.'})
 
-            existing_supporter = Supporter.objects.filter(candidate=candidate, bot_user__phone_number=user_phone).first()
-            existing_by_national = Supporter.objects.filter(candidate=candidate, notes__icontains=user_national_id).first()
-            if existing_supporter or existing_by_national:
-                return JsonResponse({'success': False, 'message': 'هذا الرقم/الرقم القومي مسجل بالفعل لهذا المرشح.'})
-
-            temp_bot = Bot.objects.first()
-            if not temp_bot:
-                try:
-                    import uuid as _uuid
-                    temp_bot = Bot.objects.create(name='Default Bot', token=str(_uuid.uuid4()), is_active=False)
-                except Exception:
-                    temp_bot = None
-            if not temp_bot:
+            outcome = _record_submission('support', {
+                'candidate_id': str(candidate.id),
+                'name': user_name,
+                'phone': user_phone,
+                'national_id': user_national_id,
+                'email': user_email,
+                'city': user_city,
+                'support_level': support_level,
+                'source': 'public page',
+            })
+            if outcome in (submissions.CREATED, ingest_queue.QUEUED):
+                return JsonResponse({'success': True, 'message': 'تم تسجيل دعمك بنجاح!'})
+            if outcome == submissions.NO_BOT:
                 return JsonResponse({'success': False, 'message': 'خطأ: لم يتم العثور على بوت للربط'})
-
-            bot_user, _ = BotUser.objects.get_or_create(
-                bot=temp_bot,
-                phone_number=user_phone,
-                defaults={
-                    'first_name': user_name.split()[0] if user_name.split() else user_name,
-                    'last_name': ' '.join(user_name.split()[1:]) if len(user_name.split()) > 1 else '',
-                    'telegram_id': hash(user_national_id) % 1000000000,
-                }
-            )
-            Supporter.objects.create(
-                candidate=candidate,
-                bot_user=bot_user,
-                city=user_city,
-                support_level=support_level,
-                notes=f"Supporter from public page - Email: {user_email}, National ID: {user_national_id}"
-            )
-            return JsonResponse({'success': True, 'message': 'تم تسجيل دعمك بنجاح!'})
+            return JsonResponse({'success': False, 'message': 'هذا الرقم/الرقم القومي مسجل بالفعل لهذا المرشح.'})
         except Exception as ex:
             logger.exception('landing_by_name support error: %s', ex)
             return JsonResponse({'success': False, 'message': 'حدث خطأ أثناء تسجيل الدعم. يرجى المحاولة مرة أخرى.'})
@@ -2300,7 +2206,7 @@ def candidate_landing_by_name(request: HttpRequest, candidate_name: str) -> Http
             poll_id = request.POST.get('poll_id')
             option_index_raw = request.POST.get('option_index')
             voter_name = request.POST.get('voter_name', '').strip()
-            voter_phone = request.POST.get('voter_phone', '').strip()
+            voter_phone = normalize_phone(request.POST.get('voter_phone'))
 
             if not (poll_id and option_index_raw and voter_name and voter_phone):
                 return JsonResponse({'success': False, 'message': 'يرجى ملء جميع الحقول المطلوبة'})
@@ -2314,80 +2220,33 @@ def candidate_landing_by_name(request: HttpRequest, candidate_name: str) -> Http
             except Exception:
                 return JsonResponse({'success': False, 'message': 'خيار التصويت غير صالح'})
 
-            poll = Poll.objects.get(id=poll_id, candidate=candidate)
-            if selected_index < 0 or selected_index >= len(poll.options or []):
+            outcome = _record_submission('vote', {
+                'candidate_id': str(candidate.id),
+                'poll_id': poll_id,
+                'option_index': selected_index,
+                'name': voter_name,
+                'phone': voter_phone,
+            })
+            if outcome in (submissions.CREATED, ingest_queue.QUEUED):
+                return JsonResponse({'success': True, 'message': 'تم تسجيل تصويتك بنجاح!'})
+            if outcome == submissions.ALREADY_VOTED:
+                return JsonResponse({'success': False, 'message': 'لقد قمت بالتصويت من قبل باستخدام هذا الرقم.'})
+            if outcome == submissions.INVALID_OPTION:
                 return JsonResponse({'success': False, 'message': 'خيار التصويت غير موجود'})
-
-            temp_bot = Bot.objects.first()
-            if not temp_bot:
+            if outcome == submissions.NO_BOT:
                 return JsonResponse({'success': False, 'message': 'خطأ: لم يتم العثور على بوت للربط'})
-
-            bot_user, _ = BotUser.objects.get_or_create(
-                bot=temp_bot,
-                phone_number=voter_phone,
-                defaults={
-                    'first_name': voter_name.split()[0] if voter_name.split() else voter_name,
-                    'last_name': ' '.join(voter_name.split()[1:]) if len(voter_name.split()) > 1 else '',
-                    'telegram_id': hash(voter_phone + voter_name) % 1000000000,
-                }
-            )
-
-            existing_response = PollResponse.objects.filter(poll=poll, bot_user=bot_user).first()
-            if existing_response:
-                return JsonResponse({'success': False, 'message': 'لقد قمت بالتصويت من قبل باستخدام هذا الرقم.'})
-
-            PollResponse.objects.create(
-                poll=poll,
-                bot_user=bot_user,
-                selected_options=[selected_index],
-            )
-            return JsonResponse({'success': True, 'message': 'تم تسجيل تصويتك بنجاح!'})
-        except Poll.DoesNotExist:
             return JsonResponse({'success': False, 'message': 'خطأ: استطلاع غير صحيح'})
         except Exception as ex:
             logger.exception('vote error (by_name): %s', ex)
             return JsonResponse({'success': False, 'message': 'حدث خطأ أثناء إرسال التصويت. يرجى المحاولة مرة أخرى.'})
 
     # Reuse landing logic data
-    events = Event.objects.filter(candidate=candidate, is_public=True).order_by('-start_datetime')[:5]
-    supporters_count = Supporter.objects.filter(candidate=candidate).count()
-    speeches = Speech.objects.filter(candidate=candidate).order_by('-created_at')[:3]
-    polls = Poll.objects.filter(candidate=candidate).order_by('-created_at')[:5]
-    for poll in polls:
-        all_responses = PollResponse.objects.filter(poll=poll)
-        option_votes_list = []
-        options_with_counts = []
-        for i, option in enumerate(poll.options):
-            vote_count = 0
-            for response in all_responses:
-                if i in response.selected_options:
-                    vote_count += 1
-            option_votes_list.append(vote_count)
-            options_with_counts.append({'index': i, 'text': option, 'count': vote_count})
-        poll.option_votes_list = option_votes_list
-        poll.options_with_counts = options_with_counts
-
-    candidate_bot = candidate.bot
-    gallery_items = Gallery.objects.filter(candidate=candidate, is_public=True).order_by('-is_featured', '-created_at')[:12]
-    # Public testimonials
-    from .models import Testimonial, CampaignBenefit
-    testimonials = Testimonial.objects.filter(candidate=candidate, is_public=True).order_by('display_order', '-created_at')[:6]
-    benefits = CampaignBenefit.objects.filter(candidate=candidate, is_public=True).order_by('display_order', '-created_at')[:8]
-    context = {
-        'candidate': candidate,
-        'events': events,
-        'supporters_count': supporters_count,
-        'speeches': speeches,
-        'polls': polls,
-        'candidate_bot': candidate_bot,
-        'gallery_items': gallery_items,
-        'testimonials': testimonials,
-        'benefits': benefits,
-    }
+    context = _landing_context(get_snapshot(candidate))
     return render(request, 'hub/candidate_landing.html', context)
 
 
 @csrf_exempt
+@throttle_landing_posts
 def candidate_support(request: HttpRequest, candidate_id: str) -> HttpResponse:
     """Standalone support page to avoid modal issues."""
     try:
@@ -2398,7 +2257,7 @@ def candidate_support(request: HttpRequest, candidate_id: str) -> HttpResponse:
     if request.method == 'POST' and request.POST.get('action') == 'support':
         # Minimal server-side validation and creation (align with landing logic)
         user_name = request.POST.get('user_name', '').strip()
-        user_phone = request.POST.get('user_phone', '').strip()
+        user_phone = normalize_phone(request.POST.get('user_phone'))
         user_national_id = request.POST.get('user_national_id', '').strip()
         user_email = request.POST.get('user_email', '').strip()
         user_city = request.POST.get('user_city', '').strip()
@@ -2413,50 +2272,29 @@ def candidate_support(request: HttpRequest, candidate_id: str) -> HttpResponse:
         elif not (user_national_id.isdigit() and len(user_national_id) == 14):
             messages.error(request, 'الرقم القومي غير صالح. يجب أن يكون 14 رقمًا.')
         else:
-            existing_supporter = Supporter.objects.filter(
-                candidate=candidate,
-                bot_user__phone_number=user_phone
-            ).first()
-            existing_by_national = Supporter.objects.filter(
-                candidate=candidate,
-                notes__icontains=user_national_id
-            ).first()
-            if existing_supporter or existing_by_national:
-                messages.error(request, 'هذا الدعم مسجل بالفعل لهذا المرشح.')
+            outcome = _record_submission('support', {
+                'candidate_id': str(candidate.id),
+                'name': user_name,
+                'phone': user_phone,
+                'national_id': user_national_id,
+                'email': user_email,
+                'city': user_city,
+                'district': user_district or None,
+                'support_level': support_level,
+                'source': 'support page',
+            })
+            if outcome in (submissions.CREATED, ingest_queue.QUEUED):
+                messages.success(request, 'تم تسجيل دعمك بنجاح!')
+            elif outcome == submissions.NO_BOT:
+                messages.error(request, 'خطأ: لم يتم العثور على بوت للربط')
             else:
-                temp_bot = Bot.objects.first()
-                if not temp_bot:
-                    try:
-                        import uuid as _uuid
-                        temp_bot = Bot.objects.create(name='Default Bot', token=str(_uuid.uuid4()), is_active=False)
-                    except Exception:
-                        temp_bot = None
-                if not temp_bot:
-                    messages.error(request, 'خطأ: لم يتم العثور على بوت للربط')
-                else:
-                    bot_user, _ = BotUser.objects.get_or_create(
-                        bot=temp_bot,
-                        phone_number=user_phone,
-                        defaults={
-                            'first_name': user_name.split()[0] if user_name.split() else user_name,
-                            'last_name': ' '.join(user_name.split()[1:]) if len(user_name.split()) > 1 else '',
-                            'telegram_id': hash(user_national_id) % 1000000000,
-                        }
-                    )
-                    Supporter.objects.create(
-                        candidate=candidate,
-                        bot_user=bot_user,
-                        city=user_city,
-                        district=user_district or None,
-                        support_level=support_level,
-                        notes=f"Supporter from support page - Email: {user_email}, National ID: {user_national_id}"
-                    )
-                    messages.success(request, 'تم تسجيل دعمك بنجاح!')
+                messages.error(request, 'هذا الدعم مسجل بالفعل لهذا المرشح.')
 
     return render(request, 'hub/support.html', {'candidate': candidate})
 
 
 @csrf_exempt
+@throttle_landing_posts
 def candidate_ask(request: HttpRequest, candidate_id: str) -> HttpResponse:
     """Standalone Ask-the-Candidate page."""
     try:
@@ -2466,7 +2304,7 @@ def candidate_ask(request: HttpRequest, candidate_id: str) -> HttpResponse:
 
     if request.method == 'POST' and request.POST.get('action') == 'ask':
         asker_name = request.POST.get('asker_name', '').strip()
-        asker_phone = request.POST.get('asker_phone', '').strip()
+        asker_phone = normalize_phone(request.POST.get('asker_phone'))
         asker_national_id = request.POST.get('asker_national_id', '').strip()
         question_text = request.POST.get('question_text', '').strip()
 
@@ -2477,26 +2315,16 @@ def candidate_ask(request: HttpRequest, candidate_id: str) -> HttpResponse:
         elif not (asker_national_id.isdigit() and len(asker_national_id) == 14):
             messages.error(request, 'الرقم القومي غير صالح. يجب أن يكون 14 رقمًا.')
         else:
-            temp_bot = Bot.objects.first()
-            if not temp_bot:
+            outcome = _record_submission('ask', {
+                'candidate_id': str(candidate.id),
+                'name': asker_name,
+                'phone': asker_phone,
+                'text': question_text,
+                'national_id': asker_national_id,
+            })
+            if outcome == submissions.NO_BOT:
                 messages.error(request, 'خطأ: لم يتم العثور على بوت للربط')
             else:
-                bot_user, _ = BotUser.objects.get_or_create(
-                    bot=temp_bot,
-                    phone_number=asker_phone,
-                    defaults={
-                        'first_name': asker_name.split()[0] if asker_name.split() else asker_name,
-                        'last_name': ' '.join(asker_name.split()[1:]) if len(asker_name.split()) > 1 else '',
-                        'telegram_id': hash(asker_phone + asker_name) % 1000000000,
-                    }
-                )
-                meta_suffix = f"\n— الهاتف: {asker_phone} — الرقم القومي: {asker_national_id}"
-                DailyQuestion.objects.create(
-                    candidate=candidate,
-                    bot_user=bot_user,
-                    question=f"{question_text}{meta_suffix}",
-                    is_public=False,
-                )
                 messages.success(request, 'تم إرسال سؤالك بنجاح!')
                 return redirect(f"/hub/candidate/{candidate.id}/ask/")
 
@@ -2564,13 +2392,15 @@ def candidate_login_simple(request: HttpRequest) -> HttpResponse:
 @login_required()
 def candidate_dashboard(request: HttpRequest, candidate_id: str) -> HttpResponse:
     """Individual candidate dashboard for managing their profile and campaign data"""
-    try:
-        candidate = Candidate.objects.get(id=candidate_id, is_active=True)
-    except Candidate.DoesNotExist:
+    if request.method == 'GET':
+        candidate = load_dashboard_candidate(candidate_id)
+    else:
+        candidate = Candidate.objects.filter(id=candidate_id, is_active=True).first()
+    if candidate is None:
         return HttpResponse("Candidate not found", status=404)
     
     # Check if user has permission to edit this candidate
-    if not request.user.is_authenticated or not hasattr(request.user, 'candidate_profile') or request.user.candidate_profile.candidate.id != candidate.id:
+    if not request.user.is_authenticated or not hasattr(request.user, 'candidate_profile') or request.user.candidate_profile.candidate_id != candidate.id:
         return redirect('candidate_login', candidate_id=candidate_id)
     
     if request.method == 'POST':
@@ -2899,29 +2729,20 @@ def candidate_dashboard(request: HttpRequest, candidate_id: str) -> HttpResponse
                 except DailyQuestion.DoesNotExist:
                     messages.error(request, 'لم يتم العثور على السؤال')
     
-    # Get all candidate data for the dashboard
-    events = Event.objects.filter(candidate=candidate).order_by('-start_datetime')
-    speeches = Speech.objects.filter(candidate=candidate).order_by('-created_at')
-    polls = Poll.objects.filter(candidate=candidate).order_by('-created_at')
-    supporters = Supporter.objects.filter(candidate=candidate).order_by('-registered_at')
-    supporters_count = supporters.count()
-    gallery_items = Gallery.objects.filter(candidate=candidate).order_by('-is_featured', '-created_at')
-    questions = DailyQuestion.objects.filter(candidate=candidate).order_by('-asked_at')
-    # Testimonials for dashboard
-    from .models import Testimonial, CampaignBenefit
-    testimonials = Testimonial.objects.filter(candidate=candidate).order_by('display_order', '-created_at')
-    benefits = CampaignBenefit.objects.filter(candidate=candidate).order_by('display_order', '-created_at')
+    # Get all candidate data for the dashboard (after any change above)
+    if request.method != 'GET':
+        candidate = load_dashboard_candidate(candidate.pk)
     
     context = {
         'candidate': candidate,
-        'events': events,
-        'speeches': speeches,
-        'polls': polls,
-        'supporters': supporters,
-        'supporters_count': supporters_count,
-        'gallery_items': gallery_items,
-        'questions': questions,
-        'testimonials': testimonials,
-        'benefits': benefits,
+        'events': candidate.dashboard_events,
+        'speeches': candidate.dashboard_speeches,
+        'polls': candidate.dashboard_polls,
+        'supporters': candidate.dashboard_supporters,
+        'supporters_count': len(candidate.dashboard_supporters),
+        'gallery_items': candidate.dashboard_gallery,
+        'questions': candidate.dashboard_questions,
+        'testimonials': candidate.dashboard_testimonials,
+        'benefits': candidate.dashboard_benefits,
     }
     return render(request, 'hub/candidate_dashboard.html', context)
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""
+Single entry point for recording poll votes
+"""
+from django.db import IntegrityError, transaction
+
+
+class VoteError(Exception):
+    pass
+
+
+class AlreadyVoted(VoteError):
+    pass
+
+
+class InvalidOption(VoteError):
+    pass
+
+
+def clean_options(poll, options):
+    """Validate selected option indices against ``poll``; returns a sorted list."""
+    try:
+        indices = sorted({int(value) for value in options})
+    except (TypeError, ValueError):
+        raise InvalidOption('option indices must be integers')
+    if not indices:
+        raise InvalidOption('no option selected')
+    if indices[0] < 0 or indices[-1] >= len(poll.options or []):
+        raise InvalidOption('option index out of range')
+    if len(indices) > 1 and not poll.allows_multiple_answers:
+        raise InvalidOption('poll allows a single answer')
+    return indices
+
+
+def cast_vote(poll, options, bot_user=None, user_ip=None, replace=False):
+    """Record a vote for ``options`` (option indices) on ``poll``.
+
+    Votes by a known voter (``bot_user``) are stored as PollResponse. Anonymous
+    public votes (``user_ip``) are stored as PollVote. Both feed the same
+    tally (hub.tallies) through hub.signals, inside this transaction.
+
+    Raises AlreadyVoted if the voter already voted (unless ``replace`` is set,
+    which updates a bot user's existing response), InvalidOption for bad
+    selections. Returns (record, created).
+    """
+    from .models import PollResponse, PollVote
+
+    indices = clean_options(poll, options)
+    if bot_user is None and not user_ip:
+        raise VoteError('bot_user or user_ip required')
+
+    with transaction.atomic():
+        if bot_user is not None:
+            if replace:
+                response = PollResponse.objects.select_for_update().filter(poll=poll, bot_user=bot_user).first()
+                if response is not None:
+                    if sorted(response.selected_options or []) != indices:
+                        response.selected_options = indices
+                        response.save(update_fields=['selected_options'])
+                    return response, False
+            try:
+                with transaction.atomic():
+                    return PollResponse.objects.create(poll=poll, bot_user=bot_user, selected_options=indices), True
+            except IntegrityError:
+                raise AlreadyVoted('this voter already answered the poll')
+
+        if len(indices) != 1:
+            raise InvalidOption('public votes select exactly one option')
+        try:
+            with transaction.atomic():
+                return PollVote.objects.create(poll=poll, user_ip=user_ip, option_index=indices[0]), True
+        except IntegrityError:
+            raise AlreadyVoted('this address already voted in the poll')
@@ -2,6 +2,7 @@
 ASGI config for tg_hub project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP goes to Django; WebSockets are routed by channels (see hub.routing).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,4 +14,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tg_hub.settings')
 
-application = get_asgi_application()
+# Set up Django before importing consumers, which import models
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from channels.security.websocket import AllowedHostsOriginValidator  # noqa: E402
+
+from hub.routing import websocket_urlpatterns  # noqa: E402
+
+application = ProtocolTypeRouter({
+    'http': django_asgi_app,
+    'websocket': AllowedHostsOriginValidator(URLRouter(websocket_urlpatterns)),
+})
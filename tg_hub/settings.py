@@ -44,9 +44,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'hub.loadtest.QueryCountHeaderMiddleware',  # only with LOADTEST_QUERY_COUNT_HEADER
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware', 
+    'hub.prerender.PrerenderedPageMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -107,6 +109,18 @@ REDIS_URL = f"redis://{REDIS_USER}:{REDIS_PASSWORD}@{REDIS_HOST}:{REDIS_PORT}/{R
 
     
 
+CACHES = {
+    "default": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": REDIS_URL,
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            # Degrade to cache misses instead of 500s if Redis is unreachable
+            "IGNORE_EXCEPTIONS": True,
+        },
+    }
+}
+
 CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels_redis.core.RedisChannelLayer",
@@ -215,3 +229,86 @@ ELECTION_360 = {
         'other': 5,
     }
 }
+
+# Telegram ingest: MessageLog rows are bulk-inserted in batches
+MESSAGE_LOG_BATCH_SIZE = 200
+MESSAGE_LOG_FLUSH_INTERVAL = 2  # seconds a webhook row may wait before flush
+UPDATE_DEDUP_WINDOW = 10000  # recent update_ids remembered in memory per bot
+
+# WebhookEvent retention (manage.py purge_webhook_events)
+WEBHOOK_EVENT_RETENTION_DAYS = 30
+WEBHOOK_EVENT_PURGE_CHUNK = 5000
+WEBHOOK_EVENT_SAMPLE_RATE = 1  # store 1 in N routine chat payloads; 1 = store all
+PROCESSED_UPDATE_RETENTION_DAYS = 7
+
+# Telegram Bot API (point at a local stand-in for benchmarks)
+TELEGRAM_API_BASE = 'https://api.telegram.org'
+OUTBOUND_WORKERS = 8  # concurrent reply senders per poller, ordered per chat
+OUTBOUND_QUEUE_SIZE = 1000  # queued replies per worker before the poller blocks
+
+# Bot conversation state (hub.conversation): cached, persisted to BotUser.state
+CONVERSATION_STATE_TTL = 7 * 24 * 3600
+CONVERSATION_PERSIST_INTERVAL = 30  # seconds between BotUser.state write-backs
+
+# In-process Bot registry (hub.registry)
+BOT_REGISTRY_CHECK_INTERVAL = 5  # seconds between cross-process generation checks
+BOT_REGISTRY_MAX_AGE = 300  # full reload even without invalidation
+
+# Webhook admission control (hub.admission), shared by all web processes through Redis
+WEBHOOK_MAX_IN_FLIGHT = 8  # updates processed at once, all bots
+WEBHOOK_MAX_IN_FLIGHT_PER_BOT = 4
+WEBHOOK_PRIORITY_HEADROOM = 2  # extra slots for /start and contact updates
+WEBHOOK_MAX_QUEUE = 16  # waiting updates before chatter is shed with 429
+WEBHOOK_QUEUE_TIMEOUT = 1.0  # seconds an update may wait for a slot
+WEBHOOK_RETRY_AFTER = 1
+WEBHOOK_SLOT_LEASE = 60  # seconds before a slot held by a crashed process is freed
+
+# Poll tallies (hub.tallies): counter rows per option a vote may land on
+POLL_TALLY_SHARDS = 8  # concurrent votes on one poll that never wait on each other
+
+# Anonymous candidate landing page cache (hub.page_cache)
+LANDING_CACHE_ENABLED = True
+LANDING_CACHE_TIMEOUT = 600  # seconds; pages are also invalidated on content changes
+LANDING_VERSION_TIMEOUT = 24 * 3600  # seconds; an expired version only costs one re-render
+
+# In-process candidate name index for /<candidate_name>/ (hub.name_index)
+CANDIDATE_NAME_INDEX_CHECK_INTERVAL = 5  # seconds between cross-process generation checks
+CANDIDATE_NAME_INDEX_MAX_AGE = 300  # full reload even without invalidation
+
+# Landing-page submissions (hub.ingest_queue): 'sync' writes them in the request,
+# 'queue' acknowledges at once and leaves the writes to drain_ingest_queue
+LANDING_INGEST_MODE = 'sync'
+LANDING_INGEST_BATCH_SIZE = 200  # submissions per drain transaction
+LANDING_INGEST_DEDUP_TTL = 86400  # seconds a queued phone / national ID / vote counts as a duplicate
+
+# Supporter national ID fingerprints (hub.identity); must never change once set
+NATIONAL_ID_FINGERPRINT_KEY = SECRET_KEY
+
+# Reverse proxies in front of Daphne that append to X-Forwarded-For (Railway's edge: 1).
+# hub.ratelimit.client_ip() takes the visitor's address from there; 0 trusts REMOTE_ADDR.
+TRUSTED_PROXY_COUNT = 1
+
+# Public landing-page POST limits (hub.ratelimit): scope -> (requests, sliding window in seconds)
+# A 'candidate' scope (all visitors of one candidate's pages) is supported but left
+# off: rally bursts are legitimate and the ingest queue absorbs them.
+LANDING_RATE_LIMITS = {
+    'ip': (600, 60),  # abuse only: a carrier NAT can put a whole rally behind one address
+    'phone': (5, 600),
+}
+
+# Resized copies of uploaded images (hub.images), stored next to the originals
+IMAGE_VARIANT_WIDTHS = (320, 640, 1280)  # pixels; changing them needs generate_image_variants --force
+IMAGE_VARIANT_DEFAULT_WIDTH = 640  # plain src for browsers without srcset
+IMAGE_VARIANT_QUALITY = 80
+IMAGE_VARIANT_BACKGROUND = True  # generate after commit on a worker thread; off: inline after commit
+
+# Static pre-rendered landing pages (hub.prerender), written by publish_landing_pages
+# and served to anonymous visitors before any view runs
+LANDING_PRERENDER_ENABLED = True
+LANDING_PRERENDER_ROOT = os.path.join(BASE_DIR, "prerendered")
+LANDING_PRERENDER_DEBOUNCE = 5  # seconds a changed layout must hold before it is re-rendered
+LANDING_PRERENDER_MAX_DELAY = 60  # seconds; re-render anyway while edits keep coming
+
+# Load tests (loadtest_landing --target http): send each response's query count
+# in an X-DB-Queries header. Only for servers under test.
+LOADTEST_QUERY_COUNT_HEADER = False